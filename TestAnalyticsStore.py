@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from threading import RLock
+
+from testing_config import make_config
+from corpus_stats import WordFrequencies
+from crawler.analytics import AnalyticsStore
+from crawler.storage import WriteBehindShelf
+from fingerprint_index import FingerprintIndex
+from trap_detector import TrapDetector
+
+
+def make_parser_class():
+    # Stand-in for the static statistics on parser.Parser
+    return type("StatsParser", (), {
+        "pages_parsed": 0, "unique_pages": set(), "subdomains": {}, "traps": TrapDetector(),
+        "longest_page": ("", 0), "fingerprints": FingerprintIndex(), "word_frequencies": WordFrequencies(),
+        "analytics": None, "lock": RLock()})
+
+
+class TestAnalyticsStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config = make_config(self.directory.name, ANALYTICS="analytics.sqlite")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def record_page(self, store, parser_class):
+        parser_class.pages_parsed += 1
+        parser_class.longest_page = ("https://www.ics.uci.edu/a", 120)
+        store.add_page("https://www.ics.uci.edu/a")
+        store.add_subdomain("www.ics.uci.edu")
+        store.add_fingerprint((1 << 63) | 5)
+        store.add_words({"crawler": 2, "uci": 1})
+        parser_class.traps.allow("https://www.ics.uci.edu/b")
+
+    def test_statistics_survive_resume(self):
+        store = AnalyticsStore(self.config, restart=False)
+        store.load(make_parser_class())
+        self.record_page(store, store.parser_class)
+        store.close()
+
+        resumed = make_parser_class()
+        store = AnalyticsStore(self.config, restart=False)
+        store.load(resumed)
+        store.close()
+        self.assertEqual(resumed.pages_parsed, 1)
+        self.assertEqual(resumed.unique_pages, {"https://www.ics.uci.edu/a"})
+        self.assertEqual(resumed.subdomains, {"www.ics.uci.edu": 1})
+        self.assertEqual(list(resumed.fingerprints), [(1 << 63) | 5])
+        self.assertEqual(resumed.word_frequencies.top(), {"crawler": 2, "uci": 1})
+        self.assertEqual(resumed.traps.patterns.get("www.ics.uci.edu/b"), 1)
+        self.assertEqual(resumed.longest_page, ("https://www.ics.uci.edu/a", 120))
+
+    def test_written_with_the_save_file(self):
+        store = AnalyticsStore(self.config, restart=False)
+        store.load(make_parser_class())
+        save = WriteBehindShelf(os.path.join(self.directory.name, "frontier.shelve"), batch_size=2)
+        save.before_flush = store.flush
+        self.record_page(store, store.parser_class)
+        save["a"] = ("https://www.ics.uci.edu/a", True)
+        save.sync()
+        self.assertEqual(store.db.execute("SELECT COUNT(*) FROM pages").fetchone()[0], 0)
+        save["b"] = ("https://www.ics.uci.edu/b", True)
+        save.sync()
+        self.assertEqual(store.db.execute("SELECT COUNT(*) FROM pages").fetchone()[0], 1)
+        save.close()
+        store.close()
+
+    def test_forgotten_trap_patterns_are_deleted(self):
+        parser_class = make_parser_class()
+        parser_class.traps = TrapDetector(max_tracked=2)
+        store = AnalyticsStore(self.config, restart=False)
+        store.load(parser_class)
+        for host in "abc":
+            parser_class.traps.allow(f"https://{host}.ics.uci.edu/x")
+        store.flush()
+        self.assertEqual(
+            [pattern for pattern, in store.db.execute("SELECT pattern FROM trap_patterns ORDER BY rowid")],
+            ["b.ics.uci.edu/x", "c.ics.uci.edu/x"])
+        store.close()
+
+    def test_restart_deletes_statistics(self):
+        store = AnalyticsStore(self.config, restart=False)
+        store.load(make_parser_class())
+        self.record_page(store, store.parser_class)
+        store.close()
+
+        restarted = make_parser_class()
+        store = AnalyticsStore(self.config, restart=True)
+        store.load(restarted)
+        store.close()
+        self.assertEqual(restarted.unique_pages, set())
+
+
+if __name__ == '__main__':
+    unittest.main()
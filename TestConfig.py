@@ -0,0 +1,19 @@
+import unittest
+
+from testing_config import make_config
+
+CHOICES = [
+    ("SCHEDULER", "priority"), ("ENGINE", "async"), ("EXTRACTOR", "stream"), ("WORDCOUNTS", "sketch"),
+    ("SAVEFORMAT", "sqlite"), ("SITEMAPS", "robots"), ("OVERSIZEDPAGES", "skip")]
+
+
+class TestConfig(unittest.TestCase):
+    def test_choices(self):
+        for option, value in CHOICES:
+            make_config(**{option: value})
+            with self.assertRaisesRegex(ValueError, f"{option} must be .* or .*, not '{value.upper()}'"):
+                make_config(**{option: value.upper()})
+
+
+if __name__ == '__main__':
+    unittest.main()
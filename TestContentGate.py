@@ -0,0 +1,68 @@
+import unittest
+from types import SimpleNamespace
+from content_gate import *
+from testing_config import make_config
+
+PAGE = b"<html><body><p>Hello world</p></body></html>"
+
+
+def response(content, headers=None):
+    return SimpleNamespace(content=content, headers=headers or {})
+
+
+class TestContentGate(unittest.TestCase):
+    def test_html_passes(self):
+        gate = ContentGate()
+        self.assertEqual(gate.check(response(PAGE, {"Content-Type": "text/html; charset=utf-8"})), PAGE)
+        self.assertEqual(gate.check(response(PAGE)), PAGE)  # no Content-Type, sniffed only
+        self.assertEqual(gate.report(), {})
+
+    def test_not_html(self):
+        gate = ContentGate()
+        self.assertIsNone(gate.check(response(b"a,b\n1,2\n", {"content-type": "text/csv"})))
+        self.assertEqual(gate.report()[NOT_HTML][:2], (1, 8))
+
+    def test_binary_sniffing(self):
+        gate = ContentGate()
+        # Served as html, but the body is a pdf
+        self.assertIsNone(gate.check(response(b"%PDF-1.4\n...", {"Content-Type": "text/html"})))
+        self.assertIsNone(gate.check(response(b"<html>\x00\x01\x02")))
+        self.assertEqual(gate.report()[BINARY][0], 2)
+
+    def test_empty(self):
+        gate = ContentGate()
+        self.assertIsNone(gate.check(response(b"")))
+        self.assertEqual(gate.report()[EMPTY][:2], (1, 0))
+
+    def test_oversized(self):
+        truncating, skipping = ContentGate(max_size=10), ContentGate(max_size=10, truncate=False)
+        self.assertEqual(truncating.check(response(PAGE)), PAGE[:10])
+        self.assertEqual(truncating.report()[TRUNCATED][:2], (1, len(PAGE) - 10))
+        self.assertIsNone(skipping.check(response(PAGE)))
+        # Content-Length is enough to know a body is too large
+        self.assertIsNone(ContentGate(max_size=100, truncate=False).check(
+            response(PAGE, {"Content-Length": "5000000"})))
+
+    def test_oversized_pages_setting(self):
+        self.assertEqual(make_config(OVERSIZEDPAGES="skip").oversized_pages, "skip")
+        with self.assertRaises(ValueError):
+            make_config(OVERSIZEDPAGES="trunacte")
+
+    def test_parsing_saved_estimate(self):
+        gate = ContentGate()
+        gate.record_parse(1000, 0.5)
+        gate.record_parse(3000, 1.5)
+        gate.check(response(b"\x89PNG" + bytes(996)))
+        self.assertEqual(gate.report()[BINARY], (1, 1000, 1.0))
+
+    def test_add_totals(self):
+        first, second = ContentGate(), ContentGate()
+        first.record_parse(1000, 1.0)
+        first.check(response(b""))
+        second.check(response(b"\x89PNG" + bytes(996)))
+        second.add_totals(first.totals())
+        self.assertEqual(second.report(), {EMPTY: (1, 0, 1.0), BINARY: (1, 1000, 1.0)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from corpus_stats import *
+
+
+class TestWordFrequencies(unittest.TestCase):
+    def test_stopwords_dropped_at_ingest(self):
+        frequencies = WordFrequencies({"the"})
+        frequencies.add(["the", "crawler", "the", "page"])
+        self.assertEqual(frequencies.top(), {"crawler": 1, "page": 1})
+
+    def test_top_orders_by_frequency_then_word(self):
+        frequencies = WordFrequencies()
+        frequencies.add(["b", "a", "c", "c"])
+        frequencies.add(["b"])
+        self.assertEqual(list(frequencies.top(2).items()), [("b", 2), ("c", 2)])
+
+
+class TestSketchWordFrequencies(unittest.TestCase):
+    def test_keeps_most_frequent_words(self):
+        frequencies = SketchWordFrequencies({"the"}, width=1024, top_k=3)
+        for i in range(50):
+            frequencies.add(["the", "uci", "ics", "ics"] + [f"rare{i}"])
+        frequencies.add(["crawler"] * 30)
+        self.assertEqual(list(frequencies.top(3)), ["ics", "uci", "crawler"])
+        self.assertEqual(frequencies.top(1)["ics"], 100)
+        self.assertEqual(len(frequencies), 3)
+
+    def test_heap_stays_bounded_when_candidates_grow(self):
+        frequencies = SketchWordFrequencies(width=1024, top_k=3)
+        for _ in range(100):
+            frequencies.add(["uci", "ics"])
+        self.assertLessEqual(len(frequencies._heap), 4 * 3)
+        self.assertEqual(frequencies.top(), {"ics": 100, "uci": 100})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from queue import Queue
+
+from testing_config import make_config
+from utils.stub_cache_server import StubCacheServer, StubSite
+from crawler.distributed import *
+
+HOSTS = [f"site{host}.ics.uci.edu" for host in range(1000)]
+
+
+class TestHashRing(unittest.TestCase):
+    def test_spreads_hosts(self):
+        ring = HashRing(4)
+        shards = [ring.shard_of_host(host) for host in HOSTS]
+        for shard in range(4):
+            self.assertTrue(150 < shards.count(shard) < 350, shards.count(shard))
+
+    def test_url_shard_is_its_host_shard(self):
+        ring = HashRing(4)
+        self.assertEqual(ring.shard_of("https://site7.ics.uci.edu/a/b?c=d"), ring.shard_of_host("site7.ics.uci.edu"))
+
+    def test_new_shard_moves_few_hosts(self):
+        before, after = HashRing(4), HashRing(5)
+        moved = [host for host in HOSTS if before.shard_of_host(host) != after.shard_of_host(host)]
+        self.assertLess(len(moved), 300)  # about 200 (1/5) expected, anything but 4/5 rehashed
+        # Hosts only move to the new shard
+        self.assertEqual({after.shard_of_host(host) for host in moved}, {4})
+
+
+class TestShardedFrontier(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.ring = HashRing(2)
+        self.local = next(f"https://{host}/" for host in HOSTS if self.ring.shard_of_host(host) == 0)
+        self.remote = next(f"https://{host}/" for host in HOSTS if self.ring.shard_of_host(host) == 1)
+        self.inboxes = [Queue(), Queue()]
+        self.outbox = ShardOutbox(self.inboxes, batch_size=2)
+        config = make_config(self.directory.name, SEEDURL=[self.local, self.remote])
+        self.frontier = ShardedFrontier(config, True, self.ring, 0, self.outbox)
+
+    def tearDown(self):
+        self.frontier.close()
+        self.directory.cleanup()
+
+    def test_keeps_own_seeds_only(self):
+        self.assertEqual(len(self.frontier.to_be_downloaded), 1)
+        self.assertEqual(len(self.outbox), 0)
+
+    def test_forwards_other_shards_urls_in_batches(self):
+        self.frontier.add_url(self.remote + "a")
+        self.assertTrue(self.inboxes[1].empty())
+        self.frontier.add_url(self.remote + "b")
+        self.assertEqual(self.inboxes[1].get_nowait(), (URLS, [self.remote + "a", self.remote + "b"]))
+        self.frontier.add_url(self.remote + "c")
+        self.outbox.flush()
+        self.assertEqual(self.inboxes[1].get_nowait(), (URLS, [self.remote + "c"]))
+        self.assertEqual(self.outbox.sent, 2)
+        self.assertTrue(self.inboxes[0].empty())
+
+    def test_waits_for_forwarded_urls_until_stopped(self):
+        url, _ = self.frontier.poll_tbd_url()
+        self.frontier.mark_url_complete(url)
+        self.assertTrue(self.frontier.idle())
+        self.assertEqual(self.frontier.poll_tbd_url(), (None, IN_FLIGHT_POLL_INTERVAL))
+        self.frontier.add_forwarded_urls([self.local + "forwarded"])
+        self.assertFalse(self.frontier.idle())
+        self.assertEqual(self.frontier.poll_tbd_url(), (self.local + "forwarded", None))
+        self.frontier.mark_url_complete(self.local + "forwarded")
+        self.frontier.stop()
+        self.assertEqual(self.frontier.poll_tbd_url(), (None, None))
+
+
+class MergedStatistics(object):
+    # Stand-in for parser.Parser, so the test does not change its statistics
+    shards = []
+
+    @staticmethod
+    def merge_statistics(statistics):
+        MergedStatistics.shards.append(statistics)
+
+
+class TestDistributedCrawler(unittest.TestCase):
+    def test_shards_crawl_the_site_once(self):
+        site = StubSite(hosts=6, pages_per_host=5)
+        server = StubCacheServer(site=site)
+        with tempfile.TemporaryDirectory() as directory:
+            config = make_config(
+                directory, server.start(), ANALYTICS="analytics.sqlite", SHARDS=2, THREADCOUNT=2,
+                ENGINE="threads", SCHEDULER="polite", SEEDURL=site.seed_urls())
+            try:
+                DistributedCrawler(config, True, MergedStatistics).start()
+            finally:
+                server.shutdown()
+                server.server_close()
+            self.assertEqual(
+                sorted(os.path.basename(path) for path in os.listdir(directory) if path.startswith("analytics")),
+                ["analytics.sqlite.shard0", "analytics.sqlite.shard1"])
+        shards = MergedStatistics.shards
+        self.assertEqual(len(shards), 2)
+        pages = [statistics["unique_pages"] for statistics in shards]
+        self.assertEqual(len(pages[0] | pages[1]), 30)
+        self.assertFalse(pages[0] & pages[1])
+        # Every host is crawled by one shard only (shards report in the order they finish)
+        ring = HashRing(2)
+        self.assertEqual(sorted(len({ring.shard_of(url) for url in urls}) for urls in pages), [1, 1])
+        self.assertNotEqual(ring.shard_of(next(iter(pages[0]))), ring.shard_of(next(iter(pages[1]))))
+        self.assertEqual(sum(statistics["pages_parsed"] for statistics in shards), 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
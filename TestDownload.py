@@ -0,0 +1,152 @@
+import os
+import pickle
+import socket
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from testing_config import make_config
+from utils.download import *
+from utils.archive import ResponseArchive
+from utils.stub_cache_server import StubCacheServer, StubSite, ReplaySite
+
+
+class TestDownloader(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StubCacheServer(site=StubSite(hosts=2, pages_per_host=2))
+        cls.cache_server = cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_downloads_page(self):
+        downloader = Downloader(make_config(cache_server=self.cache_server))
+        resp = downloader.download("https://site0.ics.uci.edu/page1")
+        self.assertEqual(resp.status, 200)
+        self.assertIn(b"site0page1", resp.raw_response.content)
+        self.assertEqual(downloader.stats.snapshot()["downloads"], 1)
+
+    def test_reuses_session_per_thread(self):
+        downloader = Downloader(make_config(cache_server=self.cache_server))
+        downloader.download("https://site0.ics.uci.edu/page0")
+        session = downloader._session()
+        downloader.download("https://site1.ics.uci.edu/page0")
+        self.assertIs(downloader._session(), session)
+
+    def test_drops_large_response(self):
+        downloader = Downloader(make_config(cache_server=self.cache_server, MAXBODYSIZE=100))
+        resp = downloader.download("https://site0.ics.uci.edu/page0")
+        self.assertEqual(resp.status, NO_RESPONSE)
+        self.assertIsNone(resp.raw_response)
+        self.assertEqual(downloader.stats.too_large, 1)
+
+    def test_retries_connection_errors(self):
+        with socket.socket() as unused:
+            unused.bind(("localhost", 0))
+            port = unused.getsockname()[1]
+        downloader = Downloader(make_config(cache_server=("localhost", port)))
+        resp = downloader.download("https://site0.ics.uci.edu/page0")
+        self.assertEqual(resp.status, NO_RESPONSE)
+        self.assertEqual(downloader.stats.errors, 3)
+        self.assertEqual(downloader.stats.retries, 2)
+
+    def test_retries_broken_replies(self):
+        downloader = Downloader(make_config(cache_server=self.cache_server))
+        downloader.sessions.session = mock.Mock(get=mock.Mock(
+            side_effect=requests.exceptions.ChunkedEncodingError("connection broken")))
+        resp = downloader.download("https://site0.ics.uci.edu/page0")
+        self.assertEqual(resp.status, NO_RESPONSE)
+        self.assertEqual(downloader.stats.errors, 3)
+
+    def test_undecodable_reply(self):
+        server = StubCacheServer(site=SimpleNamespace(reply=lambda url: b"\xa1"))  # cut short
+        downloader = Downloader(make_config(cache_server=server.start()))
+        try:
+            resp = downloader.download("https://site0.ics.uci.edu/page0")
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(resp.status, NO_RESPONSE)
+        self.assertIn("decode", resp.error)
+
+
+class TestDownloadAsync(unittest.TestCase):
+    def download(self, url, **options):
+        import asyncio
+        import aiohttp
+
+        async def run():
+            async with aiohttp.ClientSession() as session:
+                return await download_async(url, config, session)
+
+        server = StubCacheServer(site=StubSite(hosts=1, pages_per_host=1, words_per_page=20000))
+        config = make_config(cache_server=server.start(), **options)
+        try:
+            return asyncio.run(run())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_reads_body_larger_than_one_chunk(self):
+        resp = self.download("https://site0.ics.uci.edu/page0")
+        self.assertEqual(resp.status, 200)
+        self.assertGreater(len(resp.raw_response.content), 200_000)
+
+    def test_drops_large_response(self):
+        resp = self.download("https://site0.ics.uci.edu/page0", MAXBODYSIZE=100_000)
+        self.assertEqual(resp.status, NO_RESPONSE)
+
+
+class TestResponse(unittest.TestCase):
+    def test_unpickles_on_first_access(self):
+        resp = Response({"url": "u", "status": 200, "response": pickle.dumps(SimpleNamespace(content=b"page"))})
+        self.assertIsNotNone(resp._payload)
+        self.assertEqual(resp.raw_response.content, b"page")
+        self.assertIsNone(resp._payload)  # the pickled copy is dropped once unpickled
+        self.assertIs(resp.raw_response, resp.raw_response)
+
+    def test_release(self):
+        resp = Response({"url": "u", "status": 200, "response": pickle.dumps(SimpleNamespace(content=b"page"))})
+        resp.release()
+        self.assertIsNone(resp.raw_response)
+
+    def test_no_response(self):
+        self.assertIsNone(Response({"url": "u", "status": 404}).raw_response)
+        self.assertIsNone(Response({"url": "u", "status": 200, "response": None}).raw_response)
+        self.assertIsNone(Response({"url": "u", "status": 200, "response": b"not a pickle"}).raw_response)
+
+
+class TestRecordReplay(unittest.TestCase):
+    def test_record_and_replay(self):
+        urls = ["https://site0.ics.uci.edu/page0", "https://site1.ics.uci.edu/page1", "https://site9.ics.uci.edu/page0"]
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "recorded.sqlite")
+            live = StubCacheServer(site=StubSite(hosts=2, pages_per_host=2))
+            downloader = Downloader(make_config(cache_server=live.start(), RECORD=path))
+            recorded = [downloader.download(url) for url in urls]
+            downloader.flush()
+            live.shutdown()
+            live.server_close()
+
+            archive = ResponseArchive(path)
+            self.assertEqual(archive.urls(), urls)
+            replay = StubCacheServer(site=ReplaySite(archive))
+            downloader = Downloader(make_config(cache_server=replay.start()))
+            try:
+                for url, original in zip(urls, recorded):
+                    resp = downloader.download(url)
+                    self.assertEqual(resp.status, original.status)
+                    self.assertEqual(resp.raw_response.content, original.raw_response.content)
+                self.assertEqual(downloader.download("https://site0.ics.uci.edu/other").raw_response.status_code, 404)
+            finally:
+                replay.shutdown()
+                replay.server_close()
+                archive.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from collections import Counter
+from extractors import *
+
+PAGE = (b"<html><head><title>ICS</title><style>p { color: red; }</style>"
+        b"<script>var tracking = 1;</script></head><body>"
+        b"<p>Computer <b>Sci</b>ence &amp; Informatics, caf\xc3\xa9 2024</p><!-- hidden comment -->"
+        b"<a href='/about?a=1&amp;b=2'>About</a><a name='top'>Top</a>"
+        b"<a href=\"https://www.ics.uci.edu/\">ICS</a></body></html>")
+
+
+class TestExtractors(unittest.TestCase):
+    def test_backends_match_bs4(self):
+        expected = extract(PAGE, "bs4")
+        for backend in EXTRACTORS:
+            self.assertEqual(extract(PAGE, backend), expected, backend)
+
+    def test_skips_scripts_styles_and_comments(self):
+        token_counts, hrefs, skip_reason = extract(PAGE, "lxml")
+        # Text of neighbouring tags is joined without a space, like BeautifulSoup's get_text()
+        self.assertEqual(token_counts, Counter(["icscomputer", "science", "informatics", "caf", "2024abouttopics"]))
+        self.assertEqual(hrefs, ["/about?a=1&b=2", "https://www.ics.uci.edu/"])
+        self.assertIsNone(skip_reason)
+
+    def test_token_split_across_pieces(self):
+        collector = TokenCollector(100)
+        for piece in ["Hel", "lo Wor", "ld", "!"]:
+            collector.feed(piece)
+        self.assertEqual(collector.close(), Counter(["hello", "world"]))
+
+    def test_too_many_tokens(self):
+        page = b"<p>" + b"word\n" * 200 + b"</p><a href='/next'>next</a>"
+        for backend in EXTRACTORS:
+            self.assertEqual(extract(page, backend, max_tokens=100)[0::2], (Counter(), tokenizer.TOO_MANY_TOKENS), backend)
+            self.assertEqual(extract(page, backend, max_tokens=1000)[0], Counter({"word": 200, "next": 1}), backend)
+
+    def test_latin1_page(self):
+        token_counts, _, _ = extract("<p>déjà vu</p>".encode("latin-1"), "stream")
+        self.assertEqual(token_counts, Counter(["d", "j", "vu"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import random
+import unittest
+from fingerprint_index import *
+from simhash import hamming_distance
+
+
+class TestFingerprintIndex(unittest.TestCase):
+    def test_threshold_maps_to_distance(self):
+        self.assertEqual(FingerprintIndex.from_similarity(0.95).max_distance, 3)
+        self.assertEqual(FingerprintIndex.from_similarity(1.0).max_distance, 0)
+
+    def test_finds_fingerprint_within_distance(self):
+        index = FingerprintIndex(max_distance=3)
+        index.add(0b1011 << 40)
+        self.assertTrue(index.contains_near((0b1011 << 40) ^ 0b111))
+
+    def test_rejects_fingerprint_past_distance(self):
+        index = FingerprintIndex(max_distance=3)
+        index.add(0b1011 << 40)
+        self.assertFalse(index.contains_near((0b1011 << 40) ^ 0b1111))
+
+    def test_zero_fingerprint(self):
+        index = FingerprintIndex(max_distance=3)
+        index.add(0)
+        self.assertTrue(index.contains_near(0b111))
+        self.assertEqual(list(index), [0])
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(1)
+        index = FingerprintIndex(max_distance=3)
+        stored = []
+        for _ in range(2000):
+            fingerprint = rng.getrandbits(64)
+            if rng.random() < 0.5 and stored:
+                fingerprint = rng.choice(stored) ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64))
+            expected = any(hamming_distance(fingerprint, other) <= 3 for other in stored)
+            self.assertEqual(index.contains_near(fingerprint), expected)
+            if not expected:
+                index.add(fingerprint)
+                stored.append(fingerprint)
+        self.assertEqual(sorted(index), sorted(stored))
+
+
+if __name__ == '__main__':
+    unittest.main()
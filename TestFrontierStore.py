@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from testing_config import make_config
+from crawler.frontier_store import *
+from crawler.frontier import Frontier
+
+
+class TestSqliteFrontierStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "frontier.sqlite")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_pending_urls_are_not_completed(self):
+        save = SqliteFrontierStore(self.path)
+        save["a"] = ("https://www.ics.uci.edu/a", False)
+        save["b"] = ("https://www.ics.uci.edu/b", False)
+        save["c"] = ("https://www.cs.uci.edu/c", False)
+        save["a"] = ("https://www.ics.uci.edu/a", True)
+        save["b"] = ("https://www.ics.uci.edu/b", False, 4)
+        save.close()
+        save = SqliteFrontierStore(self.path)
+        self.assertEqual(
+            sorted(save.pending_urls(page_size=1)),
+            [("https://www.cs.uci.edu/c", 1), ("https://www.ics.uci.edu/b", 4)])
+        self.assertEqual(save.downloaded_by_host(), {"www.ics.uci.edu": 1})
+        self.assertEqual(len(save), 3)
+        save.close()
+
+    def test_batched_writes_are_seen(self):
+        save = SqliteFrontierStore(self.path, batch_size=10, flush_interval=60)
+        save["a"] = ("https://www.ics.uci.edu/a", False)
+        save.sync()
+        self.assertTrue(save.contains("https://www.ics.uci.edu/a"))
+        self.assertFalse(save.contains("https://www.ics.uci.edu/b"))
+        self.assertEqual(len(save), 1)
+        save.close()
+
+    def test_stored_urls_are_seen_after_reopening(self):
+        save = SqliteFrontierStore(self.path)
+        save["a"] = ("https://www.ics.uci.edu/a", True)
+        save.close()
+        seen = StoredUrlSet(SqliteFrontierStore(self.path))
+        self.assertIn("https://www.ics.uci.edu/a", seen)
+        self.assertFalse(seen.add("https://www.ics.uci.edu/a"))
+        self.assertTrue(seen.add("https://www.ics.uci.edu/b"))
+        self.assertFalse(seen.add("https://www.ics.uci.edu/b"))
+        seen.store.close()
+
+
+class TestSqliteFrontier(unittest.TestCase):
+    def test_resumes_pending_urls(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = make_config(directory, SCHEDULER="priority", SAVEFORMAT="sqlite", SAVE="frontier.sqlite")
+            frontier = Frontier(config, True)
+            url, _ = frontier.poll_tbd_url()
+            frontier.mark_url_complete(url)
+            frontier.add_url("https://www.ics.uci.edu/a")
+            frontier.add_url("https://www.ics.uci.edu/a")
+            frontier.add_url("https://www.ics.uci.edu/b")
+            frontier.close()
+            frontier = Frontier(config, False)
+            self.assertEqual(frontier.to_be_downloaded.inlinks, {"https://www.ics.uci.edu/a": 2, "https://www.ics.uci.edu/b": 1})
+            self.assertEqual(frontier.to_be_downloaded.downloaded, {"www.ics.uci.edu": 1})
+            # Urls from the first run are not added again
+            frontier.add_url("https://www.ics.uci.edu")
+            self.assertEqual(len(frontier.to_be_downloaded), 2)
+            frontier.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
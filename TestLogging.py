@@ -0,0 +1,56 @@
+import logging
+import os
+import unittest
+
+from utils.logs import *
+
+
+class TestPerUrlFilter(unittest.TestCase):
+    def record(self, level=logging.INFO, per_url=True):
+        record = logging.LogRecord("Worker-0", level, __file__, 0, "Downloaded %s", ("url",), None)
+        if per_url:
+            record.per_url = True
+        return record
+
+    def test_sampling(self):
+        per_url = PerUrlFilter(sample_every=10)
+        kept = sum(per_url.filter(self.record()) for _ in range(100))
+        self.assertEqual(kept, 10)
+
+    def test_rate_limit(self):
+        per_url = PerUrlFilter(max_per_second=5)
+        kept = sum(per_url.filter(self.record()) for _ in range(100))
+        # The loop may cross into the next second once
+        self.assertIn(kept, (5, 10))
+
+    def test_other_lines_always_kept(self):
+        per_url = PerUrlFilter(sample_every=1000, max_per_second=1)
+        self.assertTrue(all(per_url.filter(self.record(per_url=False)) for _ in range(10)))
+        self.assertTrue(all(per_url.filter(self.record(logging.WARNING)) for _ in range(10)))
+
+
+class TestGetLogger(unittest.TestCase):
+    def test_idempotent(self):
+        logger = get_logger("TestLogging-idempotent", "TestLogging")
+        self.assertIs(get_logger("TestLogging-idempotent", "TestLogging"), logger)
+        self.assertEqual(len(logger.handlers), 1)
+
+    def test_shared_file_written_after_flush(self):
+        path = os.path.join(LOG_DIR, "TestLoggingShared.log")
+        first = get_logger("TestLogging-first", "TestLoggingShared")
+        second = get_logger("TestLogging-second", "TestLoggingShared")
+        try:
+            first.warning("first line")
+            second.warning("second %s", "line")
+            flush_logs()
+            with open(path) as log_file:
+                lines = log_file.read().splitlines()
+            self.assertEqual(len(lines), 2)
+            self.assertTrue(lines[0].endswith("TestLogging-first - WARNING - first line"))
+            self.assertTrue(lines[1].endswith("TestLogging-second - WARNING - second line"))
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
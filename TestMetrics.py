@@ -0,0 +1,78 @@
+import json
+import os
+import socket
+import tempfile
+import unittest
+from urllib.request import urlopen
+
+from utils.metrics import *
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram(self):
+        histogram = Histogram()
+        for milliseconds in range(1, 101):
+            histogram.observe(milliseconds / 1000)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 100)
+        self.assertAlmostEqual(snapshot["mean_seconds"], 0.0505)
+        self.assertEqual(snapshot["max_seconds"], 0.1)
+        # Percentiles are bucket upper bounds: within a factor of two above the real value
+        self.assertTrue(0.05 <= snapshot["p50_seconds"] <= 0.1)
+        self.assertTrue(0.095 <= snapshot["p95_seconds"] <= 0.1)
+
+    def test_snapshot(self):
+        metrics = Metrics()
+        with metrics.time("parse"):
+            pass
+        metrics.observe("download", 0.2)
+        metrics.count("pages compared", 4)
+        metrics.count("near duplicates")
+        metrics.ratio("near duplicate rate", "near duplicates", "pages compared")
+        metrics.ratio("unused", "missing", "also missing")
+        metrics.gauge("frontier", lambda: {"waiting": 3})
+        metrics.gauge("broken", lambda: 1 / 0)
+        snapshot = metrics.snapshot()
+        self.assertEqual(set(snapshot["stages"]), {"parse", "download"})
+        self.assertEqual(snapshot["counters"], {"pages compared": 4, "near duplicates": 1})
+        self.assertEqual(snapshot["ratios"], {"near duplicate rate": 0.25, "unused": 0.0})
+        self.assertEqual(snapshot["gauges"]["frontier"], {"waiting": 3})
+        self.assertIn("ZeroDivisionError", snapshot["gauges"]["broken"])
+        # Rates are per second since the previous snapshot
+        self.assertEqual(metrics.snapshot()["per_second"]["pages compared"], 0.0)
+        json.dumps(snapshot)
+
+    def test_readers_keep_their_own_rates(self):
+        metrics = Metrics()
+        metrics.count("pages downloaded", 10)
+        self.assertGreater(metrics.snapshot("http")["per_second"]["pages downloaded"], 0.0)
+        # The endpoint's snapshot does not reset the file's rates
+        self.assertGreater(metrics.snapshot("file")["per_second"]["pages downloaded"], 0.0)
+        self.assertEqual(metrics.snapshot("http")["per_second"]["pages downloaded"], 0.0)
+
+    def test_snapshot_file(self):
+        metrics = Metrics()
+        metrics.count("pages downloaded", 2)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "metrics.json")
+            exporter = MetricsExporter(metrics, snapshot_file=path, interval=60).start()
+            exporter.stop()  # writes a last snapshot
+            with open(path) as snapshot_file:
+                self.assertEqual(json.load(snapshot_file)["counters"], {"pages downloaded": 2})
+
+    def test_http_endpoint(self):
+        with socket.socket() as unused:
+            unused.bind(("localhost", 0))
+            port = unused.getsockname()[1]
+        metrics = Metrics()
+        metrics.count("pages downloaded")
+        exporter = MetricsExporter(metrics, port=port).start()
+        try:
+            with urlopen(f"http://localhost:{port}/metrics") as response:
+                self.assertEqual(json.load(response)["counters"], {"pages downloaded": 1})
+        finally:
+            exporter.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from utils import normalize, get_urlhash
+
+
+class TestNormalize(unittest.TestCase):
+    def test_host_scheme_and_port(self):
+        self.assertEqual(normalize("HTTPS://WWW.ICS.UCI.EDU:443/About"), "https://www.ics.uci.edu/About")
+        self.assertEqual(normalize("http://www.ics.uci.edu:80/a"), "http://www.ics.uci.edu/a")
+        self.assertEqual(normalize("http://www.ics.uci.edu:8080/a"), "http://www.ics.uci.edu:8080/a")
+
+    def test_trailing_slash_and_fragment(self):
+        self.assertEqual(normalize("https://www.ics.uci.edu/"), "https://www.ics.uci.edu")
+        self.assertEqual(normalize("https://www.ics.uci.edu/a/#people"), "https://www.ics.uci.edu/a")
+
+    def test_dot_segments(self):
+        self.assertEqual(normalize("https://ics.uci.edu/a/./b/../c"), "https://ics.uci.edu/a/c")
+        self.assertEqual(normalize("https://ics.uci.edu/../../c"), "https://ics.uci.edu/c")
+
+    def test_percent_encoding(self):
+        self.assertEqual(normalize("https://ics.uci.edu/%7euser/a%2fb"), "https://ics.uci.edu/~user/a%2Fb")
+
+    def test_query(self):
+        self.assertEqual(normalize("https://ics.uci.edu/events?utm_source=mail&page=2&fbclid=x&cat=talks"),
+                         "https://ics.uci.edu/events?cat=talks&page=2")
+        self.assertEqual(normalize("https://ics.uci.edu/events?share=twitter"), "https://ics.uci.edu/events")
+
+    def test_idempotent(self):
+        url = normalize("https://WWW.ics.uci.edu:443/a/../b/?z=1&a=%7E#x")
+        self.assertEqual(normalize(url), url)
+        self.assertEqual(get_urlhash(normalize("https://ics.uci.edu/?b=1&a=2")),
+                         get_urlhash(normalize("https://ics.uci.edu?a=2&b=1")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import tempfile
+import unittest
+
+from testing_config import make_config
+from crawler.rate_control import *
+from crawler.frontier import Frontier
+
+URL = "https://www.ics.uci.edu/a"
+RATES = {"POLITENESS": 1, "RATECEILING": 8, "RATELATENCY": 0}
+
+
+class TestHostRateControl(unittest.TestCase):
+    def test_backs_off_up_to_ceiling(self):
+        rate = HostRateControl(make_config(**RATES))
+        rate.observe(URL, 429, 0.1)
+        self.assertEqual(rate.delay(URL), 2.0)
+        rate.observe(URL, 503, 0.1)
+        self.assertEqual(rate.delay(URL), 4.0)
+        for _ in range(3):
+            rate.observe(URL, 0, 0.1)
+        self.assertEqual(rate.delay(URL), 8.0)
+        # Other hosts keep the POLITENESS delay
+        self.assertEqual(rate.delay("https://www.cs.uci.edu/a"), 1.0)
+        self.assertEqual(rate.snapshot()["backed_off"], 1)
+
+    def test_speeds_up_down_to_floor(self):
+        rate = HostRateControl(make_config(**RATES, RATEFLOOR=0.5))
+        rate.observe(URL, 500, 0.1)
+        for _ in range(50):
+            rate.observe(URL, 200, 0.1)
+        self.assertEqual(rate.delay(URL), 0.5)
+
+    def test_slow_hosts_wait_longer(self):
+        rate = HostRateControl(make_config(**dict(RATES, RATELATENCY=2)))
+        rate.observe(URL, 200, 3.0)
+        self.assertEqual(rate.delay(URL), 6.0)
+        rate.observe(URL, 200, 3.0)
+        self.assertEqual(rate.delay(URL), 6.0)
+
+
+class TestFrontierRateControl(unittest.TestCase):
+    def test_download_time_counts_towards_delay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = make_config(
+                directory, **dict(RATES, POLITENESS=10), SCHEDULER="polite",
+                SEEDURL=["https://www.ics.uci.edu/a", "https://www.ics.uci.edu/b"])
+            frontier = Frontier(config, True)
+            url, _ = frontier.poll_tbd_url()
+            frontier.fetched(url, 200, 9.0)
+            frontier.mark_url_complete(url)
+            url, wait = frontier.poll_tbd_url()
+            self.assertIsNone(url)
+            self.assertTrue(0.5 < wait <= 1.0, wait)
+            frontier.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from robots import *
+
+ROBOTS_TXT = """
+User-agent: *
+Disallow: /wp-admin/
+Allow: /wp-admin/admin-ajax.php
+Disallow: /research/
+Allow: /research/labs-centers/
+Disallow: /*.pdf$
+Disallow: /exact$
+
+User-agent: IR
+Disallow: /private/  # only for us
+
+Sitemap: https://www.stat.uci.edu/wp-sitemap.xml
+"""
+
+
+class TestRobotsRules(unittest.TestCase):
+    def setUp(self):
+        self.rules = RobotsRules.parse(ROBOTS_TXT)
+
+    def test_longest_match(self):
+        self.assertFalse(self.rules.allowed("https://www.informatics.uci.edu/research/"))
+        self.assertFalse(self.rules.allowed("https://www.informatics.uci.edu/research/people"))
+        self.assertTrue(self.rules.allowed("https://www.informatics.uci.edu/research/labs-centers/hci"))
+        self.assertTrue(self.rules.allowed("https://www.informatics.uci.edu/wp-admin/admin-ajax.php"))
+        self.assertTrue(self.rules.allowed("https://www.informatics.uci.edu/about/research/"))
+
+    def test_shared_prefixes(self):
+        rules = RobotsRules([(False, "/a"), (True, "/ab"), (False, "/abc/"), (True, "/abd")])
+        self.assertFalse(rules.allowed("https://ics.uci.edu/a"))
+        self.assertTrue(rules.allowed("https://ics.uci.edu/abc"))
+        self.assertFalse(rules.allowed("https://ics.uci.edu/abc/d"))
+        self.assertTrue(rules.allowed("https://ics.uci.edu/abdef"))
+        self.assertFalse(rules.allowed("https://ics.uci.edu/ac"))
+
+    def test_allow_wins_tie(self):
+        rules = RobotsRules([(False, "/page"), (True, "/page")])
+        self.assertTrue(rules.allowed("https://ics.uci.edu/page"))
+
+    def test_wildcard_and_end_anchor(self):
+        self.assertFalse(self.rules.allowed("https://ics.uci.edu/files/paper.pdf"))
+        self.assertTrue(self.rules.allowed("https://ics.uci.edu/files/paper.pdf.html"))
+        self.assertFalse(self.rules.allowed("https://ics.uci.edu/exact"))
+        self.assertTrue(self.rules.allowed("https://ics.uci.edu/exactly"))
+
+    def test_user_agent_groups(self):
+        self.assertTrue(self.rules.allowed("https://ics.uci.edu/private/"))
+        ours = RobotsRules.parse(ROBOTS_TXT, "IR UW24 12345678")
+        self.assertFalse(ours.allowed("https://ics.uci.edu/private/"))
+        self.assertTrue(ours.allowed("https://ics.uci.edu/research/"))
+
+    def test_empty_disallow_and_sitemaps(self):
+        rules = RobotsRules.parse("User-agent: *\nDisallow:\n\nSitemap: https://ics.uci.edu/sitemap_index.xml")
+        self.assertTrue(rules.allowed("https://ics.uci.edu/anything"))
+        self.assertEqual(rules.sitemaps, ["https://ics.uci.edu/sitemap_index.xml"])
+        self.assertEqual(self.rules.sitemaps, ["https://www.stat.uci.edu/wp-sitemap.xml"])
+
+
+class TestSplitUrl(unittest.TestCase):
+    def test_split_url(self):
+        self.assertEqual(split_url("https://ics.uci.edu/a/b?x=1#top"), ("ics.uci.edu", "/a/b?x=1"))
+        self.assertEqual(split_url("https://ics.uci.edu"), ("ics.uci.edu", "/"))
+        self.assertEqual(split_url("https://ics.uci.edu:443?x=1"), ("ics.uci.edu:443", "/?x=1"))
+
+
+class TestRobotsCache(unittest.TestCase):
+    def test_saved_files_by_host(self):
+        cache = RobotsCache()
+        self.assertFalse(cache.allowed("https://www.informatics.uci.edu/research/"))
+        self.assertTrue(cache.allowed("https://www.informatics.uci.edu/research/labs-centers/"))
+        self.assertFalse(cache.allowed("https://www.stat.uci.edu/wp-admin/"))
+        self.assertTrue(cache.allowed("https://www.ics.uci.edu/wp-admin/"))
+        self.assertIs(cache.rules("https://vision.ics.uci.edu/"), cache.rules("https://ics.uci.edu/"))
+
+    def test_unknown_host_allows_everything(self):
+        self.assertIsNone(robots_file("evilics.uci.edu"))
+        self.assertTrue(RobotsCache().allowed("https://evilics.uci.edu/wp-admin/"))
+
+
+if __name__ == '__main__':
+    unittest.main()
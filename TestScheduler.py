@@ -0,0 +1,146 @@
+import tempfile
+import time
+import unittest
+
+from testing_config import make_config
+from crawler.scheduler import *
+from crawler.frontier import Frontier
+
+
+def crawl_order(scheduler):
+    # Pops every url, finishing each download right away
+    order = []
+    while True:
+        url, _ = scheduler.pop(now=0)
+        if url is None:
+            return order
+        scheduler.done(url, now=0)
+        order.append(url)
+
+
+class TestPoliteScheduler(unittest.TestCase):
+    def test_one_download_per_host_at_a_time(self):
+        scheduler = PoliteScheduler(delay=1.0)
+        scheduler.push("https://www.ics.uci.edu/a")
+        scheduler.push("https://www.ics.uci.edu/b")
+        scheduler.push("https://www.stat.uci.edu/a")
+        first, _ = scheduler.pop(now=0)
+        second, _ = scheduler.pop(now=0)
+        self.assertEqual({get_host(first), get_host(second)}, {"www.ics.uci.edu", "www.stat.uci.edu"})
+        self.assertEqual(scheduler.pop(now=0), (None, None))
+
+    def test_host_waits_for_delay_after_download(self):
+        scheduler = PoliteScheduler(delay=1.0)
+        scheduler.push("https://www.ics.uci.edu/a")
+        scheduler.push("https://www.ics.uci.edu/b")
+        url, _ = scheduler.pop(now=0)
+        scheduler.done(url, now=2.0)
+        self.assertEqual(scheduler.pop(now=2.5), (None, 0.5))
+        self.assertEqual(scheduler.pop(now=3.0), ("https://www.ics.uci.edu/b", None))
+        self.assertEqual(len(scheduler), 0)
+
+
+class TestPriorityScheduler(unittest.TestCase):
+    def test_shallow_urls_first(self):
+        scheduler = PriorityScheduler(delay=0)
+        for url in ["https://www.ics.uci.edu/a/b/c", "https://www.ics.uci.edu/a/b", "https://www.ics.uci.edu/a"]:
+            scheduler.push(url)
+        self.assertEqual(crawl_order(scheduler), [
+            "https://www.ics.uci.edu/a", "https://www.ics.uci.edu/a/b", "https://www.ics.uci.edu/a/b/c"])
+
+    def test_new_patterns_before_repeated_ones(self):
+        scheduler = PriorityScheduler(delay=0)
+        for event in range(1, 4 * PATTERN_ALLOWANCE + 1):
+            scheduler.push(f"https://www.ics.uci.edu/event/{event}")
+        scheduler.push("https://www.ics.uci.edu/news/today")
+        order = crawl_order(scheduler)
+        # The first events are as good as any page, later ones wait
+        free = 2 * PATTERN_ALLOWANCE - 1
+        self.assertEqual(order[:free + 2], [
+            f"https://www.ics.uci.edu/event/{event}" for event in range(1, free + 1)]
+            + ["https://www.ics.uci.edu/news/today", f"https://www.ics.uci.edu/event/{free + 1}"])
+
+    def test_inlinks_raise_priority(self):
+        scheduler = PriorityScheduler(delay=0)
+        scheduler.push("https://www.ics.uci.edu/a")
+        scheduler.push("https://www.ics.uci.edu/b")
+        # Only changes of the link count's power of two are worth saving
+        self.assertEqual(scheduler.add_inlink("https://www.ics.uci.edu/b"), 2)
+        self.assertIsNone(scheduler.add_inlink("https://www.ics.uci.edu/b"))
+        self.assertEqual(scheduler.add_inlink("https://www.ics.uci.edu/b"), 4)
+        self.assertIsNone(scheduler.add_inlink("https://www.ics.uci.edu/unknown"))
+        self.assertEqual(crawl_order(scheduler), ["https://www.ics.uci.edu/b", "https://www.ics.uci.edu/a"])
+        self.assertEqual(len(scheduler), 0)
+
+    def test_less_covered_hosts_first(self):
+        scheduler = PriorityScheduler(delay=0)
+        scheduler.restore_downloaded("www.ics.uci.edu", 4)
+        scheduler.push("https://www.ics.uci.edu/a")
+        scheduler.push("https://www.stat.uci.edu/a")
+        self.assertEqual(scheduler.pop(now=0), ("https://www.stat.uci.edu/a", None))
+        self.assertEqual(scheduler.depth_by_host(), {"www.ics.uci.edu": 1})
+
+    def test_host_waits_for_delay_after_download(self):
+        scheduler = PriorityScheduler(delay=1.0)
+        scheduler.push("https://www.ics.uci.edu/a")
+        scheduler.push("https://www.ics.uci.edu/b")
+        url, _ = scheduler.pop(now=0)
+        self.assertEqual(scheduler.pop(now=0), (None, None))  # host in flight
+        scheduler.done(url, now=2.0)
+        self.assertEqual(scheduler.pop(now=2.5), (None, 0.5))
+        self.assertEqual(scheduler.pop(now=3.0), ("https://www.ics.uci.edu/b", None))
+
+    def test_priority_survives_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = make_config(directory, SCHEDULER="priority")
+            frontier = Frontier(config, True)
+            url, _ = frontier.poll_tbd_url()
+            frontier.mark_url_complete(url)
+            frontier.add_url("https://www.ics.uci.edu/a")
+            frontier.add_url("https://www.ics.uci.edu/a")
+            frontier.add_url("https://www.ics.uci.edu/b")
+            frontier.close()
+            frontier = Frontier(config, False)
+            self.assertEqual(frontier.to_be_downloaded.inlinks, {"https://www.ics.uci.edu/a": 2, "https://www.ics.uci.edu/b": 1})
+            self.assertEqual(frontier.to_be_downloaded.downloaded, {"www.ics.uci.edu": 1})
+            frontier.close()
+
+    def test_completed_url_keeps_link_count(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = make_config(directory, SCHEDULER="priority")
+            frontier = Frontier(config, True)
+            for _ in range(4):
+                frontier.add_url("https://www.ics.uci.edu/a")
+            self.assertEqual(frontier.to_be_downloaded.inlinks["https://www.ics.uci.edu/a"], 4)
+            url, _ = frontier.poll_tbd_url()
+            self.assertEqual(url, "https://www.ics.uci.edu/a")
+            frontier.mark_url_complete(url)
+            self.assertEqual(frontier._saved_entry(url)[:3], (url, True, 4))
+            # Recrawled because its sitemap lastmod is later than its download
+            self.assertTrue(frontier.add_sitemap_url(url, time.time() + 60))
+            self.assertEqual(frontier.to_be_downloaded.inlinks[url], 4)
+            frontier.close()
+
+
+class TestLifoScheduler(unittest.TestCase):
+    def test_newest_url_first(self):
+        scheduler = LifoScheduler(delay=1.0)
+        scheduler.push("https://www.ics.uci.edu/a")
+        scheduler.push("https://www.ics.uci.edu/b")
+        self.assertEqual(scheduler.pop(now=0), ("https://www.ics.uci.edu/b", None))
+
+    def test_depth_by_host(self):
+        scheduler = LifoScheduler(delay=1.0)
+        scheduler.push("https://www.ics.uci.edu/a")
+        scheduler.push("https://www.ics.uci.edu/b")
+        scheduler.push("https://vision.ics.uci.edu/c")
+        scheduler.pop(now=0)
+        self.assertEqual(scheduler.depth_by_host(), {"www.ics.uci.edu": 2})
+        scheduler.pop(now=0)
+        scheduler.pop(now=0)
+        self.assertEqual(scheduler.depth_by_host(), {})
+        self.assertEqual(scheduler.pop(now=0), (None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -29,6 +29,16 @@ class TestIsValid(unittest.TestCase):
     def test_invalid_usage_of_allowed_domain_in_query(self):
         self.assertFalse(is_valid("https://example.com/?redirect=https://ics.uci.edu"))
 
+    def test_invalid_domain_ending_in_allowed_domain(self):
+        self.assertFalse(is_valid("https://evilics.uci.edu/"))
+        self.assertFalse(is_valid("https://notstat.uci.edu/"))
+
+    def test_valid_url_with_port_and_uppercase_host(self):
+        self.assertTrue(is_valid("https://WWW.ICS.UCI.EDU:443/about/"))
+
+    def test_invalid_uppercase_file_extension(self):
+        self.assertFalse(is_valid("https://www.ics.uci.edu/files/Slides.PDF"))
+
 
 if __name__ == '__main__':
     unittest.main()
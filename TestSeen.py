@@ -0,0 +1,23 @@
+import unittest
+from crawler.seen import *
+
+
+class TestUrlDigestSet(unittest.TestCase):
+    def test_add_and_contains(self):
+        seen = UrlDigestSet(capacity_bits=2)
+        urls = [f"https://www.ics.uci.edu/page{i}" for i in range(1000)]
+        for url in urls:
+            self.assertTrue(seen.add(url))
+        for url in urls:
+            self.assertFalse(seen.add(url))
+            self.assertIn(url, seen)
+        self.assertNotIn("https://www.ics.uci.edu/page1000", seen)
+        self.assertEqual(len(seen), 1000)
+
+    def test_digest_is_never_zero(self):
+        self.assertNotEqual(url_digest(""), 0)
+        self.assertEqual(url_digest("https://ics.uci.edu"), url_digest("https://ics.uci.edu"))
+
+
+if __name__ == '__main__':
+    unittest.main()
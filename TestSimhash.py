@@ -0,0 +1,51 @@
+import unittest
+from simhash import *
+
+
+def old_simhash(tokens: list, max_hash_bits=64) -> int:
+    # The string based simhash scraper.py used before, returned as an int
+    vector_vals = [0] * max_hash_bits
+    for token in tokens:
+        hash_value = 0
+        for char in token:
+            hash_value = (hash_value * 31 + ord(char)) % (2 ** max_hash_bits)
+        for i in range(max_hash_bits):
+            if hash_value & (1 << i):
+                vector_vals[i] += 1
+            else:
+                vector_vals[i] -= 1
+    fingerprint_value = 0
+    for i in range(max_hash_bits):
+        if vector_vals[i] >= 0:
+            fingerprint_value |= (1 << i)
+    return fingerprint_value
+
+
+TOKENS = ["the", "crawler", "visits", "ics", "pages", "the", "ics", "informatics", "x" * 40, "2024", "the"]
+
+
+class TestSimhash(unittest.TestCase):
+    def test_compat_matches_old_simhash(self):
+        self.assertEqual(fingerprint(TOKENS, compat=True), old_simhash(TOKENS))
+        self.assertEqual(fingerprint(TOKENS, compat=True, use_numpy=False), old_simhash(TOKENS))
+
+    def test_compat_with_fewer_bits(self):
+        self.assertEqual(fingerprint(TOKENS, max_hash_bits=32, compat=True), old_simhash(TOKENS, 32))
+
+    def test_numpy_and_python_paths_agree(self):
+        self.assertEqual(fingerprint(TOKENS), fingerprint(TOKENS, use_numpy=False))
+
+    def test_token_order_does_not_matter(self):
+        self.assertEqual(fingerprint(TOKENS), fingerprint(list(reversed(TOKENS))))
+
+    def test_similar_pages_are_close(self):
+        page = [f"word{i}" for i in range(500)]
+        edited = page[:-5] + ["changed"] * 5
+        self.assertGreaterEqual(similarity(fingerprint(page), fingerprint(edited)), 0.9)
+
+    def test_hamming_distance(self):
+        self.assertEqual(hamming_distance(0b1010, 0b0110), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import gzip
+import tempfile
+import unittest
+
+from testing_config import make_config
+from utils.stub_cache_server import StubCacheServer, StubSite
+from crawler.frontier import Frontier
+from crawler.sitemaps import *
+
+URLSET = b'''<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc> https://www.ics.uci.edu/a </loc><lastmod>2024-01-05</lastmod></url>
+  <url><loc>https://www.ics.uci.edu/b</loc><changefreq>daily</changefreq></url>
+</urlset>'''
+
+INDEX = b'''<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://www.ics.uci.edu/post-sitemap.xml</loc><lastmod>2024-01-05T10:00:00Z</lastmod></sitemap>
+</sitemapindex>'''
+
+
+class TestParseSitemap(unittest.TestCase):
+    def test_urlset(self):
+        self.assertEqual(list(parse_sitemap(URLSET)), [
+            ("url", "https://www.ics.uci.edu/a", parse_lastmod("2024-01-05")),
+            ("url", "https://www.ics.uci.edu/b", None)])
+
+    def test_index(self):
+        self.assertEqual(list(parse_sitemap(INDEX)), [
+            ("sitemap", "https://www.ics.uci.edu/post-sitemap.xml", 1704448800.0)])
+
+    def test_gzipped(self):
+        self.assertEqual(list(parse_sitemap(gzip.compress(URLSET))), list(parse_sitemap(URLSET)))
+
+    def test_broken_sitemap_keeps_entries_before_error(self):
+        broken = URLSET.replace(b"</url>\n  <url>", b"</url>\n  <url><<")
+        self.assertEqual([loc for _, loc, _ in parse_sitemap(broken)], ["https://www.ics.uci.edu/a"])
+
+    def test_lastmod_formats(self):
+        self.assertEqual(parse_lastmod("2024"), parse_lastmod("2024-01-01"))
+        self.assertEqual(parse_lastmod("2024-01"), parse_lastmod("2024-01-01T00:00:00+00:00"))
+        self.assertEqual(parse_lastmod("2024-01-01T02:00+02:00"), parse_lastmod("2024-01-01"))
+        self.assertIsNone(parse_lastmod("yesterday"))
+
+
+class TestSitemapRecrawl(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.site = StubSite(hosts=2, pages_per_host=3, links_per_page=0)
+        self.server = StubCacheServer(site=self.site)
+        self.cache_server = self.server.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def crawl(self, save_format, restart):
+        # Ingests the sitemaps and downloads nothing, returns the urls queued
+        config = make_config(
+            self.directory.name, self.cache_server, SAVEFORMAT=save_format, SCHEDULER="polite",
+            SEEDURL=self.site.seed_urls()[:1])
+        frontier = Frontier(config, restart)
+        ingest_sitemaps(config, frontier)
+        queued = []
+        while True:
+            url, _ = frontier.poll_tbd_url()
+            if url is None:
+                break
+            queued.append(url)
+            frontier.mark_url_complete(url)
+        frontier.close()
+        return sorted(queued)
+
+    def check_recrawls_changed_pages(self, save_format):
+        self.assertEqual(len(self.crawl(save_format, True)), 6)
+        self.assertEqual(self.crawl(save_format, False), [])
+        self.site.lastmod["https://site1.ics.uci.edu/page2"] = "2999-01-01"
+        self.site.lastmod["https://site0.ics.uci.edu/page1"] = "2000-01-01"
+        self.assertEqual(self.crawl(save_format, False), ["https://site1.ics.uci.edu/page2"])
+
+    def test_recrawls_changed_pages(self):
+        self.check_recrawls_changed_pages("shelve")
+
+    def test_recrawls_changed_pages_sqlite(self):
+        self.check_recrawls_changed_pages("sqlite")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import shelve
+import tempfile
+import unittest
+
+from crawler.storage import WriteBehindShelf
+
+
+class TestWriteBehindShelf(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "frontier.shelve")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_pending_writes_are_readable(self):
+        save = WriteBehindShelf(self.path, batch_size=10, flush_interval=60)
+        save["a"] = ("https://www.ics.uci.edu", False)
+        save.sync()
+        self.assertIn("a", save)
+        self.assertEqual(save["a"], ("https://www.ics.uci.edu", False))
+        self.assertEqual(len(save), 1)
+        self.assertEqual(len(save.shelf), 0)
+        save.close()
+
+    def test_full_batch_is_flushed(self):
+        save = WriteBehindShelf(self.path, batch_size=2, flush_interval=60)
+        save["a"] = ("https://www.ics.uci.edu", False)
+        save["b"] = ("https://www.cs.uci.edu", False)
+        save.sync()
+        self.assertEqual(len(save.shelf), 2)
+        save.close()
+
+    def test_close_saves_everything(self):
+        save = WriteBehindShelf(self.path, batch_size=10, flush_interval=60)
+        save["a"] = ("https://www.ics.uci.edu", True)
+        save.close()
+        with shelve.open(self.path) as reopened:
+            self.assertEqual(reopened["a"], ("https://www.ics.uci.edu", True))
+
+
+if __name__ == '__main__':
+    unittest.main()
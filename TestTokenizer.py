@@ -0,0 +1,38 @@
+import unittest
+from tokenizer import *
+
+
+class TestTokenizer(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize(["Hello, World!", "", "ICS-46 rocks"]), ["hello", "world", "ics", "46", "rocks"])
+
+    def test_bytes_lines(self):
+        self.assertEqual(list(iter_tokens([b"Caf\xc3\xa9 IN4MATX", "und\xe9fini"])),
+                         ["caf", "in4matx", "und", "fini"])
+
+    def test_cap_within_a_line(self):
+        # The old version only checked the cap between lines, so one long line got through
+        self.assertEqual(tokenize(["a b c d"], max_tokens=3), [])
+        self.assertEqual(tokenize(["a b c", ""], max_tokens=3), ["a", "b", "c"])
+
+    def test_stops_early(self):
+        def lines():
+            yield "one two"
+            yield "three"
+            raise AssertionError("read past the token cap")
+
+        self.assertEqual(tokenize(lines(), max_tokens=2), [])
+        self.assertEqual(count_tokens(lines(), max_tokens=2), (Counter(), TOO_MANY_TOKENS))
+
+    def test_count_tokens(self):
+        counts, skip_reason = count_tokens(["the cat", "The hat"])
+        self.assertEqual(counts, {"the": 2, "cat": 1, "hat": 1})
+        self.assertIsNone(skip_reason)
+
+    def test_compute_word_frequencies(self):
+        self.assertEqual(compute_word_frequencies(["a", "b", "a"]), {"a": 2, "b": 1})
+        self.assertEqual(compute_word_frequencies([]), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
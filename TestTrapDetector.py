@@ -0,0 +1,73 @@
+import unittest
+from trap_detector import *
+
+
+class TestUrlTemplate(unittest.TestCase):
+    def test_numbers_and_dates(self):
+        self.assertEqual(url_template("https://www.ics.uci.edu/events/2024-01-15/page/3"),
+                         "www.ics.uci.edu/events/<date>/page/<n>")
+        self.assertEqual(url_template("https://www.ics.uci.edu/calendar/2024/01/15"),
+                         "www.ics.uci.edu/calendar/<date>")
+        self.assertEqual(url_template("https://WWW.ICS.UCI.EDU/~user12/pubs"), "www.ics.uci.edu/~user<n>/pubs")
+
+    def test_query_names_only(self):
+        self.assertEqual(url_template("https://wiki.ics.uci.edu/doku.php?id=start&do=diff&rev=17"),
+                         "wiki.ics.uci.edu/doku.php?do&id&rev")
+
+    def test_repeated_segment(self):
+        self.assertTrue(repeated_segment("https://ics.uci.edu/a/b/a/b/a/b", 2))
+        self.assertFalse(repeated_segment("https://ics.uci.edu/a/b/a/b", 2))
+
+
+class TestTrapDetector(unittest.TestCase):
+    def test_link_repeats(self):
+        traps = TrapDetector(link_repeats=3)
+        self.assertEqual([traps.allow("https://ics.uci.edu/a") for _ in range(4)], [True, True, False, False])
+        self.assertEqual(traps.throttled["repeated link"], 2)
+
+    def test_pattern_budget(self):
+        traps = TrapDetector(pattern_budget=10)
+        allowed = [traps.allow(f"https://ics.uci.edu/events/day{i}") for i in range(25)]
+        self.assertEqual(sum(allowed), 10)
+        self.assertTrue(traps.allow("https://ics.uci.edu/people"))
+        self.assertEqual(traps.report(), [("ics.uci.edu/events/day<n>", 15)])
+        # A throttled link stays throttled
+        self.assertFalse(traps.allow("https://ics.uci.edu/events/day20"))
+
+    def test_host_budget(self):
+        traps = TrapDetector(host_budget=2)
+        self.assertTrue(traps.allow("https://a.ics.uci.edu/x"))
+        self.assertTrue(traps.allow("https://a.ics.uci.edu/y"))
+        self.assertFalse(traps.allow("https://a.ics.uci.edu/z"))
+        self.assertTrue(traps.allow("https://b.ics.uci.edu/z"))
+
+    def test_memory_is_bounded(self):
+        traps = TrapDetector(max_tracked=100)
+        for i in range(1000):
+            traps.allow(f"https://ics.uci.edu/p/{i}/{'x' * (i % 50)}")
+        self.assertLessEqual(len(traps.links), 100)
+        self.assertLessEqual(len(traps.patterns), 100)
+
+    def test_changes_and_restore(self):
+        traps = TrapDetector(pattern_budget=1)
+        self.assertEqual(traps.take_changes(), [])
+        traps.allow("https://ics.uci.edu/p1")
+        traps.allow("https://ics.uci.edu/p2")
+        changes = traps.take_changes()
+        self.assertEqual(changes, [("ics.uci.edu/p<n>", 1, 1)])
+        resumed = TrapDetector(pattern_budget=1)
+        for change in changes:
+            resumed.restore(*change)
+        self.assertFalse(resumed.allow("https://ics.uci.edu/p3"))
+
+    def test_forgotten_patterns_are_changes(self):
+        traps = TrapDetector(max_tracked=2)
+        traps.take_changes()
+        for host in "abc":
+            traps.allow(f"https://{host}.ics.uci.edu/x")
+        self.assertEqual(sorted(traps.take_changes()), [
+            ("a.ics.uci.edu/x", 0, 0), ("b.ics.uci.edu/x", 1, 0), ("c.ics.uci.edu/x", 1, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from url_filter import *
+
+
+class TestUrlFilter(unittest.TestCase):
+    def setUp(self):
+        self.url_filter = UrlFilter(["ics.uci.edu", "stat.uci.edu"], {"pdf", "jpeg"})
+
+    def test_domains_match_whole_labels(self):
+        self.assertTrue(self.url_filter.host_allowed("ics.uci.edu"))
+        self.assertTrue(self.url_filter.host_allowed("vision.ics.uci.edu"))
+        self.assertFalse(self.url_filter.host_allowed("evilics.uci.edu"))
+        self.assertFalse(self.url_filter.host_allowed("uci.edu"))
+        self.assertFalse(self.url_filter.host_allowed("ics.uci.edu.example.com"))
+
+    def test_extensions(self):
+        self.assertFalse(self.url_filter.is_valid("https://ics.uci.edu/a/photo.jpeg"))
+        self.assertTrue(self.url_filter.is_valid("https://ics.uci.edu/a.pdf/page"))
+        self.assertFalse(self.url_filter.is_valid("https://ics.uci.edu/paper.pdf?download=1"))
+        self.assertTrue(self.url_filter.is_valid("https://ics.uci.edu/"))
+
+    def test_extension_before_parameters(self):
+        self.assertFalse(self.url_filter.is_valid("https://ics.uci.edu/paper.pdf;jsessionid=1"))
+        self.assertFalse(self.url_filter.is_valid("https://ics.uci.edu/a;v=1/photo.JPEG;x"))
+        self.assertTrue(self.url_filter.is_valid("https://ics.uci.edu/page;file.pdf"))
+        self.assertTrue(self.url_filter.is_valid("https://ics.uci.edu/a.pdf;v=1/page"))
+        self.assertEqual(self.url_filter.filter_many(
+            ["https://ics.uci.edu/paper.pdf;jsessionid=1", "https://ics.uci.edu/page;file.pdf"]),
+            ["https://ics.uci.edu/page;file.pdf"])
+
+    def test_schemes_and_netloc(self):
+        self.assertFalse(self.url_filter.is_valid("ftp://ics.uci.edu/"))
+        self.assertFalse(self.url_filter.is_valid("ics.uci.edu/relative"))
+        self.assertTrue(self.url_filter.is_valid("HTTP://user@ics.uci.edu:8080/"))
+
+    def test_filter_many_keeps_order(self):
+        urls = ["https://stat.uci.edu/b", "https://example.com/", "https://ics.uci.edu/a.pdf",
+                "https://ics.uci.edu/a", "https://stat.uci.edu/b"]
+        self.assertEqual(self.url_filter.filter_many(urls),
+                         ["https://stat.uci.edu/b", "https://ics.uci.edu/a", "https://stat.uci.edu/b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
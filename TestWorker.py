@@ -0,0 +1,44 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from testing_config import make_config
+from crawler.frontier import Frontier
+from crawler.pipeline import PipelineCrawler
+from crawler.worker import Worker
+
+SEEDS = ["https://www.ics.uci.edu/a", "https://www.ics.uci.edu/b"]
+
+
+def failing_download(url, config, logger):
+    raise RuntimeError("connection reset")
+
+
+class TestWorker(unittest.TestCase):
+    def test_failed_url_is_still_completed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = make_config(directory, SCHEDULER="polite", SEEDURL=SEEDS)
+            frontier = Frontier(config, True)
+            with mock.patch("crawler.worker.download", failing_download):
+                Worker(0, config, frontier).run()
+            self.assertEqual(frontier.fetch_started, {})
+            self.assertEqual(frontier.poll_tbd_url()[0], None)
+            self.assertTrue(all(frontier._saved_entry(url)[1] for url in SEEDS))
+            # Counted as downloads that got no reply, so the host backs off
+            self.assertGreater(frontier.rate.errors["www.ics.uci.edu"], 0)
+            frontier.close()
+
+
+class TestPipelineCrawler(unittest.TestCase):
+    def test_failed_fetch_is_still_completed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = make_config(directory, SCHEDULER="polite", SEEDURL=SEEDS, THREADCOUNT=2)
+            crawler = PipelineCrawler(config, True)
+            with mock.patch("crawler.pipeline.download", failing_download):
+                crawler.start()  # returns only once every url is complete
+            self.assertEqual(crawler.frontier.fetch_started, {})
+            self.assertGreater(crawler.frontier.rate.errors["www.ics.uci.edu"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+    Benchmark for crawl throughput of the threaded, pipeline and async engines against the local
+    stub cache server (utils/stub_cache_server.py), without the real cache server.
+
+    Run from the project root:
+        python -m benchmarks.bench_async_crawler
+        python -m benchmarks.bench_async_crawler --hosts 200 --latency 0.2 --threads 8 --in_flight 200
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from configparser import ConfigParser
+
+
+def make_config(directory: str, args, engine: str):
+    from utils.config import Config
+    from utils.stub_cache_server import StubSite
+    cparser = ConfigParser()
+    cparser["IDENTIFICATION"] = {"USERAGENT": "IR benchmark"}
+    cparser["CONNECTION"] = {"HOST": "localhost", "PORT": "0"}
+    cparser["CRAWLER"] = {
+        "SEEDURL": ",".join(StubSite(args.hosts, args.pages, words_per_page=args.words).seed_urls()),
+        "POLITENESS": str(args.politeness)}
+    cparser["LOCAL PROPERTIES"] = {
+        "SAVE": os.path.join(directory, f"{engine}.shelve"), "SAVEBATCH": "1000",
+        "THREADCOUNT": str(args.threads), "SCHEDULER": "polite", "ENGINE": engine,
+        "MAXINFLIGHT": str(args.in_flight), "PARSEPROCESSES": str(args.parse_processes)}
+    return Config(cparser)
+
+
+def run_engine(args):
+    # Runs in its own process so the static Parser statistics start empty
+    from crawler import Crawler
+    from crawler.async_crawler import AsyncCrawler
+    from crawler.pipeline import PipelineCrawler
+    from parser import Parser
+    from utils.stub_cache_server import StubCacheServer, StubSite
+
+    server = StubCacheServer(site=StubSite(args.hosts, args.pages, words_per_page=args.words), latency=args.latency)
+    with tempfile.TemporaryDirectory() as directory:
+        config = make_config(directory, args, args.engine)
+        config.cache_server = server.start()
+        engines = {"threads": Crawler, "pipeline": PipelineCrawler, "async": AsyncCrawler}
+        crawler = engines[args.engine](config, True)
+        start = time.perf_counter()
+        crawler.start()
+        elapsed = time.perf_counter() - start
+    print(f"{args.engine:>8}: {Parser.pages_parsed} pages in {elapsed:.1f}s, "
+          f"{Parser.pages_parsed / elapsed:.1f} pages/s")
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--engine", choices=["threads", "pipeline", "async"], default=None)
+    arg_parser.add_argument("--hosts", type=int, default=100)
+    arg_parser.add_argument("--pages", type=int, default=5, help="pages per host")
+    arg_parser.add_argument("--words", type=int, default=300, help="words per stub page, more makes parsing heavier")
+    arg_parser.add_argument("--latency", type=float, default=0.2, help="stub cache server delay per response")
+    arg_parser.add_argument("--politeness", type=float, default=0.5)
+    arg_parser.add_argument("--threads", type=int, default=8, help="THREADCOUNT for the threaded and pipeline engines")
+    arg_parser.add_argument("--in_flight", type=int, default=100, help="MAXINFLIGHT for the async engine")
+    arg_parser.add_argument("--parse_processes", type=int, default=4, help="PARSEPROCESSES for the pipeline and async engines")
+    args = arg_parser.parse_args()
+
+    if args.engine:
+        run_engine(args)
+        return
+    for engine in ["threads", "pipeline", "async"]:
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_async_crawler", "--engine", engine]
+                       + sys.argv[1:], check=True, stderr=subprocess.DEVNULL)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+    Benchmark for the content gate: parse time of a mix of downloaded bodies (html pages,
+    binaries served under html looking urls, very large pages) without the gate and with
+    it. Without the gate every body is handed to scraper.analyze_page.
+
+    Run from the project root:
+        python -m benchmarks.bench_content_gate
+        python -m benchmarks.bench_content_gate --pages 400 --extractor bs4
+"""
+import os
+import random
+import time
+from argparse import ArgumentParser
+from types import SimpleNamespace
+
+import scraper
+from benchmarks.bench_extractors import make_page
+from content_gate import ContentGate
+from parser import Parser
+
+
+def make_bodies(pages: int, rng: random.Random) -> list:
+    # (body, headers): 70% html pages, 20% binaries, 10% pages of several megabytes
+    bodies = []
+    for _ in range(pages):
+        kind = rng.random()
+        if kind < 0.7:
+            bodies.append((make_page(30, rng), {"Content-Type": "text/html; charset=UTF-8"}))
+        elif kind < 0.8:
+            # A pdf whose url has no .pdf extension, with a Content-Type saying so
+            bodies.append((b"%PDF-1.5\n" + os.urandom(500_000), {"Content-Type": "application/pdf"}))
+        elif kind < 0.9:
+            # A zip the server calls html
+            bodies.append((b"PK\x03\x04" + os.urandom(300_000), {"Content-Type": "text/html"}))
+        else:
+            bodies.append((make_page(3000, rng), {"Content-Type": "text/html"}))
+    return bodies
+
+
+def parse_all(bodies: list, gate: ContentGate) -> float:
+    start = time.process_time()
+    for i, (body, headers) in enumerate(bodies):
+        content = body if gate is None else gate.check(SimpleNamespace(content=body, headers=headers))
+        if content is not None:
+            analysis = scraper.analyze_page(f"https://www.ics.uci.edu/page{i}", content)
+            if gate is not None:
+                gate.record_parse(analysis.page_bytes, analysis.parse_seconds)
+    return time.process_time() - start
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--pages", type=int, default=200)
+    arg_parser.add_argument("--extractor", type=str, default="lxml")
+    args = arg_parser.parse_args()
+    Parser.extractor = args.extractor
+    bodies = make_bodies(args.pages, random.Random(0))
+    size = sum(len(body) for body, _ in bodies)
+    print(f"{len(bodies)} bodies, {size / 2 ** 20:.1f} MiB, {args.extractor} extractor")
+
+    elapsed = parse_all(bodies, None)
+    print(f"without the gate: {elapsed:6.2f}s of CPU")
+    for truncate in (True, False):
+        gate = ContentGate(truncate=truncate)
+        elapsed = parse_all(bodies, gate)
+        print(f"with the gate ({'truncate' if truncate else 'skip'}): {elapsed:6.2f}s of CPU")
+        for reason, (pages, skipped, seconds) in gate.report().items():
+            print(f"  {reason:>14}: {pages:4} pages, {skipped / 2 ** 20:6.1f} MiB not parsed, "
+                  f"about {seconds:.2f}s of parsing saved")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+    Benchmark for the time to read a page's words and links with each EXTRACTOR backend
+    (extractors.py), on a folder of saved pages or on generated pages shaped like UCI ones.
+
+    Run from the project root:
+        python -m benchmarks.bench_extractors
+        python -m benchmarks.bench_extractors --corpus saved_pages/ --repeat 3
+"""
+import os
+import random
+import time
+from argparse import ArgumentParser
+
+import extractors
+
+WORDS = ("research faculty students computer science informatics statistics course "
+         "lecture project seminar graduate undergraduate department university irvine "
+         "data systems learning software networks security theory algorithms").split()
+
+
+def make_page(paragraphs: int, rng: random.Random) -> bytes:
+    # A department page: head with styles and scripts, navigation links, then text
+    parts = ["<!DOCTYPE html><html><head><title>ICS</title>",
+             "<style>body { font-family: sans-serif; } .nav a { color: #0064a4; }</style>",
+             "<script>window.dataLayer = window.dataLayer || []; function gtag(){}</script>",
+             "</head><body><ul class='nav'>"]
+    for i in range(40):
+        parts.append(f"<li><a href='/~faculty{i}/index.html?tab={i % 3}'>Faculty {i}</a></li>")
+    parts.append("</ul><div id='content'>")
+    for _ in range(paragraphs):
+        words = rng.choices(WORDS, k=rng.randint(40, 120))
+        parts.append(f"<p>{' '.join(words)} <a href='https://www.ics.uci.edu/{rng.choice(WORDS)}/'>"
+                     f"{rng.choice(WORDS)}</a> &amp; {' '.join(words[:10])}.</p>")
+    parts.append("</div></body></html>")
+    return "\n".join(parts).encode("utf-8")
+
+
+def load_corpus(folder: str) -> list:
+    pages = []
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if os.path.isfile(path):
+            with open(path, "rb") as page_file:
+                pages.append(page_file.read())
+    return pages
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--corpus", type=str, default=None, help="folder of saved html pages")
+    arg_parser.add_argument("--pages", type=int, default=200, help="generated pages, without --corpus")
+    arg_parser.add_argument("--paragraphs", type=int, default=30, help="paragraphs per generated page")
+    arg_parser.add_argument("--repeat", type=int, default=1)
+    args = arg_parser.parse_args()
+
+    if args.corpus:
+        pages = load_corpus(args.corpus)
+    else:
+        rng = random.Random(0)
+        pages = [make_page(args.paragraphs, rng) for _ in range(args.pages)]
+    size = sum(len(page) for page in pages)
+    print(f"{len(pages)} pages, {size / len(pages) / 1024:.1f} KiB per page")
+
+    reference = [extractors.extract_bs4(page) for page in pages]
+    for backend, extract in extractors.EXTRACTORS.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            results = [extract(page) for page in pages]
+        elapsed = (time.perf_counter() - start) / args.repeat
+        # Links of pages over the token cap are not needed, so streaming backends stop before them
+        same = sum(token_counts == expected[0] and (not token_counts or hrefs == expected[1])
+                   for (token_counts, hrefs, _), expected in zip(results, reference))
+        print(f"{backend:>8}: {elapsed / len(pages) * 1e3:7.2f} ms/page, "
+              f"{size / elapsed / 2 ** 20:6.1f} MiB/s, same as bs4 on {same}/{len(pages)} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+    Benchmark for FingerprintIndex lookups as the number of stored fingerprints grows.
+
+    Run from the project root:
+        python -m benchmarks.bench_fingerprint_index
+        python -m benchmarks.bench_fingerprint_index --sizes 10000 100000 1000000 10000000
+"""
+import random
+import time
+from argparse import ArgumentParser
+
+from fingerprint_index import FingerprintIndex
+from simhash import hamming_distance
+
+
+def flip_bits(fingerprint: int, count: int, rng: random.Random) -> int:
+    for bit in rng.sample(range(64), count):
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+
+def bench_size(size: int, lookups: int, rng: random.Random) -> tuple:
+    index = FingerprintIndex.from_similarity(0.95)
+    stored = [rng.getrandbits(64) for _ in range(size)]
+    for fingerprint in stored:
+        index.add(fingerprint)
+
+    misses = [rng.getrandbits(64) for _ in range(lookups)]
+    hits = [flip_bits(rng.choice(stored), index.max_distance, rng) for _ in range(lookups)]
+
+    start = time.perf_counter()
+    for fingerprint in misses:
+        index.contains_near(fingerprint)
+    miss_time = (time.perf_counter() - start) / lookups
+
+    start = time.perf_counter()
+    for fingerprint in hits:
+        assert index.contains_near(fingerprint)
+    hit_time = (time.perf_counter() - start) / lookups
+    return miss_time, hit_time
+
+
+def bench_linear_scan(size: int, lookups: int, rng: random.Random) -> float:
+    # What scraper.py used to do: compare against every stored fingerprint
+    stored = [rng.getrandbits(64) for _ in range(size)]
+    probes = [rng.getrandbits(64) for _ in range(lookups)]
+    start = time.perf_counter()
+    for fingerprint in probes:
+        any(hamming_distance(fingerprint, existing) <= 3 for existing in stored)
+    return (time.perf_counter() - start) / lookups
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    arg_parser.add_argument("--lookups", type=int, default=10_000)
+    args = arg_parser.parse_args()
+    rng = random.Random(0)
+
+    print(f"{'stored':>12} {'miss us/lookup':>16} {'hit us/lookup':>16}")
+    for size in args.sizes:
+        miss_time, hit_time = bench_size(size, args.lookups, rng)
+        print(f"{size:>12} {miss_time * 1e6:>16.2f} {hit_time * 1e6:>16.2f}")
+
+    smallest = min(args.sizes)
+    scan_time = bench_linear_scan(smallest, min(args.lookups, 200), rng)
+    print(f"linear scan over {smallest} fingerprints: {scan_time * 1e6:.2f} us/lookup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+    Benchmark for resuming a crawl: a save file holding N urls, of which a small share
+    (PENDING) were not downloaded yet, is written in each SAVEFORMAT, and a Frontier
+    resumes from it. Reports the time to resume, the time to check a url seen by the
+    earlier run, and how much the process' peak memory grew while resuming.
+
+    Writing the shelve goes through the dbm backend, which can be very slow for large
+    save files when only dbm.dumb is available, so the sizes are small by default.
+
+    Run from the project root:
+        python -m benchmarks.bench_frontier_restart
+        python -m benchmarks.bench_frontier_restart --sizes 1000000 10000000 --formats sqlite
+"""
+import os
+import resource
+import shelve
+import tempfile
+import time
+from argparse import ArgumentParser
+from types import SimpleNamespace
+
+from utils import get_urlhash
+from crawler.frontier import Frontier
+from crawler.frontier_store import SqliteFrontierStore
+
+PENDING = 0.05  # share of the saved urls not downloaded yet
+WRITE_BATCH = 100_000
+
+
+def make_config(directory: str, save_format: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        save_file=os.path.join(directory, f"frontier.{save_format}"),
+        save_batch=WRITE_BATCH, save_interval=60.0, save_format=save_format,
+        seed_urls=["https://www.ics.uci.edu"], analytics_file="",
+        scheduler="polite", time_delay=0, rate_floor=0, rate_ceiling=30, rate_latency=2)
+
+
+def saved_url(i: int) -> tuple:
+    # Spread over 500 hosts, every 1 / PENDING-th url is still to be downloaded
+    url = f"https://h{i % 500}.ics.uci.edu/page/{i}"
+    return url, i % round(1 / PENDING) != 0
+
+
+def write_save_file(config: SimpleNamespace, urls: int):
+    if config.save_format == "sqlite":
+        save = SqliteFrontierStore(config.save_file, WRITE_BATCH, 60.0)
+        for i in range(urls):
+            url, completed = saved_url(i)
+            save[None] = (url, False)
+            if completed:
+                save[None] = (url, True)
+            if i % WRITE_BATCH == 0:
+                save.sync()
+        save.close()
+    else:
+        with shelve.open(config.save_file) as save:
+            for i in range(urls):
+                url, completed = saved_url(i)
+                save[get_urlhash(url)] = (url, completed)
+
+
+def peak_memory_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench(config: SimpleNamespace, urls: int) -> tuple:
+    memory = peak_memory_mb()
+    start = time.perf_counter()
+    frontier = Frontier(config, restart=False)
+    resume = time.perf_counter() - start
+    memory = peak_memory_mb() - memory
+    checks = 10_000
+    start = time.perf_counter()
+    for i in range(checks):
+        frontier.add_url(saved_url(i * (urls // checks) if urls > checks else i % urls)[0])
+    check = (time.perf_counter() - start) / checks
+    pending = len(frontier.to_be_downloaded)
+    frontier.close()
+    return resume, check, memory, pending
+
+
+def in_child(function, *args):
+    # Runs function in its own process, so peak memory is not shared between runs
+    pid = os.fork()
+    if pid:
+        os.waitpid(pid, 0)
+        return
+    try:
+        function(*args)
+    finally:
+        os._exit(0)
+
+
+def run(save_format: str, urls: int):
+    with tempfile.TemporaryDirectory() as directory:
+        config = make_config(directory, save_format)
+        in_child(write_save_file, config, urls)
+        resume, check, memory, pending = bench(config, urls)
+    print(f"{urls:>10} {save_format:>7}  {resume:8.2f}s  {check * 1e6:8.1f}us  {memory:+9.0f}MB  {pending}",
+          flush=True)
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000], help="urls in the save file")
+    arg_parser.add_argument("--formats", nargs="+", default=["shelve", "sqlite"], help="SAVEFORMATs to run")
+    args = arg_parser.parse_args()
+    print(f"{'':>18}  {'resume':>9}  {'seen check':>10}  {'peak memory':>11}  pending")
+    for urls in args.sizes:
+        for save_format in args.formats:
+            in_child(run, save_format, urls)
+
+
+if __name__ == "__main__":
+    main()
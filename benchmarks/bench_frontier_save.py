@@ -0,0 +1,60 @@
+"""
+    Benchmark for frontier persistence: URLs per second for add_url + mark_url_complete
+    cycles with the plain shelve (a sync on every change), the batched WriteBehindShelf
+    and the batched SQLite save file (SAVEFORMAT = sqlite).
+
+    Run from the project root:
+        python -m benchmarks.bench_frontier_save
+        python -m benchmarks.bench_frontier_save --urls 20000 --batch 1000
+"""
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+from types import SimpleNamespace
+
+from crawler.frontier import Frontier
+
+
+def make_config(directory: str, save_batch: int, save_format: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        save_file=os.path.join(directory, f"frontier-{save_batch}.{save_format}"),
+        save_batch=save_batch, save_interval=5.0, save_format=save_format,
+        seed_urls=["https://www.ics.uci.edu"], analytics_file="",
+        scheduler="lifo", time_delay=0, rate_floor=0, rate_ceiling=30, rate_latency=2)
+
+
+def bench(save_batch: int, save_format: str, urls: int, outlinks: int, directory: str) -> float:
+    frontier = Frontier(make_config(directory, save_batch, save_format), restart=True)
+    start = time.perf_counter()
+    done = 0
+    while done < urls:
+        url = frontier.get_tbd_url()
+        # Each page adds a handful of new outlinks, like a real crawl
+        for i in range(outlinks):
+            frontier.add_url(f"https://www.ics.uci.edu/page/{done}/{i}")
+        frontier.mark_url_complete(url)
+        done += 1
+    frontier.close()
+    return done * (outlinks + 1) / (time.perf_counter() - start)
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--urls", type=int, default=2000, help="pages completed per run")
+    arg_parser.add_argument("--outlinks", type=int, default=5, help="urls added per page")
+    arg_parser.add_argument("--batch", type=int, default=500, help="SAVEBATCH for the batched runs")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        runs = [
+            ("shelve, sync per change", 1, "shelve"),
+            (f"write-behind, batch {args.batch}", args.batch, "shelve"),
+            (f"sqlite, batch {args.batch}", args.batch, "sqlite")]
+        for name, save_batch, save_format in runs:
+            rate = bench(save_batch, save_format, args.urls, args.outlinks, directory)
+            print(f"{name:>28}: {rate:10.0f} url changes/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+    Benchmark for the cost of logging to the crawler's threads: worker threads each log
+    per url lines as fast as they can, with the old get_logger (a file and a console
+    handler written by the thread that logs, flushed after every line) and with the
+    queued one (lines handed to a background thread), with and without LOGSAMPLE.
+
+    Reports how long the workers were busy logging, and how long until every line was
+    written. Console output goes to /dev/null so the terminal is not what is measured.
+
+    Run from the project root:
+        python -m benchmarks.bench_logging
+        python -m benchmarks.bench_logging --threads 8 --lines 20000
+"""
+import logging
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+from threading import Thread
+
+import utils.logs as logs
+
+
+def old_get_logger(name, filename, log_dir, console):
+    # utils.get_logger before the queued pipeline (console stream made a parameter)
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    fh = logging.FileHandler(os.path.join(log_dir, f"{filename}.log"))
+    fh.setLevel(logging.DEBUG)
+    ch = logging.StreamHandler(console)
+    ch.setLevel(logging.INFO)
+    formatter = logging.Formatter(
+       "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    fh.setFormatter(formatter)
+    ch.setFormatter(formatter)
+    logger.addHandler(fh)
+    logger.addHandler(ch)
+    return logger
+
+
+def run_workers(loggers: list, lines: int, extra: dict) -> float:
+    def work(logger):
+        for i in range(lines):
+            logger.info(
+                "Downloaded %s, status <%s>, in %.2fs, using cache %s.",
+                f"https://www.ics.uci.edu/page/{i}", 200, 0.05, ("localhost", 1), extra=extra)
+    threads = [Thread(target=work, args=(logger,)) for logger in loggers]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--threads", type=int, default=4)
+    arg_parser.add_argument("--lines", type=int, default=10000)
+    arg_parser.add_argument("--sample", type=int, default=10)
+    args = arg_parser.parse_args()
+    total = args.threads * args.lines
+    print(f"{args.threads} threads logging {args.lines} lines each")
+    with tempfile.TemporaryDirectory() as log_dir, open(os.devnull, "w") as console:
+        logs.LOG_DIR = log_dir
+        logs._router.console.setStream(console)
+
+        loggers = [old_get_logger(f"Old-{i}", "Old", log_dir, console) for i in range(args.threads)]
+        busy = run_workers(loggers, args.lines, {})
+        print(f"{'old get_logger':>24}: workers busy {busy:6.2f}s, written {busy:6.2f}s, "
+              f"{total / busy:9.0f} lines/s")
+
+        for name, sample in [("queued", 1), (f"queued, LOGSAMPLE={args.sample}", args.sample)]:
+            logs.per_url_filter.configure(sample_every=sample)
+            loggers = [logs.get_logger(f"New-{sample}-{i}", f"New-{sample}") for i in range(args.threads)]
+            start = time.perf_counter()
+            busy = run_workers(loggers, args.lines, logs.PER_URL)
+            logs.flush_logs()
+            written = time.perf_counter() - start
+            print(f"{name:>24}: workers busy {busy:6.2f}s, written {written:6.2f}s, "
+                  f"{total / written:9.0f} lines/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+    Benchmark for the order urls are crawled in: a made up web of hosts whose pages form
+    a shallow tree of useful pages, where some hosts also have an endless calendar (every
+    month links to the next one and to its days). Each scheduler crawls it with the same
+    fetch budget (one worker, each fetch taking one time unit, and DELAY time units
+    between two fetches from a host, by default as many fetches as there are useful
+    pages). Reports the share of useful pages among the first quarter, half and all of
+    the fetches, how many hosts were reached, and the time per push and pop of its queue.
+
+    Run from the project root:
+        python -m benchmarks.bench_priority
+        python -m benchmarks.bench_priority --hosts 40 --budget 2000
+"""
+import random
+import time
+from argparse import ArgumentParser
+
+from crawler.scheduler import SCHEDULERS
+
+SECTIONS = 4  # sections per host, and pages per section
+TRAP_EVERY = 3  # every third host has a calendar
+DELAY = 5  # politeness delay, in fetches
+
+
+class SyntheticWeb(object):
+    def __init__(self, hosts: int, seed: int = 0):
+        self.hosts = hosts
+        self.seed = seed
+
+    def root(self, host: int) -> str:
+        return f"https://h{host}.ics.uci.edu/"
+
+    def links(self, url: str) -> list:
+        rng = random.Random(f"{self.seed}{url}")
+        host_name, path = url[len("https://"):].split("/", 1)
+        host = int(host_name.split(".")[0][1:])
+        base = self.root(host)
+        parts = [part for part in path.split("/") if part]
+        if parts and parts[0] == "calendar":
+            year, month = int(parts[1]), int(parts[2])
+            following = (year + month // 12, month % 12 + 1)
+            links = [f"{base}calendar/{following[0]}/{following[1]}"]
+            if len(parts) == 3:
+                links += [f"{base}calendar/{year}/{month}/{day}" for day in range(1, 6)]
+            return links
+        links = [self.root(rng.randrange(self.hosts)) for _ in range(2)]
+        if not parts:
+            links += [f"{base}sec{section}" for section in range(SECTIONS)]
+            if host % TRAP_EVERY == 0:
+                links.append(f"{base}calendar/2024/1")
+        elif len(parts) == 1:
+            links += [f"{base}{parts[0]}/page{page}" for page in range(SECTIONS)]
+        return links
+
+    def useful(self, url: str) -> bool:
+        return "/calendar/" not in url
+
+
+def crawl(scheduler_name: str, web: SyntheticWeb, budget: int) -> tuple:
+    scheduler = SCHEDULERS[scheduler_name](DELAY)
+    seen = set()
+    for host in range(0, web.hosts, 5):  # seeds on a few hosts only
+        seen.add(web.root(host))
+        scheduler.push(web.root(host))
+    useful, hosts = [], set()  # useful is one bool per fetch
+    now = 0.0
+    while len(useful) < budget:
+        url, wait = scheduler.pop(now)
+        if url is None:
+            if wait is None:
+                break
+            now += wait
+            continue
+        now += 1
+        useful.append(web.useful(url))
+        hosts.add(url.split("/")[2])
+        for link in web.links(url):
+            if link in seen:
+                scheduler.add_inlink(link)
+            else:
+                seen.add(link)
+                scheduler.push(link)
+        scheduler.done(url, now)
+    return useful, len(hosts)
+
+
+def queue_speed(scheduler_name: str, urls: int) -> float:
+    # Seconds per push and pop, with urls spread over 1000 hosts
+    scheduler = SCHEDULERS[scheduler_name](0)
+    rng = random.Random(0)
+    batch = [f"https://h{rng.randrange(1000)}.ics.uci.edu/a/{i}/b{rng.randrange(50)}" for i in range(urls)]
+    start = time.perf_counter()
+    for url in batch:
+        scheduler.push(url)
+    for _ in range(urls):
+        url, _ = scheduler.pop(0)
+        scheduler.done(url, 0)
+    return (time.perf_counter() - start) / urls
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--hosts", type=int, default=20)
+    arg_parser.add_argument("--budget", type=int, default=0, help="fetches (default: the useful pages)")
+    arg_parser.add_argument("--urls", type=int, default=100_000, help="urls for the queue speed test")
+    args = arg_parser.parse_args()
+    web = SyntheticWeb(args.hosts)
+    useful_pages = args.hosts * (1 + SECTIONS + SECTIONS * SECTIONS)
+    budget = args.budget or useful_pages
+    print(f"{args.hosts} hosts with {useful_pages} useful pages, fetch budget {budget}")
+    print(f"{'':>8}  useful in the first 1/4, 1/2 and all fetches")
+    for name in SCHEDULERS:
+        useful, hosts = crawl(name, web, budget)
+        shares = "  ".join(
+            f"{sum(useful[:len(useful) * part // 4]) / max(len(useful) * part // 4, 1):6.1%}"
+            for part in (1, 2, 4))
+        microseconds = queue_speed(name, args.urls) * 1e6
+        print(f"{name:>8}: {shares}, {hosts:3d} hosts reached, {microseconds:5.2f}us per push and pop")
+
+
+if __name__ == "__main__":
+    main()
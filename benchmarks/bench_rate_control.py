@@ -0,0 +1,101 @@
+"""
+    Benchmark for per host rate control: threads crawl made up hosts through the polite
+    frontier, with downloads simulated by sleeping each host's latency. Some hosts are
+    fragile and answer 503 when their downloads start less than --fragile-gap seconds
+    apart. Compares the old fixed delay, waited out after every download, with the
+    adaptive delay (HostRateControl), counted from the start of each download: pages per
+    second from the other hosts (until their last page), and how many replies were 503s.
+
+    Run from the project root:
+        python -m benchmarks.bench_rate_control
+        python -m benchmarks.bench_rate_control --hosts 40 --delay 0.5 --threads 32
+"""
+import os
+import random
+import tempfile
+import time
+from argparse import ArgumentParser
+from threading import Thread, Lock
+from types import SimpleNamespace
+
+from crawler.frontier import Frontier
+from crawler.scheduler import get_host
+
+FRAGILE_EVERY = 4  # every fourth host is fragile
+
+
+class SimulatedHosts(object):
+    def __init__(self, hosts: int, latency: float, fragile_gap: float):
+        rng = random.Random(0)
+        self.latency = {f"host{h}.ics.uci.edu": rng.uniform(latency / 4, latency) for h in range(hosts)}
+        self.fragile = {f"host{h}.ics.uci.edu" for h in range(0, hosts, FRAGILE_EVERY)}
+        self.fragile_gap = fragile_gap
+        self.last_start = dict()
+        self.lock = Lock()
+
+    def download(self, url: str) -> int:
+        host = get_host(url)
+        with self.lock:
+            now = time.monotonic()
+            too_soon = host in self.fragile and now - self.last_start.get(host, -1e9) < self.fragile_gap
+            self.last_start[host] = now
+        time.sleep(self.latency[host])
+        return 503 if too_soon else 200
+
+
+def crawl(adaptive: bool, args, directory: str) -> tuple:
+    config = SimpleNamespace(
+        save_file=os.path.join(directory, f"{adaptive}.shelve"),
+        save_batch=10_000, save_interval=60.0, save_format="shelve", analytics_file="",
+        scheduler="polite", time_delay=args.delay, rate_floor=args.delay, rate_ceiling=30, rate_latency=2,
+        seed_urls=[f"https://host{h}.ics.uci.edu/page{p}" for h in range(args.hosts) for p in range(args.pages)])
+    frontier = Frontier(config, restart=True)
+    hosts = SimulatedHosts(args.hosts, args.latency, args.fragile_gap)
+    statuses = []
+    healthy_done = []  # times the other hosts' pages finished
+
+    def work():
+        while True:
+            url = frontier.get_tbd_url()
+            if url is None:
+                break
+            start = time.monotonic()
+            status = hosts.download(url)
+            if adaptive:
+                frontier.fetched(url, status, time.monotonic() - start)
+            frontier.mark_url_complete(url)
+            statuses.append(status)
+            if get_host(url) not in hosts.fragile:
+                healthy_done.append(time.perf_counter())
+
+    start = time.perf_counter()
+    workers = [Thread(target=work) for _ in range(args.threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    frontier.close()
+    return len(healthy_done) / (max(healthy_done) - start), statuses.count(503)
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--hosts", type=int, default=20)
+    arg_parser.add_argument("--pages", type=int, default=10, help="pages per host")
+    arg_parser.add_argument("--delay", type=float, default=0.2, help="POLITENESS in seconds")
+    arg_parser.add_argument("--latency", type=float, default=0.1, help="slowest host's download time")
+    arg_parser.add_argument("--fragile-gap", type=float, default=0.5, help="seconds fragile hosts need between downloads")
+    arg_parser.add_argument("--threads", type=int, default=16)
+    args = arg_parser.parse_args()
+
+    pages = args.hosts * args.pages
+    print(f"{args.hosts} hosts, {pages} pages, POLITENESS {args.delay}s, {args.threads} threads")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, adaptive in [("fixed delay", False), ("adaptive delay", True)]:
+            rate, errors = crawl(adaptive, args, directory)
+            print(f"{name:>15}: {rate:7.1f} pages/s from other hosts, "
+                  f"{errors:4d} replies were 503 ({errors / pages:.0%})")
+
+
+if __name__ == "__main__":
+    main()
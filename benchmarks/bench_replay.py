@@ -0,0 +1,118 @@
+"""
+    End-to-end crawl benchmark on a fixed corpus: a recorded archive of cache server replies
+    (RECORD in config.ini) served back by the stub cache server, so every run crawls exactly
+    the same pages. Reports pages per second, the time per page of each stage (from
+    utils.metrics) and peak memory for each crawler engine.
+
+    Without --archive, a corpus is made from the stub cache server's made up site first.
+
+    Run from the project root:
+        python -m benchmarks.bench_replay
+        python -m benchmarks.bench_replay --archive recorded.sqlite --seeds https://www.ics.uci.edu --latency 0.05
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from configparser import ConfigParser
+
+
+def make_corpus(path: str, args) -> list:
+    # Records every page of the stub site, returns the seed urls
+    from utils.archive import ResponseArchive
+    from utils.stub_cache_server import StubSite
+    site = StubSite(args.hosts, args.pages, words_per_page=args.words)
+    archive = ResponseArchive(path)
+    for host in range(args.hosts):
+        for page in range(args.pages):
+            url = f"https://site{host}.ics.uci.edu/page{page}"
+            archive.put(url, site.reply(url))
+    archive.close()
+    return site.seed_urls()
+
+
+def make_config(directory: str, args):
+    from utils.config import Config
+    cparser = ConfigParser()
+    cparser["IDENTIFICATION"] = {"USERAGENT": "IR benchmark"}
+    cparser["CONNECTION"] = {"HOST": "localhost", "PORT": "0"}
+    cparser["CRAWLER"] = {"SEEDURL": args.seeds, "POLITENESS": str(args.politeness)}
+    cparser["LOCAL PROPERTIES"] = {
+        "SAVE": os.path.join(directory, "frontier.shelve"), "SAVEBATCH": "1000",
+        "THREADCOUNT": str(args.threads), "SCHEDULER": "polite", "ENGINE": args.engine,
+        "MAXINFLIGHT": str(args.in_flight), "PARSEPROCESSES": str(args.parse_processes),
+        "EXTRACTOR": args.extractor}
+    return Config(cparser)
+
+
+def run_engine(args):
+    # Runs in its own process so the static Parser statistics and the metrics start empty
+    from crawler import Crawler
+    from crawler.async_crawler import AsyncCrawler
+    from crawler.pipeline import PipelineCrawler
+    from parser import Parser
+    from utils.archive import ResponseArchive
+    from utils.metrics import METRICS
+    from utils.stub_cache_server import StubCacheServer, ReplaySite
+
+    server = StubCacheServer(site=ReplaySite(ResponseArchive(args.archive)), latency=args.latency)
+    with tempfile.TemporaryDirectory() as directory:
+        config = make_config(directory, args)
+        config.cache_server = server.start()
+        Parser.configure(config)
+        engines = {"threads": Crawler, "pipeline": PipelineCrawler, "async": AsyncCrawler}
+        crawler = engines[args.engine](config, True)
+        start = time.perf_counter()
+        crawler.start()
+        elapsed = time.perf_counter() - start
+    snapshot = METRICS.snapshot()
+    # ru_maxrss is in KiB on Linux; parse processes count as children
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024
+    pages = Parser.pages_parsed
+    print(f"{args.engine:>8}: {pages} pages in {elapsed:.1f}s, {pages / elapsed:.1f} pages/s, "
+          f"peak memory {peak:.0f} MiB")
+    for stage, histogram in snapshot["stages"].items():
+        per_page = histogram["total_seconds"] / pages * 1e3 if pages else 0.0
+        print(f"    {stage:>22}: {per_page:7.3f} ms/page, p95 {histogram['p95_seconds'] * 1e3:8.3f} ms")
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--engine", choices=["threads", "pipeline", "async"], default=None)
+    arg_parser.add_argument("--archive", type=str, default=None, help="RECORD file to replay")
+    arg_parser.add_argument("--seeds", type=str, default=None, help="SEEDURL of the recorded crawl")
+    arg_parser.add_argument("--hosts", type=int, default=50, help="hosts of the made up corpus")
+    arg_parser.add_argument("--pages", type=int, default=20, help="pages per host of the made up corpus")
+    arg_parser.add_argument("--words", type=int, default=300, help="words per page of the made up corpus")
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="stub cache server delay per response")
+    arg_parser.add_argument("--politeness", type=float, default=0.0)
+    arg_parser.add_argument("--threads", type=int, default=4)
+    arg_parser.add_argument("--in_flight", type=int, default=50)
+    arg_parser.add_argument("--parse_processes", type=int, default=2)
+    arg_parser.add_argument("--extractor", type=str, default="lxml")
+    args = arg_parser.parse_args()
+
+    if args.engine:
+        run_engine(args)
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        options = sys.argv[1:]
+        if not args.archive:
+            archive = os.path.join(directory, "corpus.sqlite")
+            seeds = make_corpus(archive, args)
+            options += ["--archive", archive, "--seeds", ",".join(seeds)]
+            print(f"Made a corpus of {args.hosts * args.pages} pages")
+        elif not args.seeds:
+            arg_parser.error("--seeds is needed with --archive")
+        for engine in ["threads", "pipeline", "async"]:
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_replay", "--engine", engine] + options,
+                           check=True, stderr=subprocess.DEVNULL)
+
+
+if __name__ == "__main__":
+    main()
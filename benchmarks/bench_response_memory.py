@@ -0,0 +1,93 @@
+"""
+    Benchmark for the memory a worker needs per downloaded page: peak traced memory while
+    reading cache server replies and scraping them, with the old eager Response (chunk
+    list joined, page unpickled right away, reply kept until the next download) and with
+    the lazy Response (one buffer, unpickled when read, released after scraping).
+
+    Run from the project root:
+        python -m benchmarks.bench_response_memory
+        python -m benchmarks.bench_response_memory --megabytes 8 --replies 20
+"""
+import pickle
+import tracemalloc
+from argparse import ArgumentParser
+
+import cbor
+import requests
+
+from utils.response import Response
+
+
+class OldResponse(object):
+    # utils.response.Response before lazy decoding
+    def __init__(self, resp_dict):
+        self.url = resp_dict["url"]
+        self.status = resp_dict["status"]
+        self.error = resp_dict["error"] if "error" in resp_dict else None
+        try:
+            self.raw_response = (
+                pickle.loads(resp_dict["response"])
+                if "response" in resp_dict else
+                None)
+        except TypeError:
+            self.raw_response = None
+
+
+def make_reply(megabytes: float, status: int) -> bytes:
+    # A cache server reply, as utils.stub_cache_server makes them
+    raw_response = requests.models.Response()
+    raw_response.status_code = status
+    raw_response._content = b"<html><body>" + b"<p>words and more words</p>" * int(megabytes * 2 ** 20 / 27)
+    raw_response.headers["Content-Type"] = "text/html"
+    return cbor.dumps({"url": "https://www.ics.uci.edu/", "status": status, "response": pickle.dumps(raw_response)})
+
+
+def chunks_of(reply: bytes):
+    for start in range(0, len(reply), 64 * 1024):
+        yield reply[start:start + 64 * 1024]
+
+
+def old_worker(replies: list) -> int:
+    resp = None
+    for reply in replies:
+        chunks = list(chunks_of(reply))
+        content = b"".join(chunks)
+        del chunks
+        resp = OldResponse(cbor.loads(content))  # the previous reply is only dropped here
+        del content
+        if resp.status == 200:
+            len(resp.raw_response.content)  # scraping
+    return tracemalloc.get_traced_memory()[1]
+
+
+def new_worker(replies: list) -> int:
+    for reply in replies:
+        body = bytearray()
+        for chunk in chunks_of(reply):
+            body += chunk
+        resp = Response(cbor.loads(body))
+        del body
+        if resp.status == 200:
+            len(resp.raw_response.content)  # scraping
+        resp.release()
+    return tracemalloc.get_traced_memory()[1]
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--megabytes", type=float, default=4)
+    arg_parser.add_argument("--replies", type=int, default=10)
+    args = arg_parser.parse_args()
+    # Every other reply is an error page whose body the scraper never reads
+    replies = [make_reply(args.megabytes, 200 if i % 2 == 0 else 404) for i in range(args.replies)]
+    print(f"{args.replies} replies of {len(replies[0]) / 2 ** 20:.1f} MiB")
+    for name, worker in [("eager Response", old_worker), ("lazy Response", new_worker)]:
+        tracemalloc.start()
+        peak = worker(replies)
+        tracemalloc.stop()
+        print(f"{name:>15}: peak {peak / 2 ** 20:6.1f} MiB above the replies, "
+              f"{peak / len(replies[0]):.1f}x a reply")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+    Benchmark for robots.txt checks per link with the old Parser loop over every rule and
+    with the compiled RobotsRules trie, as the number of rules grows.
+
+    Run from the project root:
+        python -m benchmarks.bench_robots
+        python -m benchmarks.bench_robots --links 50000
+"""
+import random
+import time
+from argparse import ArgumentParser
+
+from robots import RobotsRules
+
+SITE = "https://www.informatics.uci.edu"
+
+
+def old_allowed(bare_url: str, disallowed_links: list, allowed_links: list) -> bool:
+    # The check Parser.get_allowed_links did for each link before robots.py
+    is_allowed = True
+    for disallowed_link in disallowed_links:
+        if disallowed_link in bare_url and bare_url not in allowed_links:
+            is_allowed = False
+    return is_allowed
+
+
+def make_rules(count: int, rng: random.Random) -> list:
+    words = ["research", "people", "wp-admin", "events", "news", "courses", "labs", "about"]
+    return [(rng.random() < 0.3, "/" + "/".join(rng.choices(words, k=rng.randint(1, 3))) + f"{i}/")
+            for i in range(count)]
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--links", type=int, default=20_000)
+    args = arg_parser.parse_args()
+    rng = random.Random(0)
+
+    print(f"{args.links} links")
+    for count in [10, 100, 1000]:
+        rules = make_rules(count, rng)
+        links = [SITE + rng.choice(rules)[1] + f"page{i}" if i % 2 else SITE + f"/news/page{i}"
+                 for i in range(args.links)]
+        disallowed = [SITE + pattern for allow, pattern in rules if not allow]
+        allowed = [SITE + pattern for allow, pattern in rules if allow]
+
+        start = time.perf_counter()
+        for link in links:
+            old_allowed(link, disallowed, allowed)
+        old_time = (time.perf_counter() - start) / len(links)
+
+        compiled = RobotsRules(rules)
+        start = time.perf_counter()
+        for link in links:
+            compiled.allowed(link)
+        new_time = (time.perf_counter() - start) / len(links)
+        print(f"{count:>5} rules: old loop {old_time * 1e6:8.2f} us/link, "
+              f"compiled {new_time * 1e6:6.2f} us/link")
+
+
+if __name__ == "__main__":
+    main()
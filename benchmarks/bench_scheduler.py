@@ -0,0 +1,74 @@
+"""
+    Benchmark for crawl throughput against THREADCOUNT with the lifo and polite schedulers.
+    Downloads are simulated with a fixed latency, so only the frontier and politeness waits matter.
+
+    Run from the project root:
+        python -m benchmarks.bench_scheduler
+        python -m benchmarks.bench_scheduler --hosts 40 --delay 0.5 --latency 0.05
+"""
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+from threading import Thread
+from types import SimpleNamespace
+
+from crawler.frontier import Frontier
+
+
+def run_workers(frontier: Frontier, threads: int, latency: float, delay: float) -> int:
+    downloaded = []
+
+    def work():
+        while True:
+            url = frontier.get_tbd_url()
+            if url is None:
+                break
+            time.sleep(latency)
+            frontier.mark_url_complete(url)
+            downloaded.append(url)
+            if not frontier.polite:
+                time.sleep(delay)
+
+    workers = [Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return len(downloaded)
+
+
+def bench(scheduler: str, threads: int, args, directory: str) -> float:
+    config = SimpleNamespace(
+        save_file=os.path.join(directory, f"{scheduler}-{threads}.shelve"),
+        save_batch=10_000, save_interval=60.0, save_format="shelve", analytics_file="",
+        scheduler=scheduler, time_delay=args.delay, rate_floor=args.delay, rate_ceiling=30, rate_latency=2,
+        seed_urls=[f"https://host{h}.ics.uci.edu/page{p}"
+                   for h in range(args.hosts) for p in range(args.pages)])
+    frontier = Frontier(config, restart=True)
+    start = time.perf_counter()
+    downloaded = run_workers(frontier, threads, args.latency, args.delay)
+    elapsed = time.perf_counter() - start
+    frontier.close()
+    return downloaded / elapsed
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--hosts", type=int, default=20)
+    arg_parser.add_argument("--pages", type=int, default=5, help="pages per host")
+    arg_parser.add_argument("--delay", type=float, default=0.2, help="POLITENESS in seconds")
+    arg_parser.add_argument("--latency", type=float, default=0.02, help="simulated download time")
+    arg_parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = arg_parser.parse_args()
+
+    print(f"{'threads':>8} {'lifo pages/s':>14} {'polite pages/s':>16}")
+    with tempfile.TemporaryDirectory() as directory:
+        for threads in args.threads:
+            lifo = bench("lifo", threads, args, directory)
+            polite = bench("polite", threads, args, directory)
+            print(f"{threads:>8} {lifo:>14.1f} {polite:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
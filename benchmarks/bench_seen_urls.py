@@ -0,0 +1,75 @@
+"""
+    Benchmark for the frontier's seen-url check: memory per url of a Python set of url
+    strings and of UrlDigestSet, and the time to check an already seen url with the save
+    file (what Frontier.add_url did before) and with UrlDigestSet.
+
+    Run from the project root:
+        python -m benchmarks.bench_seen_urls
+        python -m benchmarks.bench_seen_urls --urls 10000000 --shelve_urls 0
+"""
+import os
+import shelve
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+
+from crawler.seen import UrlDigestSet
+from utils import get_urlhash
+
+
+def make_urls(count: int) -> list:
+    return [f"https://www.ics.uci.edu/~faculty{i % 997}/publications/paper{i}" for i in range(count)]
+
+
+def memory_per_url(build, urls: list) -> float:
+    tracemalloc.start()
+    container = build(urls)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del container
+    return size / len(urls)
+
+
+def build_digest_set(urls: list) -> UrlDigestSet:
+    seen = UrlDigestSet()
+    for url in urls:
+        seen.add(url)
+    return seen
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--urls", type=int, default=1_000_000)
+    arg_parser.add_argument("--shelve_urls", type=int, default=100_000, help="urls in the save file, 0 to skip")
+    args = arg_parser.parse_args()
+    urls = make_urls(args.urls)
+
+    print(f"{args.urls} urls")
+    print(f"{'set of url strings':>22}: {memory_per_url(lambda urls: set((url + '#')[:-1] for url in urls), urls):6.1f} bytes/url "
+          "(strings included)")
+    print(f"{'UrlDigestSet':>22}: {memory_per_url(build_digest_set, urls):6.1f} bytes/url")
+
+    seen = build_digest_set(urls)
+    start = time.perf_counter()
+    for url in urls:
+        seen.add(url)
+    print(f"{'UrlDigestSet.add':>22}: {(time.perf_counter() - start) / len(urls) * 1e6:6.2f} us/seen url")
+
+    if args.shelve_urls:
+        with tempfile.TemporaryDirectory() as directory:
+            save = shelve.open(os.path.join(directory, "frontier.shelve"))
+            for url in urls[:args.shelve_urls]:
+                save[get_urlhash(url)] = (url, True)
+            save.sync()
+            start = time.perf_counter()
+            for url in urls[:args.shelve_urls]:
+                get_urlhash(url) in save
+            elapsed = time.perf_counter() - start
+            save.close()
+        print(f"{'save file lookup':>22}: {elapsed / args.shelve_urls * 1e6:6.2f} us/seen url "
+              f"({args.shelve_urls} urls in the save file)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+    Benchmark for simhash fingerprint time per page.
+
+    Run from the project root:
+        python -m benchmarks.bench_simhash
+        python -m benchmarks.bench_simhash --tokens 10000 --pages 50
+"""
+import random
+import time
+from argparse import ArgumentParser
+
+import simhash
+
+
+def old_simhash(tokens: list, max_hash_bits=64) -> str:
+    # The string based simhash scraper.py used before
+    vector_vals = [0] * max_hash_bits
+    for token in tokens:
+        hash_value = 0
+        for char in token:
+            hash_value = (hash_value * 31 + ord(char)) % (2 ** max_hash_bits)
+        for i in range(max_hash_bits):
+            bitmask = 1 << i
+            if hash_value & bitmask:
+                vector_vals[i] += 1
+            else:
+                vector_vals[i] -= 1
+    fingerprint = 0
+    for i in range(max_hash_bits):
+        if vector_vals[i] >= 0:
+            fingerprint |= (1 << i)
+    return bin(fingerprint)[2:]
+
+
+def make_page(token_count: int, vocabulary: list, rng: random.Random) -> list:
+    # Zipf-like word choice, so pages repeat common words the way real text does
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    return rng.choices(vocabulary, weights=weights, k=token_count)
+
+
+def time_per_page(function, pages: list) -> float:
+    start = time.perf_counter()
+    for page in pages:
+        function(page)
+    return (time.perf_counter() - start) / len(pages)
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--tokens", type=int, default=10_000)
+    arg_parser.add_argument("--pages", type=int, default=20)
+    args = arg_parser.parse_args()
+    rng = random.Random(0)
+
+    vocabulary = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=rng.randint(2, 12)))
+                  for _ in range(20_000)]
+    pages = [make_page(args.tokens, vocabulary, rng) for _ in range(args.pages)]
+
+    results = [
+        ("old string simhash", old_simhash),
+        ("fingerprint, python", lambda page: simhash.fingerprint(page, use_numpy=False)),
+        ("fingerprint compat, python", lambda page: simhash.fingerprint(page, compat=True, use_numpy=False)),
+    ]
+    if simhash.np is not None:
+        results += [
+            ("fingerprint, numpy", simhash.fingerprint),
+            ("fingerprint compat, numpy", lambda page: simhash.fingerprint(page, compat=True)),
+        ]
+
+    print(f"{args.pages} pages of {args.tokens} tokens")
+    for name, function in results:
+        print(f"{name:>28}: {time_per_page(function, pages) * 1e3:8.2f} ms/page")
+
+
+if __name__ == "__main__":
+    main()
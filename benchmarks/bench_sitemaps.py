@@ -0,0 +1,97 @@
+"""
+    Benchmark for sitemap ingestion. Parses a made up sitemap of --urls urls with the
+    streaming parse_sitemap and by building the whole ElementTree first, reporting urls
+    per second and the peak memory of each. Then refreshes a crawl that has downloaded
+    every url of the sitemap, after CHANGED of the pages got a later lastmod: reports
+    how many urls each SAVEFORMAT queues again, against downloading all of them anew,
+    and the time per sitemap url.
+
+    Run from the project root:
+        python -m benchmarks.bench_sitemaps
+        python -m benchmarks.bench_sitemaps --urls 50000
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from types import SimpleNamespace
+from xml.etree import ElementTree
+
+from crawler.frontier import Frontier
+from crawler.sitemaps import parse_sitemap, parse_lastmod
+
+CHANGED = 0.05  # share of the pages whose lastmod moves past their download
+NAMESPACE = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+
+def page_url(i: int) -> str:
+    return f"https://h{i % 50}.ics.uci.edu/news/{i}"
+
+
+def make_sitemap(urls: int, changed: set) -> bytes:
+    entries = "".join(
+        f"<url><loc>{page_url(i)}</loc><lastmod>{'2999-01-01' if i in changed else '2020-01-01'}</lastmod>"
+        f"<changefreq>weekly</changefreq></url>"
+        for i in range(urls))
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>'
+        f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>').encode("utf-8")
+
+
+def parse_whole_tree(content: bytes) -> list:
+    # The straightforward way: the whole document as a tree, then its url elements
+    root = ElementTree.fromstring(content)
+    return [("url", url.findtext(f"{NAMESPACE}loc").strip(), parse_lastmod(url.findtext(f"{NAMESPACE}lastmod")))
+            for url in root.iter(f"{NAMESPACE}url")]
+
+
+def measure(function, content: bytes) -> tuple:
+    start = time.perf_counter()
+    entries = sum(1 for _ in function(content))
+    elapsed = time.perf_counter() - start
+    # Peak memory in a second run, tracemalloc slows the parsing down
+    tracemalloc.start()
+    sum(1 for _ in function(content))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return entries / elapsed, peak / 1e6
+
+
+def refresh(save_format: str, content: bytes, urls: int, directory: str) -> tuple:
+    config = SimpleNamespace(
+        save_file=os.path.join(directory, f"frontier.{save_format}"), save_batch=10_000, save_interval=60.0,
+        save_format=save_format, analytics_file="", scheduler="polite", time_delay=0, seed_urls=[],
+        rate_floor=0, rate_ceiling=30, rate_latency=2)
+    frontier = Frontier(config, restart=True)
+    for i in range(urls):  # a crawl that downloaded every page
+        frontier.add_url(page_url(i))
+        frontier.mark_url_complete(page_url(i))
+    frontier.close()
+    frontier = Frontier(config, restart=False)
+    start = time.perf_counter()
+    queued = sum(frontier.add_sitemap_url(url, lastmod) for _, url, lastmod in parse_sitemap(content))
+    elapsed = time.perf_counter() - start
+    frontier.close()
+    return queued, elapsed / urls
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--urls", type=int, default=20_000, help="urls in the sitemap")
+    args = arg_parser.parse_args()
+    changed = set(range(0, args.urls, round(1 / CHANGED)))
+    content = make_sitemap(args.urls, changed)
+    print(f"sitemap of {args.urls} urls, {len(content) / 1e6:.1f}MB")
+    for name, function in [("whole tree", parse_whole_tree), ("streaming", parse_sitemap)]:
+        rate, peak = measure(function, content)
+        print(f"{name:>11}: {rate:9.0f} urls/s, peak memory {peak:6.1f}MB")
+    with tempfile.TemporaryDirectory() as directory:
+        for save_format in ("shelve", "sqlite"):
+            queued, seconds = refresh(save_format, content, args.urls, directory)
+            print(f"refresh with {save_format:>6}: {queued} of {args.urls} urls queued again "
+                  f"({len(changed)} changed), {seconds * 1e6:.1f}us per sitemap url")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+    Benchmark for tokenizer.py on multi-megabyte pages: the old tokenize and
+    compute_word_frequencies against the streaming tokenizer, count_tokens and the
+    Counter based compute_word_frequencies. Pages are timed over the token cap (skipped)
+    and under it (the cap raised above the page's token count), as lines of text and as
+    a single line (e.g. a page whose text has no line breaks).
+
+    Run from the project root:
+        python -m benchmarks.bench_tokenizer
+        python -m benchmarks.bench_tokenizer --megabytes 20
+"""
+import random
+import re
+import time
+from argparse import ArgumentParser
+
+import tokenizer
+
+WORDS = ("research faculty students computer science informatics statistics course "
+         "lecture project seminar graduate undergraduate department university irvine "
+         "data systems learning software networks security theory algorithms 2024 cs121").split()
+
+
+def old_tokenize(lines: list, max_tokens: int = tokenizer.MAX_TOKENS) -> list:
+    # tokenizer.tokenize before the streaming tokenizer
+    tokens = []
+    for line in lines:
+        line_tokens = re.findall(r'[a-zA-Z0-9]+', line.lower())
+        if len(tokens) > max_tokens:
+            return []
+        for token in line_tokens:
+            tokens.append(token)
+    return tokens
+
+
+def old_compute_word_frequencies(tokens: list) -> dict:
+    # tokenizer.compute_word_frequencies before Counter
+    frequencies = {}
+    for token in tokens:
+        if token in frequencies.keys():
+            frequencies[token] += 1
+        else:
+            frequencies.update({token: 1})
+    return frequencies
+
+
+def make_lines(megabytes: float, rng: random.Random) -> list:
+    # Lines of page text, with a rare word now and then so the vocabulary keeps growing
+    lines, size = [], 0
+    while size < megabytes * 2 ** 20:
+        words = rng.choices(WORDS, k=rng.randint(5, 30))
+        words.append(f"Word{rng.randrange(50000)}")
+        line = " ".join(words).capitalize() + "."
+        lines.append(line)
+        size += len(line) + 1
+    return lines
+
+
+def timed(function, *args, repeat: int = 3) -> tuple:
+    # Best of repeat runs
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(lines: list) -> None:
+    all_tokens = sum(1 for _ in tokenizer.iter_tokens(lines))
+    print(f"{len(lines)} lines, {all_tokens} tokens")
+
+    print(f"over the cap of {tokenizer.MAX_TOKENS} tokens:")
+    for name, function in [("old tokenize", old_tokenize), ("tokenize", tokenizer.tokenize),
+                           ("count_tokens", tokenizer.count_tokens)]:
+        elapsed, _ = timed(function, lines)
+        print(f"  {name:>28}: {elapsed * 1e3:9.2f} ms")
+
+    print("under the cap:")
+    cap = all_tokens + 1
+    elapsed, old_tokens = timed(old_tokenize, lines, cap)
+    print(f"  {'old tokenize':>28}: {elapsed * 1e3:9.2f} ms")
+    elapsed, tokens = timed(tokenizer.tokenize, lines, cap)
+    print(f"  {'tokenize':>28}: {elapsed * 1e3:9.2f} ms")
+    assert tokens == old_tokens
+    elapsed, old_counts = timed(old_compute_word_frequencies, tokens)
+    print(f"  {'old compute_word_frequencies':>28}: {elapsed * 1e3:9.2f} ms")
+    elapsed, counts = timed(tokenizer.compute_word_frequencies, tokens)
+    print(f"  {'compute_word_frequencies':>28}: {elapsed * 1e3:9.2f} ms")
+    assert counts == old_counts
+    elapsed, (counts, _) = timed(tokenizer.count_tokens, lines, cap)
+    print(f"  {'count_tokens (no list)':>28}: {elapsed * 1e3:9.2f} ms")
+    assert counts == old_counts
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--megabytes", type=float, default=5)
+    args = arg_parser.parse_args()
+    lines = make_lines(args.megabytes, random.Random(0))
+    print(f"{args.megabytes} MiB page")
+    run(lines)
+    run([" ".join(lines)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+    Benchmark for crawler trap detection over a simulated stream of outlinks: memory and
+    links let through by the old Parser.URL_counter and by the TrapDetector. Part of the
+    links come from a calendar and from endless pagination, as on real event pages.
+
+    Run from the project root:
+        python -m benchmarks.bench_trap_detector
+        python -m benchmarks.bench_trap_detector --links 5000000
+"""
+import random
+import time
+import tracemalloc
+from argparse import ArgumentParser
+
+from trap_detector import TrapDetector
+
+
+class OldUrlCounter:
+    # Parser.filter_repeated_links before the TrapDetector
+    def __init__(self):
+        self.URL_counter = {}
+
+    def allow(self, link):
+        if str(link) not in self.URL_counter:
+            self.URL_counter[str(link)] = 1
+        else:
+            self.URL_counter[str(link)] += 1
+        return self.URL_counter[str(link)] < 3
+
+
+def make_link(i: int, rng: random.Random) -> tuple:
+    # (link, is a trap link)
+    kind = rng.random()
+    if kind < 0.2:
+        day = i // 7
+        return f"https://www.ics.uci.edu/events/{2000 + day // 365}-{1 + day // 31 % 12:02d}-{1 + day % 28:02d}", True
+    if kind < 0.3:
+        return f"https://www.stat.uci.edu/news/page/{i}", True
+    # Real pages, linked again and again from navigation and other pages
+    return f"https://www.ics.uci.edu/~faculty{rng.randrange(2000)}/page{int(rng.paretovariate(1.2)) % 500}", False
+
+
+def run(detector, links: list) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    through = trap_through = 0
+    for link, trap in links:
+        if detector.allow(link):
+            through += 1
+            trap_through += trap
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed, memory, through, trap_through
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--links", type=int, default=1_000_000)
+    args = arg_parser.parse_args()
+    rng = random.Random(0)
+    links = [make_link(i, rng) for i in range(args.links)]
+
+    print(f"{args.links} outlinks, {sum(trap for _, trap in links)} from traps")
+    for name, detector in [("old URL_counter", OldUrlCounter()), ("TrapDetector", TrapDetector())]:
+        elapsed, memory, through, trap_through = run(detector, links)
+        print(f"{name:>16}: {elapsed / len(links) * 1e6:5.2f} us/link, {memory / 2 ** 20:7.1f} MiB, "
+              f"{through} links kept, {trap_through} of them trap links")
+
+
+if __name__ == "__main__":
+    main()
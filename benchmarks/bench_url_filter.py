@@ -0,0 +1,71 @@
+"""
+    Benchmark for the cost per url of scraper.is_valid before and after the UrlFilter.
+
+    Run from the project root:
+        python -m benchmarks.bench_url_filter
+        python -m benchmarks.bench_url_filter --urls 5000000
+"""
+import random
+import re
+import time
+from argparse import ArgumentParser
+from urllib.parse import urlparse
+
+from scraper import ALLOWED_DOMAINS, URL_FILTER
+
+
+def old_is_valid(url):
+    # scraper.is_valid before the UrlFilter
+    parsed = urlparse(url)
+    domain_matches = any(domain for domain in ALLOWED_DOMAINS if parsed.netloc.endswith(domain))
+    if not domain_matches:
+        return False
+    if parsed.scheme not in set(["http", "https"]):
+        return False
+    return not re.match(
+        r".*\.(css|js|bmp|gif|jpe?g|ico"
+        + r"|png|tiff?|mid|mp2|mp3|mp4"
+        + r"|txt|ppsx|nb|r|img|war|json|pps"
+        + r"|wav|avi|mov|mpeg|ram|m4v|mkv|ogg|ogv|pdf"
+        + r"|ps|eps|tex|ppt|pptx|doc|docx|xls|xlsx|names"
+        + r"|data|dat|exe|bz2|tar|msi|bin|7z|psd|dmg|iso"
+        + r"|epub|dll|cnf|tgz|sha1"
+        + r"|thmx|mso|arff|rtf|jar|csv"
+        + r"|rm|smil|wmv|swf|wma|zip|rar|gz)$", parsed.path.lower())
+
+
+def make_urls(count: int, rng: random.Random) -> list:
+    # Links as pages have them: mostly a few hosts, some off-site, some files
+    hosts = ["www.ics.uci.edu", "vision.ics.uci.edu", "www.informatics.uci.edu", "www.stat.uci.edu",
+             "cs.uci.edu", "www.youtube.com", "github.com", "evilics.uci.edu"]
+    endings = ["", "/", ".html", ".php", ".pdf", ".jpg", ".txt", "/index"]
+    return [f"https://{rng.choice(hosts)}/~user{rng.randrange(500)}/page{i}{rng.choice(endings)}"
+            for i in range(count)]
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument("--urls", type=int, default=1_000_000)
+    args = arg_parser.parse_args()
+    urls = make_urls(args.urls, random.Random(0))
+
+    start = time.perf_counter()
+    old = [url for url in urls if old_is_valid(url)]
+    old_time = time.perf_counter() - start
+    start = time.perf_counter()
+    single = [url for url in urls if URL_FILTER.is_valid(url)]
+    single_time = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = URL_FILTER.filter_many(urls)
+    batch_time = time.perf_counter() - start
+
+    print(f"{len(urls)} urls, {len(batch)} valid ({len(old)} with the old is_valid, "
+          f"which accepts evilics.uci.edu)")
+    for name, elapsed in [("old is_valid", old_time), ("UrlFilter.is_valid", single_time),
+                          ("UrlFilter.filter_many", batch_time)]:
+        print(f"{name:>22}: {elapsed / len(urls) * 1e9:7.0f} ns/url, {len(urls) / elapsed / 1e6:5.2f} M urls/s")
+    assert single == batch
+
+
+if __name__ == "__main__":
+    main()
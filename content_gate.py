@@ -0,0 +1,142 @@
+from collections import Counter
+from threading import Lock
+
+HTML_TYPES = frozenset(["text/html", "application/xhtml+xml"])
+SNIFF_SIZE = 1024  # bytes at the start of a body that are looked at for binary content
+# Magic numbers of the binary formats the crawler runs into under html looking urls
+BINARY_SIGNATURES = (
+    b"%PDF-", b"PK\x03\x04", b"\x89PNG", b"GIF87a", b"GIF89a", b"\xff\xd8\xff", b"\x1f\x8b",
+    b"BZh", b"7z\xbc\xaf", b"Rar!", b"\xd0\xcf\x11\xe0", b"ID3", b"OggS", b"RIFF", b"%!PS",
+    b"\x00\x00\x01\xba", b"\x7fELF",
+)
+
+# Why a body was not parsed, or not parsed in full
+EMPTY = "empty"
+NOT_HTML = "not html"
+BINARY = "binary content"
+TOO_LARGE = "too large"
+TRUNCATED = "truncated"
+
+
+def _header(headers, name: str) -> str:
+    # requests' headers are case insensitive, a plain dict (e.g. in tests) may not be
+    value = headers.get(name)
+    if value is None:
+        value = headers.get(name.lower())
+    return value
+
+
+def sniff_binary(content: bytes) -> bool:
+    """
+        Returns True if the start of the body is a known binary format, or has a NUL byte
+        (which text pages do not).
+    """
+    start = content[:SNIFF_SIZE]
+    return start.startswith(BINARY_SIGNATURES) or b"\x00" in start
+
+
+class ContentGate:
+    """
+        Looks at a downloaded page before any of it is parsed: bodies that are empty, whose
+        Content-Type is not html, or that look binary are rejected, and bodies over max_size
+        bytes (by Content-Length, or by their length if it is missing) are cut to max_size
+        bytes, or rejected if truncate is False.
+
+        Counts the pages and bytes each reason kept from the parser, and the time parsing
+        took for the pages that got through, to estimate the parsing time saved.
+    """
+
+    def __init__(self, max_size: int = 2_000_000, truncate: bool = True, content_types=HTML_TYPES) -> None:
+        self.max_size = max_size
+        self.truncate = truncate
+        self.content_types = frozenset(content_types)
+        self.lock = Lock()
+        self.pages = Counter()  # {reason: pages}
+        self.bytes = Counter()  # {reason: bytes not parsed}
+        self.parsed_pages = 0
+        self.parsed_bytes = 0
+        self.parse_seconds = 0.0
+
+
+    def check(self, raw_response) -> bytes:
+        """
+            Returns the part of the response's body to parse, or None if it should not be
+            parsed at all.
+        """
+        content = raw_response.content
+        if not content:
+            return self._reject(EMPTY, 0)
+        headers = getattr(raw_response, "headers", None) or {}
+        content_type = _header(headers, "Content-Type")
+        if content_type:
+            media_type = content_type.split(";", 1)[0].strip().lower()
+            if media_type not in self.content_types:
+                return self._reject(NOT_HTML, len(content))
+        if sniff_binary(content):
+            return self._reject(BINARY, len(content))
+        try:
+            declared_size = int(_header(headers, "Content-Length") or 0)
+        except ValueError:  # malformed header
+            declared_size = 0
+        if not self.truncate and max(declared_size, len(content)) > self.max_size:
+            return self._reject(TOO_LARGE, len(content))
+        if len(content) > self.max_size:
+            self._count(TRUNCATED, len(content) - self.max_size)
+            return content[:self.max_size]
+        return content
+
+
+    def _count(self, reason: str, size: int) -> None:
+        with self.lock:
+            self.pages[reason] += 1
+            self.bytes[reason] += size
+
+
+    def _reject(self, reason: str, size: int) -> None:
+        self._count(reason, size)
+        return None
+
+
+    def record_parse(self, size: int, seconds: float) -> None:
+        """
+            Counts a page of size bytes that the gate let through and took seconds to parse.
+        """
+        with self.lock:
+            self.parsed_pages += 1
+            self.parsed_bytes += size
+            self.parse_seconds += seconds
+
+
+    def totals(self) -> tuple:
+        """
+            Returns the gate's counts, for add_totals() of another gate (e.g. in another process).
+        """
+        with self.lock:
+            return (Counter(self.pages), Counter(self.bytes), self.parsed_pages, self.parsed_bytes,
+                    self.parse_seconds)
+
+
+    def add_totals(self, totals: tuple) -> None:
+        """
+            Adds the counts of another gate, from its totals().
+        """
+        pages, size, parsed_pages, parsed_bytes, parse_seconds = totals
+        with self.lock:
+            self.pages.update(pages)
+            self.bytes.update(size)
+            self.parsed_pages += parsed_pages
+            self.parsed_bytes += parsed_bytes
+            self.parse_seconds += parse_seconds
+
+
+    def report(self) -> dict:
+        """
+            Returns {reason: (pages, bytes, estimated parsing seconds saved)}. A rejected
+            page is taken to save the mean parsing time of the pages that were parsed (per
+            page rather than per byte, as parsing stops at the token cap). Truncated pages
+            are still parsed, so no time is counted for them.
+        """
+        with self.lock:
+            seconds_per_page = self.parse_seconds / self.parsed_pages if self.parsed_pages else 0.0
+            return {reason: (pages, self.bytes[reason], 0.0 if reason == TRUNCATED else pages * seconds_per_page)
+                    for reason, pages in self.pages.items()}
@@ -0,0 +1,124 @@
+import heapq
+from array import array
+from collections import Counter
+from hashlib import blake2b
+
+
+def load_stopwords(path: str) -> set:
+    """
+        Returns the set of stopwords in the given file, one word per line.
+    """
+    with open(path, "r") as stopwords_file:
+        return set(word.strip() for word in stopwords_file.readlines())
+
+
+def _frequency_order(item: tuple) -> tuple:
+    # Highest frequencies first, ties handled alphabetically (same order as tokenizer.print_frequencies)
+    return -item[1], item[0]
+
+
+class WordFrequencies:
+    """
+        Running word frequency count over every crawled page, updated one page at a time.
+        Stopwords are dropped when a page is added, so they never take up memory.
+    """
+
+    def __init__(self, stopwords: set = frozenset()) -> None:
+        self.stopwords = stopwords
+        self.counts = Counter()
+        self.total_words = 0
+
+
+    def add(self, tokens: list) -> dict:
+        """
+            Adds the tokens of one page to the running count.
+            Returns the page's word counts without stopwords.
+        """
+        return self.add_page(Counter(tokens))
+
+
+    def add_page(self, token_counts: dict) -> dict:
+        """
+            Adds the token counts of one page to the running count.
+            Returns the page's word counts without stopwords.
+        """
+        page_counts = Counter(token_counts)
+        for stopword in self.stopwords.intersection(page_counts):
+            del page_counts[stopword]
+        self.add_counts(page_counts)
+        return page_counts
+
+
+    def add_counts(self, page_counts: dict) -> None:
+        """
+            Adds already counted (and stopword filtered) words to the running count.
+        """
+        self.counts.update(page_counts)
+        self.total_words += sum(page_counts.values())
+
+
+    def top(self, n: int = None) -> dict:
+        """
+            Returns the n most frequent words with their frequencies, or every word if n is None.
+        """
+        if n is None:
+            return dict(sorted(self.counts.items(), key=_frequency_order))
+        return dict(heapq.nsmallest(n, self.counts.items(), key=_frequency_order))
+
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+class SketchWordFrequencies(WordFrequencies):
+    """
+        Approximate word frequencies in fixed memory: a Count-Min sketch estimates every word's
+        count, and only the top_k words with the highest estimates are kept by name.
+        Estimates can only be too high, never too low, by at most about total_words * e / width.
+    """
+
+    def __init__(self, stopwords: set = frozenset(), width: int = 1 << 20, depth: int = 4,
+                 top_k: int = 1000) -> None:
+        super().__init__(stopwords)
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.rows = [array("Q", bytes(8 * width)) for _ in range(depth)]
+        self.counts = {}  # the current top_k candidates and their estimates
+        self._heap = []  # (estimate, word) for the candidates; entries go stale as estimates grow
+
+
+    def _columns(self, word: str) -> list:
+        digest = blake2b(word.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + row * second) % self.width for row in range(self.depth)]
+
+
+    def add_counts(self, page_counts: dict) -> None:
+        for word, count in page_counts.items():
+            estimate = None
+            for row, column in zip(self.rows, self._columns(word)):
+                row[column] += count
+                if estimate is None or row[column] < estimate:
+                    estimate = row[column]
+            self.total_words += count
+            self._offer(word, estimate)
+
+
+    def _offer(self, word: str, estimate: int) -> None:
+        if word in self.counts or len(self.counts) < self.top_k:
+            self.counts[word] = estimate
+            heapq.heappush(self._heap, (estimate, word))
+        else:
+            # Drop stale heap entries until the top is the real smallest candidate
+            while self._heap and self.counts.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            if estimate > self._heap[0][0]:
+                _, evicted = heapq.heapreplace(self._heap, (estimate, word))
+                del self.counts[evicted]
+                self.counts[word] = estimate
+        # Updated candidates leave stale entries behind, so the heap is rebuilt from time to time
+        if len(self._heap) > 4 * self.top_k:
+            self._heap = [(count, candidate) for candidate, count in self.counts.items()]
+            heapq.heapify(self._heap)
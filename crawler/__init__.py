@@ -1,4 +1,5 @@
 from utils import get_logger
+from utils.download import get_downloader
 from crawler.frontier import Frontier
 from crawler.worker import Worker
 
@@ -24,3 +25,6 @@ class Crawler(object):
     def join(self):
         for worker in self.workers:
             worker.join()
+        self.frontier.close()
+        get_downloader(self.config).flush()
+        self.logger.info(f"Download stats: {get_downloader(self.config).stats.snapshot()}")
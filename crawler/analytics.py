@@ -0,0 +1,150 @@
+import os
+import sqlite3
+
+from collections import Counter
+from threading import RLock
+
+from utils import get_logger
+
+_SIGN_BIT = 1 << 63
+
+
+def _to_signed(fingerprint):
+    # SQLite integers are signed 64-bit, fingerprints are unsigned
+    return fingerprint - (1 << 64) if fingerprint & _SIGN_BIT else fingerprint
+
+
+def _to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+class AnalyticsStore(object):
+    ''' Keeps the crawl report state of Parser in a SQLite file so a resumed crawl
+    continues its statistics instead of starting them over.
+
+    Changes are buffered in memory and written in one transaction by flush(), which
+    the frontier calls just before it writes its save file (SAVEBATCH / SAVEINTERVAL),
+    so the two are saved in the same step. The database runs in WAL mode with
+    synchronous=NORMAL, so a commit does not wait for an fsync; a crash loses at most
+    the changes since the last flush. '''
+
+    def __init__(self, config, restart):
+        self.logger = get_logger("ANALYTICS")
+        self.path = config.analytics_file
+        self.lock = RLock()
+
+        if os.path.exists(self.path) and restart:
+            self.logger.info(f"Found analytics file {self.path}, deleting it.")
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS subdomains (domain TEXT PRIMARY KEY, count INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS fingerprints (fingerprint INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS words (word TEXT PRIMARY KEY, count INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS trap_patterns (
+                pattern TEXT PRIMARY KEY, count INTEGER NOT NULL, throttled INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+        ''')
+        self.parser_class = None
+        self._reset_buffers()
+
+    def _reset_buffers(self):
+        self.pages = []
+        self.subdomains = Counter()
+        self.fingerprints = []
+        self.words = Counter()
+
+    def load(self, parser_class):
+        ''' Restores the statistics saved by a previous run into the Parser class, and
+        attaches this store to it so new statistics are recorded here. '''
+        # The Parser lock is always taken before this store's, as record_page does
+        with parser_class.lock, self.lock:
+            cursor = self.db.cursor()
+            parser_class.unique_pages.update(url for url, in cursor.execute("SELECT url FROM pages"))
+            for domain, count in cursor.execute("SELECT domain, count FROM subdomains"):
+                parser_class.subdomains[domain] = parser_class.subdomains.get(domain, 0) + count
+            for value, in cursor.execute("SELECT fingerprint FROM fingerprints"):
+                parser_class.fingerprints.add(_to_unsigned(value))
+            rows = cursor.execute("SELECT word, count FROM words")
+            while True:
+                batch = rows.fetchmany(10000)
+                if not batch:
+                    break
+                parser_class.word_frequencies.add_counts(dict(batch))
+            # Rows are replaced when a pattern changes, so rowid order is the order the
+            # detector last counted them in
+            for pattern, count, throttled in cursor.execute(
+                    "SELECT pattern, count, throttled FROM trap_patterns ORDER BY rowid"):
+                parser_class.traps.restore(pattern, count, throttled)
+            parser_class.traps.take_changes()  # starts tracking changes to save
+            meta = dict(cursor.execute("SELECT key, value FROM meta"))
+            parser_class.pages_parsed += int(meta.get("pages_parsed", 0))
+            if int(meta.get("longest_page_words", 0)) > parser_class.longest_page[1]:
+                parser_class.longest_page = (meta["longest_page_url"], int(meta["longest_page_words"]))
+            self.parser_class = parser_class
+            parser_class.analytics = self
+        self.logger.info(
+            f"Loaded statistics for {len(parser_class.unique_pages)} unique pages "
+            f"from {self.path}.")
+
+    def add_page(self, url):
+        with self.lock:
+            self.pages.append((url,))
+
+    def add_subdomain(self, domain):
+        with self.lock:
+            self.subdomains[domain] += 1
+
+    def add_fingerprint(self, fingerprint):
+        with self.lock:
+            self.fingerprints.append((_to_signed(fingerprint),))
+
+    def add_words(self, page_counts):
+        with self.lock:
+            self.words.update(page_counts)
+
+    def flush(self):
+        parser_class = self.parser_class
+        if parser_class is None:
+            return
+        # The Parser lock keeps workers from changing the trap detector while its changes
+        # are taken, and is taken before this store's lock, as record_page does
+        with parser_class.lock, self.lock:
+            with self.db:
+                self.db.executemany("INSERT OR IGNORE INTO pages (url) VALUES (?)", self.pages)
+                self.db.executemany(
+                    "INSERT INTO subdomains (domain, count) VALUES (?, ?) "
+                    "ON CONFLICT(domain) DO UPDATE SET count = count + excluded.count",
+                    self.subdomains.items())
+                self.db.executemany(
+                    "INSERT INTO fingerprints (fingerprint) VALUES (?)", self.fingerprints)
+                self.db.executemany(
+                    "INSERT INTO words (word, count) VALUES (?, ?) "
+                    "ON CONFLICT(word) DO UPDATE SET count = count + excluded.count",
+                    self.words.items())
+                # Patterns the trap detector forgot are deleted, so this table only holds
+                # the patterns it still counts
+                changes = parser_class.traps.take_changes()
+                self.db.executemany(
+                    "DELETE FROM trap_patterns WHERE pattern = ?",
+                    [(pattern,) for pattern, count, throttled in changes if not count and not throttled])
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO trap_patterns (pattern, count, throttled) VALUES (?, ?, ?)",
+                    [change for change in changes if change[1] or change[2]])
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                        ("pages_parsed", parser_class.pages_parsed),
+                        ("longest_page_url", parser_class.longest_page[0]),
+                        ("longest_page_words", parser_class.longest_page[1])])
+            self._reset_buffers()
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.db.close()
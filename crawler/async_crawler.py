@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import get_logger, PER_URL
+from utils.download import download_async, get_downloader, NO_RESPONSE
+from crawler.frontier import Frontier
+from crawler.pipeline import make_parse_pool
+import scraper
+
+
+class AsyncCrawler(object):
+    ''' Crawler that downloads with asyncio instead of one thread per worker.
+
+    Up to max_in_flight downloads share one pooled, keep-alive aiohttp session to
+    the cache server. Each page is analyzed by scraper.analyze_page in a pool of
+    PARSEPROCESSES processes, as in the pipeline engine, so parsing neither holds up
+    the event loop nor is limited to one core by the GIL. A single merge thread adds
+    the results to the Parser statistics and does the frontier's writes (new links,
+    completed urls, and the save file and analytics syncs that come with them), so
+    disk writes do not stall the downloads either. The frontier still decides when a
+    host may be downloaded from, so politeness is the same as with the threaded
+    crawler. '''
+
+    def __init__(self, config, restart, frontier_factory=Frontier):
+        self.config = config
+        self.logger = get_logger("CRAWLER")
+        self.frontier = frontier_factory(config, restart)
+        if not getattr(self.frontier, "polite", False):
+            raise ValueError(
+                "The async engine downloads many urls at once and needs a frontier "
+                "that spaces out downloads per host (SCHEDULER = polite).")
+
+    def start(self):
+        self.parse_pool = make_parse_pool(self.config.parse_processes, self.config)
+        self.merge_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Merger")
+        try:
+            asyncio.run(self._crawl())
+        finally:
+            self.parse_pool.shutdown()
+            self.merge_executor.shutdown()
+            self.frontier.close()
+            get_downloader(self.config).flush()
+
+    async def _crawl(self):
+        # Imported here so the threaded crawler does not need aiohttp installed.
+        import aiohttp
+        connector = aiohttp.TCPConnector(limit=self.config.max_in_flight)
+        timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=self.config.connect_timeout,
+            sock_read=self.config.read_timeout)
+        # Set (and replaced) whenever the frontier may have new urls for waiting fetchers
+        self.frontier_changed = asyncio.Event()
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            await asyncio.gather(*[
+                self._fetch_loop(session) for _ in range(self.config.max_in_flight)])
+        self.logger.info("Frontier is empty. Stopping Crawler.")
+        self.logger.info(f"Download stats: {get_downloader(self.config).stats.snapshot()}")
+
+    async def _fetch_loop(self, session):
+        loop = asyncio.get_running_loop()
+        while True:
+            tbd_url, wait = self.frontier.poll_tbd_url()
+            if tbd_url is None:
+                if wait is None:
+                    return
+                await self._wait_for_frontier(wait)
+                continue
+            start = time.monotonic()
+            status = None
+            try:
+                resp = await download_async(tbd_url, self.config, session, self.logger)
+                elapsed = time.monotonic() - start
+                status = resp.status
+                self.frontier.fetched(tbd_url, status, elapsed)
+                self.logger.info(
+                    "Downloaded %s, status <%s>, in %.2fs, using cache %s.",
+                    tbd_url, resp.status, elapsed, self.config.cache_server,
+                    extra=PER_URL)
+                content = scraper.page_content(resp)
+                resp.release()
+                if content is not None:
+                    analysis = await loop.run_in_executor(
+                        self.parse_pool, scraper.analyze_page, tbd_url, content)
+                    await loop.run_in_executor(self.merge_executor, self._merge, analysis)
+            except Exception as e:
+                # One bad url should not stop this fetcher or leave its host in flight.
+                self.logger.error(f"Failed to crawl {tbd_url}: {e!r}")
+                if status is None:
+                    # The download itself failed, so its host backs off as for no reply
+                    self.frontier.fetched(tbd_url, NO_RESPONSE, time.monotonic() - start)
+            await loop.run_in_executor(self.merge_executor, self.frontier.mark_url_complete, tbd_url)
+            self.frontier_changed.set()
+            self.frontier_changed = asyncio.Event()
+
+    def _merge(self, analysis):
+        # Runs in the merge thread, like PipelineCrawler._merge_loop
+        for scraped_url in scraper.scrape_analyzed_page(analysis):
+            self.frontier.add_url(scraped_url)
+
+    async def _wait_for_frontier(self, wait):
+        try:
+            await asyncio.wait_for(self.frontier_changed.wait(), wait)
+        except asyncio.TimeoutError:
+            pass
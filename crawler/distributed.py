@@ -0,0 +1,304 @@
+import copy
+import multiprocessing
+import time
+
+from bisect import bisect_right
+from collections import defaultdict
+from hashlib import blake2b
+from queue import Empty
+from threading import Thread, Lock
+
+from utils import get_logger, configure_logging, normalize
+from utils.metrics import METRICS, MetricsExporter
+from crawler import Crawler
+from crawler.async_crawler import AsyncCrawler
+from crawler.frontier import Frontier, IN_FLIGHT_POLL_INTERVAL
+from crawler.pipeline import PipelineCrawler
+from crawler.sitemaps import ingest_sitemaps, seed_sitemaps
+from crawler.scheduler import get_host
+from parser import Parser
+
+ENGINES = {"threads": Crawler, "async": AsyncCrawler, "pipeline": PipelineCrawler}
+
+# Seconds a partial batch of urls for another shard waits before it is sent anyway
+FORWARD_INTERVAL = 0.2
+# Seconds between the coordinator's checks of whether every shard has run out of urls
+PROBE_INTERVAL = 0.5
+# Seconds the coordinator waits on shards before checking that they are still running
+SHARD_CHECK_INTERVAL = 5
+
+# Messages on a shard's inbox
+URLS = "urls"  # (URLS, [url, ...]) urls this shard owns, found by another shard
+PROBE = "probe"  # (PROBE, wave) asks the shard for its (idle, sent, received)
+STOP = "stop"  # (STOP,) every shard is idle and nothing is in transit
+
+
+def _hash(text):
+    return int.from_bytes(blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing(object):
+    ''' Consistent hashing of hosts onto shards. Each shard owns replicas points on a
+    ring of 64 bit hashes, and a host belongs to the shard of the first point after the
+    host's hash. Hosts are spread evenly, and going from N to N + 1 shards only moves
+    about 1 / (N + 1) of them. '''
+
+    def __init__(self, shards, replicas=100):
+        points = sorted(
+            (_hash(f"shard{shard}-{replica}"), shard)
+            for shard in range(shards) for replica in range(replicas))
+        self.hashes = [point for point, _ in points]
+        self.shards = [shard for _, shard in points]
+
+    def shard_of_host(self, host):
+        return self.shards[bisect_right(self.hashes, _hash(host)) % len(self.hashes)]
+
+    def shard_of(self, url):
+        return self.shard_of_host(get_host(url))
+
+
+class ShardOutbox(object):
+    ''' Urls this shard found that other shards own, sent to their inboxes in batches
+    of batch_size (or earlier by flush()). Counts the batches sent. '''
+
+    def __init__(self, inboxes, batch_size=100):
+        self.inboxes = inboxes
+        self.batch_size = batch_size
+        self.batches = defaultdict(list)  # shard -> urls waiting to be sent to it
+        self.lock = Lock()
+        self.sent = 0
+
+    def add(self, shard, url):
+        with self.lock:
+            batch = self.batches[shard]
+            batch.append(url)
+            if len(batch) >= self.batch_size:
+                self._send(shard)
+
+    def _send(self, shard):
+        self.inboxes[shard].put((URLS, self.batches.pop(shard)))
+        self.sent += 1
+
+    def flush(self):
+        with self.lock:
+            for shard in list(self.batches):
+                self._send(shard)
+
+    def __len__(self):
+        with self.lock:
+            return sum(len(batch) for batch in self.batches.values())
+
+
+class ShardedFrontier(Frontier):
+    ''' The frontier of one shard: keeps the urls of the hosts the ring gives this shard,
+    with their own save file and politeness, and hands the others to the outbox.
+
+    Running out of urls does not end the crawl, another shard may still forward some:
+    poll_tbd_url keeps workers waiting until stop() is called. '''
+
+    def __init__(self, config, restart, ring, shard_id, outbox):
+        self.ring = ring
+        self.shard_id = shard_id
+        self.outbox = outbox
+        self.stopped = False
+        # Every shard reads all the seed urls and keeps its own, so seeds are not forwarded
+        self.forwarding = False
+        super().__init__(config, restart)
+        self.forwarding = True
+
+    def add_url(self, url):
+        url = normalize(url)
+        shard = self.ring.shard_of(url)
+        if shard == self.shard_id:
+            super().add_url(url)
+        elif self.forwarding:
+            self.outbox.add(shard, url)
+
+    def add_sitemap_url(self, url, lastmod=None):
+        url = normalize(url)
+        shard = self.ring.shard_of(url)
+        if shard == self.shard_id:
+            return super().add_sitemap_url(url, lastmod)
+        # Another shard's url only goes there as a new url, its lastmod is not sent along
+        self.outbox.add(shard, url)
+        return False
+
+    def add_forwarded_urls(self, urls):
+        ''' Adds urls another shard found for this one. '''
+        for url in urls:
+            super().add_url(url)
+
+    def poll_tbd_url(self):
+        url, wait = super().poll_tbd_url()
+        if url is None and wait is None and not self.stopped:
+            return None, IN_FLIGHT_POLL_INTERVAL
+        return url, wait
+
+    def idle(self):
+        ''' True if no url is waiting or being downloaded. '''
+        with self.lock:
+            return not len(self.to_be_downloaded) and not self.in_flight
+
+    def stop(self):
+        ''' Lets the workers finish once the urls left are downloaded (there are none when
+        the coordinator stops the shards). '''
+        with self.url_available:
+            self.stopped = True
+            self.url_available.notify_all()
+
+
+def shard_config(config, shard_id):
+    ''' Returns a copy of config for shard shard_id, with its own save, analytics, record
+    and metrics files (the name with .shard<id> added) and metrics port. '''
+    config = copy.copy(config)
+    config.shard_id = shard_id
+    suffix = f".shard{shard_id}"
+    config.save_file += suffix
+    for name in ("analytics_file", "record_file", "metrics_file"):
+        if getattr(config, name):
+            setattr(config, name, getattr(config, name) + suffix)
+    if config.metrics_port:
+        config.metrics_port += shard_id + 1
+    return config
+
+
+def _serve_inbox(inbox, frontier, outbox, status_queue):
+    # Runs in each shard next to its crawler: adds forwarded urls, answers the
+    # coordinator's probes and sends partial batches every FORWARD_INTERVAL
+    received = 0
+    last_forward = time.monotonic()
+    while True:
+        try:
+            message = inbox.get(timeout=FORWARD_INTERVAL)
+        except Empty:
+            message = None
+        if message is None:
+            pass
+        elif message[0] == URLS:
+            frontier.add_forwarded_urls(message[1])
+            received += 1
+        elif message[0] == PROBE:
+            outbox.flush()
+            status_queue.put((PROBE, frontier.shard_id, message[1], frontier.idle(), outbox.sent, received))
+        elif message[0] == STOP:
+            frontier.stop()
+            return
+        if time.monotonic() - last_forward >= FORWARD_INTERVAL:
+            outbox.flush()
+            last_forward = time.monotonic()
+
+
+def run_shard(config, restart, shard_id, inboxes, status_queue):
+    ''' Crawls the hosts the ring gives shard shard_id with the ENGINE crawler, then
+    sends this process' Parser statistics to the coordinator. '''
+    configure_logging(config)
+    Parser.configure(config)
+    ring = HashRing(config.shards)
+    outbox = ShardOutbox(inboxes, config.forward_batch)
+    frontier_factory = lambda config, restart: ShardedFrontier(config, restart, ring, shard_id, outbox)
+    crawler = ENGINES[config.engine](config, restart, frontier_factory=frontier_factory)
+    if config.sitemaps == "robots":
+        # Each sitemap is read by the shard that owns its host
+        ingest_sitemaps(config, crawler.frontier, [
+            sitemap for sitemap in seed_sitemaps(config.seed_urls) if ring.shard_of(sitemap) == shard_id])
+    inbox = Thread(
+        target=_serve_inbox, args=(inboxes[shard_id], crawler.frontier, outbox, status_queue),
+        daemon=True)
+    inbox.start()
+    exporter = MetricsExporter(
+        snapshot_file=config.metrics_file or None, interval=config.metrics_interval,
+        port=config.metrics_port).start()
+    try:
+        crawler.start()
+    finally:
+        exporter.stop()
+    inbox.join()
+    status_queue.put((STOP, shard_id, Parser.get_statistics()))
+
+
+class DistributedCrawler(object):
+    ''' Crawls with SHARDS crawler processes, each owning the hosts a HashRing gives it.
+
+    Every shard runs the ENGINE crawler with its own frontier, save file and politeness
+    for its hosts. Links to another shard's hosts are forwarded to that shard's inbox in
+    batches of FORWARDBATCH urls. The crawl is over once two probes in a row find every
+    shard idle with the same counts of batches sent and received, and as many batches
+    received as sent. The shards' Parser statistics are then merged into parser_class
+    (this process' Parser) for the report.
+
+    Inboxes are multiprocessing queues, so the shards run on this machine. Changing
+    SHARDS moves hosts between shards, so it needs --restart. '''
+
+    def __init__(self, config, restart, parser_class=Parser):
+        self.config = config
+        self.restart = restart
+        self.parser_class = parser_class
+        self.logger = get_logger("CRAWLER")
+        self.shard_states = dict()  # shard -> (idle, sent, received) at the last probe
+        METRICS.gauge("shards", self._shards_gauge)
+
+    def _shards_gauge(self):
+        return {shard: dict(zip(("idle", "sent", "received"), state))
+                for shard, state in sorted(self.shard_states.items())}
+
+    def start(self):
+        context = multiprocessing.get_context("spawn")
+        shards = self.config.shards
+        inboxes = [context.Queue() for _ in range(shards)]
+        self.status_queue = context.Queue()
+        self.processes = [
+            context.Process(
+                target=run_shard, name=f"Shard-{shard_id}",
+                args=(shard_config(self.config, shard_id), self.restart, shard_id, inboxes, self.status_queue))
+            for shard_id in range(shards)]
+        for process in self.processes:
+            process.start()
+        self.logger.info(f"Started {shards} shards.")
+        try:
+            self._wait_until_idle(inboxes)
+            for inbox in inboxes:
+                inbox.put((STOP,))
+            for _ in range(shards):
+                _, shard_id, statistics = self._next_status(STOP)
+                self.parser_class.merge_statistics(statistics)
+            for process in self.processes:
+                process.join()
+        finally:
+            for process in self.processes:
+                if process.is_alive():
+                    process.terminate()
+        self.logger.info(f"All {shards} shards finished.")
+
+    def _next_status(self, kind):
+        # Next status message of that kind, failing if a shard died instead of sending it
+        while True:
+            try:
+                message = self.status_queue.get(timeout=SHARD_CHECK_INTERVAL)
+            except Empty:
+                for process in self.processes:
+                    if process.exitcode:
+                        raise RuntimeError(f"{process.name} exited with code {process.exitcode}")
+                continue
+            if message[0] == kind:
+                return message
+
+    def _wait_until_idle(self, inboxes):
+        previous = None
+        wave = 0
+        while True:
+            time.sleep(PROBE_INTERVAL)
+            wave += 1
+            for inbox in inboxes:
+                inbox.put((PROBE, wave))
+            states = dict()
+            while len(states) < len(inboxes):
+                _, shard_id, reply_wave, idle, sent, received = self._next_status(PROBE)
+                if reply_wave == wave:
+                    states[shard_id] = (idle, sent, received)
+            self.shard_states = states
+            counts = sorted(states.items())
+            if (all(idle for idle, _, _ in states.values())
+                    and sum(sent for _, sent, _ in states.values()) == sum(received for _, _, received in states.values())
+                    and counts == previous):
+                return
+            previous = counts
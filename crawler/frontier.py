@@ -1,30 +1,82 @@
 import os
 import shelve
+import time
 
-from threading import Thread, RLock
+from collections import Counter
+from threading import Thread, RLock, Condition
 from queue import Queue, Empty
 
 from utils import get_logger, get_urlhash, normalize
-from scraper import is_valid
+from utils.metrics import METRICS
+from scraper import URL_FILTER
+from parser import Parser
+from crawler.analytics import AnalyticsStore
+from crawler.storage import WriteBehindShelf
+from crawler.frontier_store import SqliteFrontierStore, StoredUrlSet
+from crawler.rate_control import HostRateControl
+from crawler.scheduler import SCHEDULERS, get_host
+from crawler.seen import UrlDigestSet
+
+SAVE_FILE_SUFFIXES = ("", ".db", ".dat", ".dir", ".bak", "-wal", "-shm")
+
+# Seconds to wait before checking again when the queue is empty but downloads are in flight
+IN_FLIGHT_POLL_INTERVAL = 0.5
+# Hosts with the most waiting urls that the frontier metrics list
+METRICS_TOP_HOSTS = 20
 
 class Frontier(object):
     def __init__(self, config, restart):
         self.logger = get_logger("FRONTIER")
         self.config = config
-        self.to_be_downloaded = list()
-        
-        if not os.path.exists(self.config.save_file) and not restart:
+        self.to_be_downloaded = SCHEDULERS[self.config.scheduler](self.config.time_delay)
+        # True if get_tbd_url already waits out the politeness delay per host.
+        self.polite = self.to_be_downloaded.polite
+        # Delay per host, adapted to how each host answers
+        self.rate = HostRateControl(self.config)
+        self.fetch_started = dict()  # url -> start of its download, until it is completed
+        self.lock = RLock()
+        self.url_available = Condition(self.lock)
+        self.in_flight = 0
+        # Every url in the save file, so add_url can skip known urls without reading it
+        self.seen = UrlDigestSet()
+        METRICS.gauge("frontier", self.depth)
+        METRICS.gauge("host delays", self.rate.snapshot)
+
+        # Depending on the dbm backend, shelve may store the save file under
+        # several names (e.g. .dat/.dir/.bak).
+        save_files = [
+            self.config.save_file + suffix for suffix in SAVE_FILE_SUFFIXES
+            if os.path.exists(self.config.save_file + suffix)]
+        if not save_files and not restart:
             # Save file does not exist, but request to load save.
             self.logger.info(
                 f"Did not find save file {self.config.save_file}, "
                 f"starting from seed.")
-        elif os.path.exists(self.config.save_file) and restart:
+        elif save_files and restart:
             # Save file does exists, but request to start from seed.
             self.logger.info(
                 f"Found save file {self.config.save_file}, deleting it.")
-            os.remove(self.config.save_file)
+            for save_file in save_files:
+                os.remove(save_file)
         # Load existing save file, or create one if it does not exist.
-        self.save = shelve.open(self.config.save_file)
+        self.save = self._open_save_file()
+        if isinstance(self.save, SqliteFrontierStore):
+            # Urls of earlier runs are looked up in the save file instead of read at startup
+            self.seen = StoredUrlSet(self.save)
+        # Crawl statistics are saved next to the frontier and resume with it. They are
+        # written just before each write of the save file, so after a crash the saved
+        # statistics cover every url the save file has completed: a url downloaded again
+        # is then in Parser.unique_pages and not counted twice.
+        self.analytics = None
+        self.flush_analytics_on_complete = False
+        if self.config.analytics_file:
+            self.analytics = AnalyticsStore(self.config, restart)
+            self.analytics.load(Parser)
+            if isinstance(self.save, (WriteBehindShelf, SqliteFrontierStore)):
+                self.save.before_flush = self.analytics.flush
+            else:
+                # A plain shelve writes every change, completed urls are the ones that count
+                self.flush_analytics_on_complete = True
         if restart:
             for url in self.config.seed_urls:
                 self.add_url(url)
@@ -35,38 +87,178 @@ class Frontier(object):
                 for url in self.config.seed_urls:
                     self.add_url(url)
 
+    def _open_save_file(self):
+        ''' This function can be overridden for alternate saving techniques. '''
+        if self.config.save_format == "sqlite":
+            return SqliteFrontierStore(
+                self.config.save_file, self.config.save_batch, self.config.save_interval)
+        if self.config.save_batch > 1:
+            # Writes are batched, sync() only flushes once the batch or interval is used up.
+            return WriteBehindShelf(
+                self.config.save_file, self.config.save_batch,
+                self.config.save_interval)
+        return shelve.open(self.config.save_file)
+
     def _parse_save_file(self):
         ''' This function can be overridden for alternate saving techniques. '''
+        if isinstance(self.save, SqliteFrontierStore):
+            return self._load_pending_urls()
         total_count = len(self.save)
         tbd_count = 0
-        for url, completed in self.save.values():
-            if not completed and is_valid(url):
-                self.to_be_downloaded.append(url)
-                tbd_count += 1
+        pending = dict()  # url -> links found to it
+        downloaded = Counter()  # host -> pages downloaded
+        counts_downloads = self.to_be_downloaded.counts_downloads
+        for entry in self.save.values():
+            # (url, completed), (url, False, links found) once the scheduler saved that,
+            # or (url, True, links found, time downloaded)
+            url, completed = entry[:2]
+            # Saves from before normalize() canonicalized urls may hold other spellings
+            self.seen.add(normalize(url))
+            self.seen.add(url)
+            if not completed:
+                pending[url] = entry[2] if len(entry) > 2 else 1
+            elif counts_downloads:
+                downloaded[get_host(url)] += 1
+        for host, pages in downloaded.items():
+            self.to_be_downloaded.restore_downloaded(host, pages)
+        for url in URL_FILTER.filter_many(pending):
+            self.to_be_downloaded.push(url, pending[url])
+            tbd_count += 1
         self.logger.info(
             f"Found {tbd_count} urls to be downloaded from {total_count} "
             f"total urls discovered.")
 
+    def _load_pending_urls(self):
+        # Resumes from a SqliteFrontierStore, reading only the urls not downloaded yet
+        tbd_count = 0
+        for host, pages in self.save.downloaded_by_host().items():
+            self.to_be_downloaded.restore_downloaded(host, pages)
+        pending = dict(self.save.pending_urls())  # url -> links found to it
+        for url in URL_FILTER.filter_many(pending):
+            self.to_be_downloaded.push(url, pending[url])
+            tbd_count += 1
+        self.logger.info(
+            f"Found {tbd_count} urls to be downloaded from {len(self.save)} "
+            f"total urls discovered.")
+
     def get_tbd_url(self):
-        try:
-            return self.to_be_downloaded.pop()
-        except IndexError:
-            return None
+        ''' Waits until a url can be downloaded politely and returns it. Returns None
+        once nothing is left and no other worker can add more urls. '''
+        with self.url_available:
+            while True:
+                url, wait = self.poll_tbd_url()
+                if url is not None or wait is None:
+                    return url
+                self.url_available.wait(wait)
+
+    def poll_tbd_url(self):
+        ''' get_tbd_url without waiting. Returns (url, None) for a url that can be
+        downloaded now, (None, seconds) if a url may be ready after that many seconds,
+        or (None, None) once nothing is left and no download is in flight. '''
+        with self.url_available:
+            url, wait = self.to_be_downloaded.pop(time.monotonic())
+            if url is not None:
+                self.in_flight += 1
+                return url, None
+            if wait is None and self.in_flight:
+                # Nothing queued, but a download in flight may still add urls.
+                return None, IN_FLIGHT_POLL_INTERVAL
+            return None, wait
+
+    def depth(self):
+        ''' Urls waiting and in flight, and the hosts with the most waiting urls. '''
+        with self.lock:
+            by_host = self.to_be_downloaded.depth_by_host()
+            return {
+                "waiting": len(self.to_be_downloaded), "in_flight": self.in_flight,
+                "seen": len(self.seen), "hosts": len(by_host),
+                "top_hosts": dict(by_host.most_common(METRICS_TOP_HOSTS))}
+
+    def _sync(self):
+        with METRICS.time("frontier sync"):
+            self.save.sync()
 
     def add_url(self, url):
+        start = time.perf_counter()
+        url = normalize(url)
+        with self.url_available:
+            if self.seen.add(url):
+                self.save[get_urlhash(url)] = (url, False)
+                self._sync()
+                self.to_be_downloaded.push(url)
+                self.url_available.notify()
+            else:
+                inlinks = self.to_be_downloaded.add_inlink(url)
+                if inlinks is not None:
+                    # Saved so the url keeps its priority after a restart
+                    self.save[get_urlhash(url)] = (url, False, inlinks)
+                    self._sync()
+        METRICS.observe("frontier add", time.perf_counter() - start)
+
+    def add_sitemap_url(self, url, lastmod=None):
+        ''' Adds a url listed in a sitemap, with its lastmod in seconds since the epoch.
+        A url downloaded before is queued again if its lastmod is later than the time
+        it was downloaded. Returns True if the url was queued. '''
         url = normalize(url)
+        inlinks = 1
+        with self.url_available:
+            if self.seen.add(url):
+                self.save[get_urlhash(url)] = (url, False)
+            else:
+                entry = self._saved_entry(url)
+                # Urls saved before download times were kept are left alone
+                if lastmod is None or entry is None or not entry[1] or len(entry) < 4 or entry[3] >= lastmod:
+                    return False
+                inlinks = entry[2]
+                self.save[get_urlhash(url)] = (url, False, inlinks)
+                METRICS.count("sitemap recrawls")
+            self._sync()
+            # A recrawl keeps the priority the links found to the url give it
+            self.to_be_downloaded.push(url, inlinks)
+            self.url_available.notify()
+            return True
+
+    def _saved_entry(self, url):
+        # The save file's entry for url, or None
+        if isinstance(self.save, SqliteFrontierStore):
+            return self.save.entry(url)
         urlhash = get_urlhash(url)
-        if urlhash not in self.save:
-            self.save[urlhash] = (url, False)
-            self.save.sync()
-            self.to_be_downloaded.append(url)
+        return self.save[urlhash] if urlhash in self.save else None
     
+    def fetched(self, url, status, seconds):
+        ''' Records that downloading url took seconds and got status, so its host's
+        delay can adapt, and is counted from the start of the download. '''
+        self.rate.observe(url, status, seconds)
+        with self.lock:
+            self.fetch_started[url] = time.monotonic() - seconds
+
+    def host_delay(self, url):
+        ''' Seconds to leave between the starts of two downloads from url's host. '''
+        return self.rate.delay(url)
+
     def mark_url_complete(self, url):
         urlhash = get_urlhash(url)
-        if urlhash not in self.save:
-            # This should not happen.
-            self.logger.error(
-                f"Completed url {url}, but have not seen it before.")
+        with self.url_available:
+            if url not in self.seen:
+                # This should not happen.
+                self.logger.error(
+                    f"Completed url {url}, but have not seen it before.")
+
+            now = time.monotonic()
+            # Time since the download started already counts towards the delay
+            started = self.fetch_started.pop(url, now)
+            inlinks = self.to_be_downloaded.done(url, now, max(self.rate.delay(url) - (now - started), 0.0))
+            # Keeps the links found to the url, and its download time decides if a later
+            # sitemap lastmod means a recrawl
+            self.save[urlhash] = (url, True, inlinks, time.time())
+            if self.flush_analytics_on_complete:
+                self.analytics.flush()
+            self._sync()
+            self.in_flight = max(self.in_flight - 1, 0)
+            self.url_available.notify_all()
 
-        self.save[urlhash] = (url, True)
-        self.save.sync()
+    def close(self):
+        # The save file's last write flushes the statistics first
+        self.save.close()
+        if self.analytics:
+            self.analytics.close()
@@ -0,0 +1,179 @@
+import sqlite3
+import time
+
+from collections import Counter
+from threading import RLock
+
+from crawler.scheduler import get_host
+from crawler.seen import UrlDigestSet, url_digest
+
+_SIGN_BIT = 1 << 63
+
+
+def _signed_digest(url):
+    # SQLite integers are signed 64-bit, url digests are unsigned
+    digest = url_digest(url)
+    return digest - (1 << 64) if digest & _SIGN_BIT else digest
+
+
+class SqliteFrontierStore(object):
+    ''' The frontier's save file as a SQLite table (SAVEFORMAT = sqlite), so resuming a
+    crawl only reads the urls that are still to be downloaded.
+
+    Each url is one row keyed by its 64-bit digest (the table's rowid), and a partial
+    index holds only the urls not completed yet, with their link counts. Resuming reads
+    that index, which is as big as the pending urls rather than every url ever found.
+    Pages downloaded per host are kept in their own small table.
+
+    It takes the same writes as the shelve, save[urlhash] = (url, completed[, links[, fetched]]),
+    keyed by the url's digest instead of urlhash. Writes are batched like
+    WriteBehindShelf: committed every batch_size writes or flush_interval seconds, on
+    sync(), with before_flush called first as in WriteBehindShelf. The database runs in
+    WAL mode with synchronous=NORMAL. '''
+
+    def __init__(self, path, batch_size=1, flush_interval=5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = RLock()
+        self.pending = dict()  # digest -> (url, completed, links, fetched) not written yet
+        self.new_urls = 0  # urls in pending that are new to the table
+        self.downloaded = Counter()  # host -> pages completed since the last flush
+        self.last_flush = time.monotonic()
+        self.before_flush = None
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS urls (
+                digest INTEGER PRIMARY KEY, url TEXT NOT NULL,
+                completed INTEGER NOT NULL, inlinks INTEGER NOT NULL, fetched REAL);
+            CREATE INDEX IF NOT EXISTS pending_urls ON urls (digest, url, inlinks) WHERE completed = 0;
+            CREATE TABLE IF NOT EXISTS hosts (host TEXT PRIMARY KEY, downloaded INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+        ''')
+        if "fetched" not in {column[1] for column in self.db.execute("PRAGMA table_info(urls)")}:
+            # Save files from before download times were kept
+            self.db.execute("ALTER TABLE urls ADD COLUMN fetched REAL")
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'urls'").fetchone()
+        self.count = row[0] if row else 0
+
+    def __setitem__(self, key, value):
+        url, completed = value[:2]
+        digest = _signed_digest(url)
+        with self.lock:
+            if not completed and len(value) == 2:
+                self.new_urls += 1
+            if completed:
+                self.downloaded[get_host(url)] += 1
+            self.pending[digest] = (
+                url, int(completed), value[2] if len(value) > 2 else 1, value[3] if len(value) > 3 else None)
+
+    def contains(self, url):
+        ''' True if url was ever saved. '''
+        digest = _signed_digest(url)
+        with self.lock:
+            if digest in self.pending:
+                return True
+            return self.db.execute("SELECT 1 FROM urls WHERE digest = ?", (digest,)).fetchone() is not None
+
+    def entry(self, url):
+        ''' Returns the saved (url, completed, links, fetched) of url, or None. '''
+        digest = _signed_digest(url)
+        with self.lock:
+            if digest in self.pending:
+                url, completed, inlinks, fetched = self.pending[digest]
+            else:
+                row = self.db.execute(
+                    "SELECT url, completed, inlinks, fetched FROM urls WHERE digest = ?", (digest,)).fetchone()
+                if row is None:
+                    return None
+                url, completed, inlinks, fetched = row
+        return url, bool(completed), inlinks, fetched
+
+    def pending_urls(self, page_size=10000):
+        ''' Yields (url, links found to it) for each url not completed yet, reading the
+        pending index page_size rows at a time. '''
+        with self.lock:
+            self.flush()
+        last = float("-inf")  # below every digest
+        while True:
+            with self.lock:
+                rows = self.db.execute(
+                    "SELECT digest, url, inlinks FROM urls INDEXED BY pending_urls "
+                    "WHERE completed = 0 AND digest > ? ORDER BY digest LIMIT ?",
+                    (last, page_size)).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            for _, url, inlinks in rows:
+                yield url, inlinks
+
+    def downloaded_by_host(self):
+        ''' Returns {host: pages downloaded}. '''
+        with self.lock:
+            self.flush()
+            return Counter(dict(self.db.execute("SELECT host, downloaded FROM hosts")))
+
+    def __len__(self):
+        with self.lock:
+            return self.count + self.new_urls
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def sync(self):
+        ''' Writes the pending changes if the batch is full or the interval passed. '''
+        with self.lock:
+            if (len(self.pending) >= self.batch_size
+                    or time.monotonic() - self.last_flush >= self.flush_interval):
+                self.flush()
+
+    def flush(self):
+        with self.lock:
+            if self.pending:
+                if self.before_flush is not None:
+                    self.before_flush()
+                self.count += self.new_urls
+                with self.db:
+                    self.db.executemany(
+                        "INSERT INTO urls (digest, url, completed, inlinks, fetched) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (digest) DO UPDATE SET completed = excluded.completed, "
+                        "inlinks = MAX(inlinks, excluded.inlinks), fetched = COALESCE(excluded.fetched, fetched)",
+                        [(digest, *entry) for digest, entry in self.pending.items()])
+                    self.db.executemany(
+                        "INSERT INTO hosts (host, downloaded) VALUES (?, ?) "
+                        "ON CONFLICT (host) DO UPDATE SET downloaded = downloaded + excluded.downloaded",
+                        self.downloaded.items())
+                    self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('urls', ?)", (self.count,))
+                self.pending.clear()
+                self.new_urls = 0
+                self.downloaded.clear()
+            self.last_flush = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.db.close()
+
+
+class StoredUrlSet(object):
+    ''' The frontier's set of seen urls for a SqliteFrontierStore: urls seen by this run
+    are kept in memory as in UrlDigestSet, and urls from earlier runs are looked up in
+    the store's table, so resuming does not have to read every url into memory. '''
+
+    def __init__(self, store):
+        self.store = store
+        self.session = UrlDigestSet()
+
+    def add(self, url):
+        ''' Adds url to the set. Returns True if it was not in the set yet. '''
+        if not self.session.add(url):
+            return False
+        return not self.store.contains(url)
+
+    def __contains__(self, url):
+        return url in self.session or self.store.contains(url)
+
+    def __len__(self):
+        return len(self.store)
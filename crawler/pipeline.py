@@ -0,0 +1,134 @@
+import multiprocessing
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from queue import Queue
+from threading import Thread, BoundedSemaphore
+
+from utils import get_logger, PER_URL
+from utils.download import download, get_downloader, NO_RESPONSE
+from crawler.frontier import Frontier
+from parser import Parser
+import scraper
+
+_DONE = None  # sentinel passed down the queues once the fetch stage has finished
+
+
+def make_parse_pool(processes, config):
+    ''' Process pool for scraper.analyze_page, reading pages the way config says. Uses
+    spawn so worker processes do not inherit locks held by the parent's threads at fork
+    time. '''
+    return ProcessPoolExecutor(
+        max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+        initializer=Parser.configure_page_reading, initargs=(config,))
+
+
+class PipelineCrawler(object):
+    ''' Crawler split into a fetch stage and a parse stage, so parsing is not
+    limited to one core by the GIL.
+
+    THREADCOUNT fetch threads download urls and put the raw page bytes on a
+    bounded queue. A dispatcher sends each page to a pool of PARSEPROCESSES
+    processes running scraper.analyze_page, which returns only the token counts,
+    fingerprint and links of the page. A single merge thread in this process adds
+    those results to the Parser statistics, adds the new links to the frontier and
+    marks the url complete. At most PARSEQUEUE pages wait in each stage. '''
+
+    def __init__(self, config, restart, frontier_factory=Frontier):
+        self.config = config
+        self.logger = get_logger("CRAWLER")
+        self.frontier = frontier_factory(config, restart)
+        self.parse_queue = Queue(maxsize=config.parse_queue_size)
+        self.result_queue = Queue()
+        # Pages handed to the pool but not merged yet, bounds the result queue
+        self.parse_slots = BoundedSemaphore(config.parse_queue_size)
+
+    def start(self):
+        self.parse_pool = make_parse_pool(self.config.parse_processes, self.config)
+        fetchers = [
+            Thread(target=self._fetch_loop, args=(fetcher_id,), daemon=True)
+            for fetcher_id in range(self.config.threads_count)]
+        dispatcher = Thread(target=self._dispatch_loop, daemon=True)
+        merger = Thread(target=self._merge_loop, daemon=True)
+        for thread in fetchers + [dispatcher, merger]:
+            thread.start()
+        for fetcher in fetchers:
+            fetcher.join()
+        self.parse_queue.put(_DONE)
+        dispatcher.join()
+        merger.join()
+        self.parse_pool.shutdown()
+        self.frontier.close()
+        get_downloader(self.config).flush()
+        self.logger.info(f"Download stats: {get_downloader(self.config).stats.snapshot()}")
+
+    def _fetch_loop(self, fetcher_id):
+        logger = get_logger(f"Fetcher-{fetcher_id}", "Worker")
+        while True:
+            tbd_url = self.frontier.get_tbd_url()
+            if not tbd_url:
+                logger.info("Frontier is empty. Stopping Crawler.")
+                break
+            start = time.monotonic()
+            content = None
+            status = None
+            try:
+                resp = download(tbd_url, self.config, logger)
+                elapsed = time.monotonic() - start
+                status = resp.status
+                self.frontier.fetched(tbd_url, status, elapsed)
+                logger.info(
+                    "Downloaded %s, status <%s>, in %.2fs, using cache %s.",
+                    tbd_url, resp.status, elapsed, self.config.cache_server,
+                    extra=PER_URL)
+                content = scraper.page_content(resp)
+                # Only the body is needed from here on, free the rest of the reply now
+                resp.release()
+            except Exception as e:
+                logger.error(f"Failed to fetch {tbd_url}: {e!r}")
+                if status is None:
+                    # The download itself failed, so its host backs off as for no reply
+                    self.frontier.fetched(tbd_url, NO_RESPONSE, time.monotonic() - start)
+            # A url that failed still goes to the merger, which marks it complete
+            self.parse_queue.put((tbd_url, content))
+            if not self.frontier.polite:
+                time.sleep(max(self.frontier.host_delay(tbd_url) - (time.monotonic() - start), 0.0))
+
+    def _dispatch_loop(self):
+        dispatched = 0
+        while True:
+            item = self.parse_queue.get()
+            if item is _DONE:
+                # Tells the merger how many results to wait for, so only it counts merges
+                self.result_queue.put((_DONE, dispatched))
+                return
+            url, content = item
+            self.parse_slots.acquire()
+            dispatched += 1
+            if content is None:
+                self.result_queue.put((url, None))
+                continue
+            future = self.parse_pool.submit(scraper.analyze_page, url, content)
+            future.add_done_callback(
+                lambda future, url=url: self.result_queue.put((url, future)))
+
+    def _merge_loop(self):
+        merged = 0
+        dispatched = None  # known once the dispatcher is done
+        while dispatched is None or merged < dispatched:
+            item = self.result_queue.get()
+            if item[0] is _DONE:
+                # Only results already in the pool are left
+                dispatched = item[1]
+                continue
+            url, future = item
+            try:
+                if future is not None:
+                    for scraped_url in scraper.scrape_analyzed_page(future.result()):
+                        self.frontier.add_url(scraped_url)
+            except Exception as e:
+                self.logger.error(f"Failed to parse {url}: {e!r}")
+            finally:
+                self.frontier.mark_url_complete(url)
+                merged += 1
+                self.parse_slots.release()
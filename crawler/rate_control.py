@@ -0,0 +1,66 @@
+from threading import Lock
+
+from crawler.scheduler import get_host
+from utils.download import NO_RESPONSE
+
+# Replies that mean the host (or the cache server on its behalf) is struggling
+BACKOFF_STATUSES = frozenset([NO_RESPONSE, 429, *range(500, 600)])
+BACKOFF = 2.0  # a host's delay is multiplied by this after each such reply
+SPEEDUP = 0.9  # and by this after each other reply, down to the floor
+LATENCY_WEIGHT = 0.2  # weight of the newest download in a host's average latency
+RATE_TOP_HOSTS = 10  # hosts with the longest delays reported to the metrics
+
+
+class HostRateControl(object):
+    ''' The delay between two downloads from a host, adapted to how the host answers.
+
+    Every host starts at POLITENESS seconds. A reply with a status in BACKOFF_STATUSES
+    (429, 5xx or no reply at all) multiplies its delay by BACKOFF, up to RATECEILING.
+    Other replies bring it back down by SPEEDUP per reply, to RATEFLOOR (POLITENESS
+    unless set lower), but never below RATELATENCY times the host's average download
+    time, so slow hosts get proportionally more time between downloads.
+
+    The delay is counted from the start of a download, so a download that took longer
+    than the delay is followed by the next one right away. '''
+
+    def __init__(self, config):
+        self.base = config.time_delay
+        self.floor = min(config.rate_floor, self.base)
+        self.ceiling = max(config.rate_ceiling, self.base)
+        self.latency_factor = config.rate_latency
+        self.lock = Lock()
+        self.delays = dict()  # host -> seconds between downloads, for hosts seen so far
+        self.latency = dict()  # host -> average seconds per download
+        self.errors = dict()  # host -> share of recent replies in BACKOFF_STATUSES
+
+    def observe(self, url, status, seconds):
+        ''' Records a download of url that got status after seconds. '''
+        host = get_host(url)
+        error = status in BACKOFF_STATUSES
+        with self.lock:
+            latency = self.latency.get(host)
+            latency = seconds if latency is None else latency + LATENCY_WEIGHT * (seconds - latency)
+            self.latency[host] = latency
+            self.errors[host] = self.errors.get(host, 0.0) * (1 - LATENCY_WEIGHT) + LATENCY_WEIGHT * error
+            delay = self.delays.get(host, self.base)
+            if error:
+                delay = max(delay, self.base) * BACKOFF
+            else:
+                delay = max(delay * SPEEDUP, self.floor, self.latency_factor * latency)
+            self.delays[host] = min(delay, self.ceiling)
+
+    def delay(self, url):
+        ''' Seconds to leave between the starts of two downloads from url's host. '''
+        return self.delays.get(get_host(url), self.base)
+
+    def snapshot(self):
+        ''' The hosts with the longest delays, with their average latency and error share. '''
+        with self.lock:
+            slowest = sorted(self.delays.items(), key=lambda item: item[1], reverse=True)[:RATE_TOP_HOSTS]
+            return {
+                "hosts": len(self.delays),
+                "backed_off": sum(delay > self.base for delay in self.delays.values()),
+                "slowest": {
+                    host: {"delay": round(delay, 3), "latency": round(self.latency[host], 3),
+                           "errors": round(self.errors[host], 3)}
+                    for host, delay in slowest}}
@@ -0,0 +1,319 @@
+import heapq
+import re
+
+from collections import Counter, deque
+from itertools import count
+from urllib.parse import urlparse
+
+from trap_detector import LruCounter, url_template
+
+# Weights of the parts of a url's priority score (lower is downloaded sooner)
+DEPTH_WEIGHT = 2  # per path segment (and for a query)
+PATTERN_WEIGHT = 1  # per doubling of the urls queued with the same url_template...
+PATTERN_ALLOWANCE = 8  # ...counted in units of this many, as a few siblings are normal
+INLINK_WEIGHT = 3  # taken off per doubling of the links found to the url
+COVERAGE_WEIGHT = 2  # added to a host per doubling of the pages already downloaded from it
+PATTERN_MEMORY = 100_000  # url patterns whose counts are remembered
+
+# Host, path and query of a url, quicker than urlparse for the priority scheduler's hot path
+_URL_PARTS = re.compile(r'(?:[^:/?#]*:)?(?://([^/?#]*))?([^?#]*)(?:\?([^#]*))?')
+
+
+def get_host(url):
+    return urlparse(url).netloc.lower()
+
+
+class LifoScheduler(object):
+    ''' Hands out the most recently added url first, the frontier's original order.
+    Politeness is left to the worker, which sleeps after every download. '''
+    polite = False
+    counts_downloads = False  # whether restore_downloaded is worth calling
+
+    def __init__(self, delay):
+        self.urls = list()  # (url, host)
+        self.host_counts = Counter()  # host -> urls waiting
+
+    def push(self, url, inlinks=1):
+        host = get_host(url)
+        self.urls.append((url, host))
+        self.host_counts[host] += 1
+
+    def pop(self, now):
+        ''' Returns (url, None), or (None, None) when there is nothing to download. '''
+        if not self.urls:
+            return None, None
+        url, host = self.urls.pop()
+        self.host_counts[host] -= 1
+        if not self.host_counts[host]:
+            del self.host_counts[host]
+        return url, None
+
+    def done(self, url, now, delay=None):
+        ''' Marks the download of url as finished. Returns the links found to url, for
+        the save file. '''
+        return 1
+
+    def add_inlink(self, url):
+        ''' Counts another link to a waiting url. Returns the url's new link count if it
+        should be saved (it changes the url's priority), else None. '''
+        return None
+
+    def restore_downloaded(self, host, pages):
+        ''' Counts pages of host downloaded before a restart. '''
+        pass
+
+    def depth_by_host(self):
+        ''' Returns {host: urls waiting}. '''
+        return Counter(self.host_counts)
+
+    def __len__(self):
+        return len(self.urls)
+
+
+class PoliteScheduler(object):
+    ''' Keeps one queue of urls per host and a heap of hosts ordered by the time
+    they may be contacted again.
+
+    A url is only handed out when its host has no download in flight and the
+    politeness delay since the host's last download has passed, so workers can
+    keep downloading from other hosts instead of sleeping. '''
+    polite = True
+    counts_downloads = False
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.queues = dict()  # host -> deque of urls waiting to be downloaded
+        self.ready_heap = list()  # (ready time, host) for hosts with urls and nothing in flight
+        self.scheduled = set()  # hosts currently in ready_heap
+        self.in_flight = set()  # hosts with a download in progress
+        self.next_ready = dict()  # host -> earliest time of its next download
+        self.count = 0
+
+    def _schedule(self, host):
+        if host not in self.scheduled and host not in self.in_flight:
+            heapq.heappush(self.ready_heap, (self.next_ready.get(host, 0), host))
+            self.scheduled.add(host)
+
+    def push(self, url, inlinks=1):
+        host = get_host(url)
+        if host not in self.queues:
+            self.queues[host] = deque()
+        self.queues[host].append(url)
+        self.count += 1
+        self._schedule(host)
+
+    def pop(self, now):
+        ''' Returns (url, None) for a url whose host is ready, (None, seconds until the
+        next host is ready), or (None, None) when no urls are waiting. '''
+        if not self.ready_heap:
+            return None, None
+        ready_time, host = self.ready_heap[0]
+        if ready_time > now:
+            return None, ready_time - now
+        heapq.heappop(self.ready_heap)
+        self.scheduled.discard(host)
+        queue = self.queues[host]
+        url = queue.popleft()
+        if not queue:
+            del self.queues[host]
+        self.in_flight.add(host)
+        self.count -= 1
+        return url, None
+
+    def done(self, url, now, delay=None):
+        ''' Marks the download of url as finished, starting its host's politeness delay
+        (delay seconds if given, instead of the scheduler's delay). Returns the links
+        found to url, for the save file. '''
+        host = get_host(url)
+        self.in_flight.discard(host)
+        self.next_ready[host] = now + (self.delay if delay is None else delay)
+        if host in self.queues:
+            self._schedule(host)
+        return 1
+
+    def add_inlink(self, url):
+        return None
+
+    def restore_downloaded(self, host, pages):
+        pass
+
+    def depth_by_host(self):
+        ''' Returns {host: urls waiting}. '''
+        return Counter({host: len(queue) for host, queue in self.queues.items()})
+
+    def __len__(self):
+        return self.count
+
+
+def _doublings(number):
+    # floor(log2(number)) for number >= 1, 0 below
+    return max(number.bit_length() - 1, 0)
+
+
+def url_depth(url):
+    ''' Number of path segments of url, plus one if it has a query. '''
+    _, path, query = _URL_PARTS.match(url).groups()
+    return len([segment for segment in path.split("/") if segment]) + (1 if query else 0)
+
+
+def _host(url):
+    return (_URL_PARTS.match(url).group(1) or "").lower()
+
+
+class PriorityScheduler(object):
+    ''' Best first order with the politeness of PoliteScheduler: of the hosts that may
+    be contacted now, the one with the best priority gets the download, and it is its
+    best url.
+
+    A url's score (lower is better) grows with its depth and with the urls already
+    queued with its url pattern beyond the first few (so the 50th page of a calendar
+    waits behind new kinds of pages), and shrinks with the links found to it. A host's priority is the score
+    of its best url plus how many pages were already downloaded from it, so the crawl
+    covers hosts broadly before going deep into any one.
+
+    Link and download counts only count in doublings, so scores change rarely. A change
+    pushes a new heap entry and leaves the old one to be skipped when it comes up, in
+    O(log n). add_inlink tells the frontier when a url's link count should be saved, so
+    priorities survive a restart. '''
+    polite = True
+    counts_downloads = True
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.urls = dict()  # host -> heap of (score, order, url); entries go stale as scores change
+        self.scores = dict()  # url -> current score, for every waiting url
+        self.inlinks = dict()  # url -> links found to it, for every waiting url
+        self.fetching = dict()  # url -> links found to it, for urls in flight
+        self.host_counts = Counter()  # host -> urls waiting
+        self.patterns = LruCounter(PATTERN_MEMORY)  # url pattern -> urls queued with it
+        self.downloaded = Counter()  # host -> pages downloaded
+        self.waiting_heap = list()  # (ready time, host) for hosts waiting out the delay
+        self.ready_heap = list()  # (priority, host) for hosts that may be contacted now
+        self.priorities = dict()  # host -> priority of its current ready_heap entry
+        self.in_flight = set()  # hosts with a download in progress
+        self.next_ready = dict()  # host -> earliest time of its next download
+        self.order = count()  # ties go to the url queued first
+        self.count = 0
+
+    def _score(self, url, pattern_count, inlinks):
+        return (DEPTH_WEIGHT * url_depth(url) + PATTERN_WEIGHT * _doublings(pattern_count // PATTERN_ALLOWANCE)
+                - INLINK_WEIGHT * _doublings(inlinks))
+
+    def _best(self, host):
+        # Best waiting url of host as its heap entry, dropping stale entries
+        heap = self.urls[host]
+        while self.scores.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0]
+
+    def _priority(self, host):
+        return self._best(host)[0] + COVERAGE_WEIGHT * _doublings(self.downloaded[host])
+
+    def _schedule(self, host, now=None):
+        # Puts a host with waiting urls and nothing in flight in the heap it belongs in
+        if host in self.in_flight or host in self.priorities:
+            return
+        ready_time = self.next_ready.get(host, 0)
+        if now is None or ready_time > now:
+            heapq.heappush(self.waiting_heap, (ready_time, host))
+            self.priorities[host] = None
+        else:
+            self._make_ready(host)
+
+    def _make_ready(self, host):
+        priority = self.priorities[host] = self._priority(host)
+        heapq.heappush(self.ready_heap, (priority, host))
+
+    def _rescore(self, host):
+        # The host's best url may have changed; only ready hosts have a priority to update
+        if self.priorities.get(host) is not None and self._priority(host) != self.priorities[host]:
+            self._make_ready(host)
+
+    def push(self, url, inlinks=1):
+        host = _host(url)
+        if host not in self.urls:
+            self.urls[host] = list()
+        score = self._score(url, self.patterns.add(url_template(url)), inlinks)
+        self.scores[url] = score
+        self.inlinks[url] = inlinks
+        heapq.heappush(self.urls[host], (score, next(self.order), url))
+        self.host_counts[host] += 1
+        self.count += 1
+        if host in self.priorities:
+            self._rescore(host)
+        else:
+            self._schedule(host)
+
+    def add_inlink(self, url):
+        inlinks = self.inlinks.get(url)
+        if inlinks is None:
+            return None  # downloaded or in flight
+        inlinks = self.inlinks[url] = inlinks + 1
+        if _doublings(inlinks) == _doublings(inlinks - 1):
+            return None
+        score = self.scores[url] - INLINK_WEIGHT
+        self.scores[url] = score
+        host = _host(url)
+        heapq.heappush(self.urls[host], (score, next(self.order), url))
+        self._rescore(host)
+        return inlinks
+
+    def pop(self, now):
+        ''' Returns (url, None) for the best url of the best host that is ready, (None,
+        seconds until the next host is ready), or (None, None) when no urls are waiting. '''
+        while self.waiting_heap and self.waiting_heap[0][0] <= now:
+            _, host = heapq.heappop(self.waiting_heap)
+            self._make_ready(host)
+        while self.ready_heap:
+            priority, host = heapq.heappop(self.ready_heap)
+            if self.priorities.get(host) != priority:
+                continue  # stale entry
+            del self.priorities[host]
+            _, _, url = self._pop_best(host)
+            return url, None
+        if self.waiting_heap:
+            return None, self.waiting_heap[0][0] - now
+        return None, None
+
+    def _pop_best(self, host):
+        entry = self._best(host)
+        heapq.heappop(self.urls[host])
+        url = entry[2]
+        del self.scores[url]
+        self.fetching[url] = self.inlinks.pop(url)
+        self.host_counts[host] -= 1
+        if not self.host_counts[host]:
+            del self.host_counts[host]
+            del self.urls[host]
+        self.in_flight.add(host)
+        self.count -= 1
+        return entry
+
+    def done(self, url, now, delay=None):
+        ''' Marks the download of url as finished, starting its host's politeness delay
+        (delay seconds if given, instead of the scheduler's delay). Returns the links
+        found to url, for the save file. '''
+        host = _host(url)
+        self.in_flight.discard(host)
+        self.downloaded[host] += 1
+        self.next_ready[host] = now + (self.delay if delay is None else delay)
+        if host in self.urls:
+            self._schedule(host, now)
+        return self.fetching.pop(url, 1)
+
+    def restore_downloaded(self, host, pages):
+        self.downloaded[host] += pages
+
+    def depth_by_host(self):
+        ''' Returns {host: urls waiting}. '''
+        return Counter(self.host_counts)
+
+    def __len__(self):
+        return self.count
+
+
+SCHEDULERS = {
+    "lifo": LifoScheduler,
+    "polite": PoliteScheduler,
+    "priority": PriorityScheduler,
+}
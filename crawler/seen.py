@@ -0,0 +1,76 @@
+from array import array
+from hashlib import blake2b
+
+_GOLDEN = 0x9E3779B97F4A7C15  # multiplier for fibonacci hashing of digests
+_MASK64 = (1 << 64) - 1
+
+
+def url_digest(url):
+    ''' 64-bit digest of a url. Never 0, which marks an empty slot in UrlDigestSet. '''
+    return int.from_bytes(blake2b(url.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+
+class UrlDigestSet(object):
+    ''' Set of the urls the frontier has seen, kept in memory so add_url does not have to
+    ask the save file whether a url is new.
+
+    Only a 64-bit digest of each url is kept, in an open-addressing hash table backed by
+    an array of unsigned 64-bit integers that is at most half full: 16 bytes or less per
+    url instead of a Python string. Two urls share a digest with probability about
+    n^2 / 2^65 for n urls (under one in 100,000 for ten million urls), in which case
+    the second one is taken as already seen. '''
+
+    def __init__(self, capacity_bits=10):
+        self.capacity_bits = capacity_bits
+        self.table = array("Q", bytes(8 << capacity_bits))
+        self.count = 0
+
+    def _slot(self, digest):
+        return ((digest * _GOLDEN) & _MASK64) >> (64 - self.capacity_bits)
+
+    def _insert(self, digest):
+        # Returns False if the digest was already in the table
+        table = self.table
+        slot_mask = len(table) - 1
+        slot = self._slot(digest)
+        stored = table[slot]
+        while stored:
+            if stored == digest:
+                return False
+            slot = (slot + 1) & slot_mask
+            stored = table[slot]
+        table[slot] = digest
+        return True
+
+    def _grow(self):
+        old_table = self.table
+        self.capacity_bits += 1
+        self.table = array("Q", bytes(8 << self.capacity_bits))
+        for digest in old_table:
+            if digest:
+                self._insert(digest)
+
+    def add(self, url):
+        ''' Adds url to the set. Returns True if it was not in the set yet. '''
+        if (self.count + 1) * 2 > len(self.table):
+            self._grow()
+        if self._insert(url_digest(url)):
+            self.count += 1
+            return True
+        return False
+
+    def __contains__(self, url):
+        digest = url_digest(url)
+        table = self.table
+        slot_mask = len(table) - 1
+        slot = self._slot(digest)
+        stored = table[slot]
+        while stored:
+            if stored == digest:
+                return True
+            slot = (slot + 1) & slot_mask
+            stored = table[slot]
+        return False
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,150 @@
+import time
+import zlib
+
+from collections import deque
+from datetime import datetime, timezone
+from xml.etree.ElementTree import XMLPullParser, ParseError
+
+from utils import get_logger, normalize
+from utils.download import download
+from utils.metrics import METRICS
+from scraper import URL_FILTER
+from parser import Parser
+
+CHUNK_SIZE = 1 << 16  # bytes of a sitemap parsed at a time
+MAX_SITEMAP_BYTES = 50_000_000  # the sitemap protocol's limit, after decompression
+MAX_SITEMAPS = 1000  # sitemaps read per run, nested indexes included
+BATCH_SIZE = 1000  # sitemap urls filtered and added to the frontier together
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def parse_lastmod(text):
+    ''' Seconds since the epoch of a W3C datetime (2024, 2024-01, 2024-01-05 or
+    2024-01-05T10:00:00+00:00), taken as UTC if it has no time zone. None if it cannot
+    be read. '''
+    text = (text or "").strip()
+    if len(text) == 4:
+        text += "-01-01"
+    elif len(text) == 7:
+        text += "-01"
+    if text.endswith(("Z", "z")):
+        text = text[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _chunks(content):
+    # The sitemap in CHUNK_SIZE pieces, decompressed on the way if it is gzipped
+    if content[:2] == _GZIP_MAGIC:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        size = 0
+        for start in range(0, len(content), CHUNK_SIZE):
+            chunk = decompressor.decompress(content[start:start + CHUNK_SIZE], MAX_SITEMAP_BYTES - size)
+            size += len(chunk)
+            yield chunk
+            if size >= MAX_SITEMAP_BYTES:
+                return
+    else:
+        for start in range(0, min(len(content), MAX_SITEMAP_BYTES), CHUNK_SIZE):
+            yield content[start:start + CHUNK_SIZE]
+
+
+def parse_sitemap(content):
+    ''' Yields ("sitemap", loc, lastmod) for each sitemap of a sitemap index and
+    ("url", loc, lastmod) for each url of a urlset, where lastmod is in seconds since
+    the epoch or None. The xml is parsed as it is read, and each entry is emptied once
+    yielded, so large sitemaps never become a whole tree in memory. A sitemap that is
+    not well formed yields its entries up to the error. '''
+    parser = XMLPullParser(events=("end",))
+    loc = lastmod = None
+    try:
+        for chunk in _chunks(content):
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                tag = element.tag.rpartition("}")[2]  # without the namespace
+                if tag == "loc":
+                    loc = (element.text or "").strip()
+                elif tag == "lastmod":
+                    lastmod = parse_lastmod(element.text)
+                elif tag in ("url", "sitemap"):
+                    if loc:
+                        yield tag, loc, lastmod
+                    loc = lastmod = None
+                    element.clear()
+        parser.close()
+    except ParseError:
+        pass
+
+
+def seed_sitemaps(seed_urls):
+    ''' The sitemaps robots.txt lists for the hosts of the seed urls, each once. '''
+    sitemaps = dict()
+    for url in seed_urls:
+        for sitemap in Parser.robots.rules(url).sitemaps:
+            sitemaps[sitemap] = True
+    return list(sitemaps)
+
+
+def ingest_sitemaps(config, frontier, sitemaps=None):
+    ''' Reads sitemaps (by default the sitemaps robots.txt lists for the seed hosts)
+    through the cache server and adds the urls they list to the frontier with
+    Frontier.add_sitemap_url, up to SITEMAPURLS urls. Nested sitemap indexes are
+    followed. Urls are checked like the links of a page: by the url filter and by
+    robots.txt. Downloads of sitemaps are POLITENESS seconds apart.
+
+    Returns (urls listed, urls queued). On a new crawl every url listed is queued; on a
+    resumed one, only urls not seen yet and urls whose lastmod is later than their
+    last download. '''
+    logger = get_logger("SITEMAPS")
+    queue = deque(seed_sitemaps(config.seed_urls) if sitemaps is None else sitemaps)
+    read = set()
+    listed = queued = 0
+    limit = config.sitemap_urls
+
+    def add(batch):
+        nonlocal queued
+        lastmods = dict()  # url in the frontier's canonical form -> lastmod
+        for url, lastmod in batch:
+            try:
+                lastmods[normalize(url)] = lastmod
+            except ValueError:  # malformed url
+                continue
+        for url in URL_FILTER.filter_many(lastmods):
+            if Parser.robots.allowed(url) and frontier.add_sitemap_url(url, lastmods[url]):
+                queued += 1
+
+    while queue and len(read) < MAX_SITEMAPS and not (limit and listed >= limit):
+        sitemap = queue.popleft()
+        if sitemap in read:
+            continue
+        if read:
+            time.sleep(config.time_delay)
+        read.add(sitemap)
+        resp = download(sitemap, config, logger)
+        if resp.status != 200 or resp.raw_response is None:
+            logger.info(f"Could not read sitemap {sitemap}, status <{resp.status}>.")
+            continue
+        content = resp.raw_response.content
+        resp.release()
+        METRICS.count("sitemaps read")
+        batch = []
+        for kind, loc, lastmod in parse_sitemap(content):
+            if kind == "sitemap":
+                queue.append(loc)
+                continue
+            batch.append((loc, lastmod))
+            listed += 1
+            if len(batch) >= BATCH_SIZE:
+                add(batch)
+                batch = []
+            if limit and listed >= limit:
+                break
+        add(batch)
+    METRICS.count("sitemap urls", listed)
+    logger.info(f"Read {len(read)} sitemaps listing {listed} urls, queued {queued} of them.")
+    return listed, queued
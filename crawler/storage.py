@@ -0,0 +1,83 @@
+import shelve
+import time
+
+from threading import Thread, RLock, Event
+
+
+class WriteBehindShelf(object):
+    ''' A shelve that collects writes in memory and saves them in batches.
+
+    Writes are flushed to the shelve in one go once batch_size of them are pending,
+    or flush_interval seconds after the last flush, whichever comes first. A
+    background thread makes sure the interval is kept even when no new writes
+    arrive, so a crash loses at most flush_interval seconds or batch_size writes.
+    Reads see pending writes before they reach the disk. If before_flush is set, it is
+    called before each write, to save state that has to be on disk first. '''
+
+    def __init__(self, filename, batch_size=500, flush_interval=5.0):
+        self.shelf = shelve.open(filename)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = dict()
+        self.lock = RLock()
+        self.last_flush = time.monotonic()
+        self.before_flush = None
+        self.closed = Event()
+        self.flusher = Thread(target=self._flush_periodically, daemon=True)
+        self.flusher.start()
+
+    def _flush_periodically(self):
+        while not self.closed.wait(self.flush_interval):
+            with self.lock:
+                if time.monotonic() - self.last_flush >= self.flush_interval:
+                    self.flush()
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.pending or key in self.shelf
+
+    def __getitem__(self, key):
+        with self.lock:
+            if key in self.pending:
+                return self.pending[key]
+            return self.shelf[key]
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            self.pending[key] = value
+
+    def __len__(self):
+        with self.lock:
+            return len(self.shelf) + sum(1 for key in self.pending if key not in self.shelf)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def values(self):
+        with self.lock:
+            self.flush()
+            return self.shelf.values()
+
+    def sync(self):
+        ''' Flushes the pending writes if the batch is full or the interval passed. '''
+        with self.lock:
+            if (len(self.pending) >= self.batch_size
+                    or time.monotonic() - self.last_flush >= self.flush_interval):
+                self.flush()
+
+    def flush(self):
+        with self.lock:
+            if self.pending:
+                if self.before_flush is not None:
+                    self.before_flush()
+                self.shelf.update(self.pending)
+                self.shelf.sync()
+                self.pending.clear()
+            self.last_flush = time.monotonic()
+
+    def close(self):
+        self.closed.set()
+        self.flusher.join()
+        with self.lock:
+            self.flush()
+            self.shelf.close()
@@ -1,8 +1,8 @@
 from threading import Thread
 
 from inspect import getsource
-from utils.download import download
-from utils import get_logger
+from utils.download import download, NO_RESPONSE
+from utils import get_logger, PER_URL
 import scraper
 import time
 
@@ -23,12 +23,31 @@ class Worker(Thread):
             if not tbd_url:
                 self.logger.info("Frontier is empty. Stopping Crawler.")
                 break
-            resp = download(tbd_url, self.config, self.logger)
-            self.logger.info(
-                f"Downloaded {tbd_url}, status <{resp.status}>, "
-                f"using cache {self.config.cache_server}.")
-            scraped_urls = scraper.scraper(tbd_url, resp)
-            for scraped_url in scraped_urls:
-                self.frontier.add_url(scraped_url)
-            self.frontier.mark_url_complete(tbd_url)
-            time.sleep(self.config.time_delay)
+            start = time.monotonic()
+            status = None
+            try:
+                resp = download(tbd_url, self.config, self.logger)
+                elapsed = time.monotonic() - start
+                status = resp.status
+                self.frontier.fetched(tbd_url, status, elapsed)
+                self.logger.info(
+                    "Downloaded %s, status <%s>, in %.2fs, using cache %s.",
+                    tbd_url, resp.status, elapsed, self.config.cache_server,
+                    extra=PER_URL)
+                scraped_urls = scraper.scraper(tbd_url, resp)
+                # Free the page now rather than while the next one downloads
+                resp.release()
+                for scraped_url in scraped_urls:
+                    self.frontier.add_url(scraped_url)
+            except Exception as e:
+                # One bad url should not stop this worker or leave its host in flight.
+                self.logger.error(f"Failed to crawl {tbd_url}: {e!r}")
+                if status is None:
+                    # The download itself failed, so its host backs off as for no reply
+                    self.frontier.fetched(tbd_url, NO_RESPONSE, time.monotonic() - start)
+            finally:
+                self.frontier.mark_url_complete(tbd_url)
+            if not getattr(self.frontier, "polite", False):
+                # The frontier does not space out downloads per host, so wait here
+                # for what is left of the delay since the download started.
+                time.sleep(max(self.frontier.host_delay(tbd_url) - (time.monotonic() - start), 0.0))
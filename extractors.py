@@ -0,0 +1,192 @@
+from collections import Counter
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+import tokenizer
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional, the "lxml" backend then uses the "stream" one
+    etree = None
+
+# Text inside these tags is not page text (BeautifulSoup's get_text() skips it too)
+SKIPPED_TAGS = frozenset(["script", "style", "template"])
+TOKEN_CHARACTERS = "abcdefghijklmnopqrstuvwxyz0123456789"
+FEED_SIZE = 16 * 1024  # characters handed to a streaming parser at a time
+
+
+def decode(content) -> str:
+    """
+        Returns the page content as text, reading bytes as utf-8 and falling back to
+        latin-1 (which never fails) for pages in a legacy encoding.
+    """
+    if isinstance(content, str):
+        return content
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return content.decode("latin-1")
+
+
+class TokenCollector:
+    """
+        Counts the tokens of page text as it is streamed in, the same way
+        tokenizer.count_tokens does, without keeping a list of them. Text pieces are joined
+        without a separator, like BeautifulSoup's get_text(), so a word split over two tags
+        is still one token. Once there are more than max_tokens tokens the collector is full
+        and the page will be skipped (skip_reason).
+    """
+
+    def __init__(self, max_tokens: int) -> None:
+        self.max_tokens = max_tokens
+        self.counts = Counter()
+        self.total = 0
+        self.tail = ""  # lowercased end of the text so far, which may be the start of a longer token
+        self.full = False
+
+    def feed(self, text: str) -> None:
+        text = self.tail + text.lower()
+        cut = len(text.rstrip(TOKEN_CHARACTERS))
+        self.tail = text[cut:]
+        if cut:
+            self._add(tokenizer.TOKEN_PATTERN.findall(text, 0, cut))
+
+    def _add(self, tokens: list) -> None:
+        self.total += len(tokens)
+        self.full = self.total > self.max_tokens
+        if not self.full:
+            self.counts.update(tokens)
+
+    def close(self) -> Counter:
+        """
+            Returns the token counts of the page, or an empty Counter if there were too many.
+        """
+        if self.tail:
+            self._add(tokenizer.TOKEN_PATTERN.findall(self.tail))
+            self.tail = ""
+        if self.skip_reason:
+            return Counter()
+        return self.counts
+
+    @property
+    def skip_reason(self) -> str:
+        if self.full:
+            return tokenizer.TOO_MANY_TOKENS
+        return None
+
+
+class _StreamHandler(HTMLParser):
+    # html.parser callbacks, sending text outside SKIPPED_TAGS to a TokenCollector
+    def __init__(self, collector: TokenCollector) -> None:
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+        self.hrefs = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag == "a":
+            for name, value in attrs:
+                if name == "href" and value is not None:
+                    self.hrefs.append(value)
+                    break
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.collector.feed(data)
+
+
+class _LxmlTarget:
+    # lxml parser target with the same callbacks as _StreamHandler
+    def __init__(self, collector: TokenCollector) -> None:
+        self.collector = collector
+        self.hrefs = []
+        self.skip_depth = 0
+
+    def start(self, tag, attrib):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag == "a":
+            href = attrib.get("href")
+            if href is not None:
+                self.hrefs.append(href)
+
+    def end(self, tag):
+        if tag in SKIPPED_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def data(self, data):
+        if not self.skip_depth:
+            self.collector.feed(data)
+
+    def close(self):
+        return None
+
+
+def _feed(parser, handler, text: str) -> None:
+    # Feeds the page a piece at a time so parsing stops soon after the token cap is hit
+    for start in range(0, len(text), FEED_SIZE):
+        parser.feed(text[start:start + FEED_SIZE])
+        if handler.collector.full:
+            return
+    parser.close()
+
+
+def extract_bs4(content, max_tokens: int = tokenizer.MAX_TOKENS) -> tuple:
+    """
+        Returns (token_counts, hrefs, skip_reason) of the page from a full BeautifulSoup tree.
+        Slowest backend, kept as the reference the others are compared against.
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+    page_text = soup.get_text()
+    hrefs = [link.get('href') for link in soup.find_all('a', href=True)]
+    token_counts, skip_reason = tokenizer.count_tokens([page_text], max_tokens)
+    return token_counts, hrefs, skip_reason
+
+
+def extract_stream(content, max_tokens: int = tokenizer.MAX_TOKENS) -> tuple:
+    """
+        Returns (token_counts, hrefs, skip_reason) of the page in one pass of the standard
+        library's html.parser, without building a tree.
+    """
+    collector = TokenCollector(max_tokens)
+    handler = _StreamHandler(collector)
+    _feed(handler, handler, decode(content))
+    return collector.close(), handler.hrefs, collector.skip_reason
+
+
+def extract_lxml(content, max_tokens: int = tokenizer.MAX_TOKENS) -> tuple:
+    """
+        Returns (token_counts, hrefs, skip_reason) of the page in one pass of lxml's HTML
+        parser, sending parse events straight to a target instead of building a tree.
+    """
+    if etree is None:
+        return extract_stream(content, max_tokens)
+    collector = TokenCollector(max_tokens)
+    target = _LxmlTarget(collector)
+    parser = etree.HTMLParser(target=target, remove_comments=True, remove_pis=True)
+    try:
+        _feed(parser, target, decode(content))
+    except etree.XMLSyntaxError:
+        # lxml gives up on some broken documents (e.g. empty ones), keep what was read
+        pass
+    return collector.close(), target.hrefs, collector.skip_reason
+
+
+EXTRACTORS = {"bs4": extract_bs4, "stream": extract_stream, "lxml": extract_lxml}
+
+
+def extract(content, backend: str = "bs4", max_tokens: int = tokenizer.MAX_TOKENS) -> tuple:
+    """
+        Returns (token_counts, hrefs, skip_reason) of the page with the given backend, where
+        token_counts is a Counter of its tokens. If the page has more than max_tokens tokens,
+        token_counts is empty and skip_reason is tokenizer.TOO_MANY_TOKENS, otherwise
+        skip_reason is None.
+    """
+    return EXTRACTORS[backend](content, max_tokens)
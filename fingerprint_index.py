@@ -0,0 +1,147 @@
+from array import array
+from itertools import combinations
+
+
+_GOLDEN = 0x9E3779B97F4A7C15  # multiplier for fibonacci hashing of table keys
+_MASK64 = (1 << 64) - 1
+
+
+class FingerprintIndex:
+    """
+        Stores simhash fingerprints as 64-bit integers and answers "is there a stored fingerprint
+        within max_distance bits of this one" without comparing against every stored fingerprint.
+
+        The fingerprint is split into `blocks` contiguous bit blocks. Two fingerprints that differ in at
+        most max_distance bits must agree exactly on at least (blocks - max_distance) of those blocks
+        (pigeonhole), so we keep one table for every choice of (blocks - max_distance) blocks, keyed on
+        those bits. A lookup only compares against the few fingerprints that share a key in some table,
+        which keeps the cost per page roughly constant as the crawl grows.
+
+        Each table is an open-addressing hash table backed by an array of unsigned 64-bit integers,
+        which keeps memory at 8 bytes per slot instead of a Python object per fingerprint.
+    """
+
+    def __init__(self, max_distance: int = 3, bits: int = 64, blocks: int = None) -> None:
+        if blocks is None:
+            blocks = max_distance + 2
+        blocks = min(blocks, bits)
+        if bits > 64:
+            raise ValueError("fingerprints are stored as 64-bit integers")
+        if not 0 <= max_distance < blocks:
+            raise ValueError("max_distance must be smaller than the number of blocks")
+
+        self.max_distance = max_distance
+        self.bits = bits
+        self.count = 0
+        self._zero_count = 0  # 0 marks an empty slot, so the zero fingerprint is counted separately
+
+        # Split the bits into blocks that differ in size by at most one bit
+        block_masks = []
+        start = 0
+        for i in range(blocks):
+            size = bits // blocks + (1 if i < bits % blocks else 0)
+            block_masks.append(((1 << size) - 1) << start)
+            start += size
+
+        self._masks = []
+        for chosen in combinations(block_masks, blocks - max_distance):
+            mask = 0
+            for block_mask in chosen:
+                mask |= block_mask
+            self._masks.append(mask)
+
+        self._capacity_bits = 4
+        self._tables = [self._new_table() for _ in self._masks]
+
+
+    @classmethod
+    def from_similarity(cls, threshold: float, bits: int = 64, blocks: int = None) -> "FingerprintIndex":
+        """
+            Returns an index that matches fingerprints whose fraction of equal bits is at least
+            threshold, the same test scraper.py used when comparing fingerprints one by one.
+        """
+        max_distance = 0
+        while max_distance < bits and (bits - (max_distance + 1)) / bits >= threshold:
+            max_distance += 1
+        return cls(max_distance, bits, blocks)
+
+
+    def _new_table(self) -> array:
+        return array("Q", bytes(8 << self._capacity_bits))
+
+
+    def _slot(self, key: int) -> int:
+        return ((key * _GOLDEN) & _MASK64) >> (64 - self._capacity_bits)
+
+
+    def _insert(self, table: array, mask: int, fingerprint: int) -> None:
+        slot_mask = len(table) - 1
+        slot = self._slot(fingerprint & mask)
+        while table[slot]:
+            slot = (slot + 1) & slot_mask
+        table[slot] = fingerprint
+
+
+    def _grow(self) -> None:
+        old_tables = self._tables
+        self._capacity_bits += 1
+        self._tables = [self._new_table() for _ in self._masks]
+        for table, mask, old_table in zip(self._tables, self._masks, old_tables):
+            for fingerprint in old_table:
+                if fingerprint:
+                    self._insert(table, mask, fingerprint)
+
+
+    def add(self, fingerprint: int) -> None:
+        """
+            Adds a fingerprint to the index.
+        """
+        if fingerprint == 0:
+            self._zero_count += 1
+            self.count += 1
+            return
+        # Keep every table at most half full so probe sequences stay short
+        if (self.count - self._zero_count + 1) * 2 > len(self._tables[0]):
+            self._grow()
+        for table, mask in zip(self._tables, self._masks):
+            self._insert(table, mask, fingerprint)
+        self.count += 1
+
+
+    def find_near(self, fingerprint: int):
+        """
+            Returns a stored fingerprint within max_distance bits of the given one, or None if there is none.
+        """
+        max_distance = self.max_distance
+        if self._zero_count and bin(fingerprint).count("1") <= max_distance:
+            return 0
+        for table, mask in zip(self._tables, self._masks):
+            key = fingerprint & mask
+            slot_mask = len(table) - 1
+            slot = self._slot(key)
+            stored = table[slot]
+            while stored:
+                if stored & mask == key and bin(stored ^ fingerprint).count("1") <= max_distance:
+                    return stored
+                slot = (slot + 1) & slot_mask
+                stored = table[slot]
+        return None
+
+
+    def contains_near(self, fingerprint: int) -> bool:
+        """
+            Returns True if a stored fingerprint lies within max_distance bits of the given one.
+        """
+        return self.find_near(fingerprint) is not None
+
+
+    def __len__(self) -> int:
+        return self.count
+
+
+    def __iter__(self):
+        for _ in range(self._zero_count):
+            yield 0
+        for fingerprint in self._tables[0]:
+            if fingerprint:
+                yield fingerprint
@@ -3,18 +3,47 @@ from argparse import ArgumentParser
 
 from utils.server_registration import get_cache_server
 from utils.config import Config
+from utils.metrics import MetricsExporter
+from utils import configure_logging, flush_logs
 from crawler import Crawler
+from crawler.async_crawler import AsyncCrawler
+from crawler.pipeline import PipelineCrawler
+from crawler.distributed import DistributedCrawler
+from crawler.sitemaps import ingest_sitemaps
 
 import parser as p
 
 
-def main(config_file, restart):
+def main(config_file, restart, cache_server=None):
     cparser = ConfigParser()
     cparser.read(config_file)
     config = Config(cparser)
-    config.cache_server = get_cache_server(config, restart)
-    crawler = Crawler(config, restart)
-    crawler.start()
+    configure_logging(config)
+    p.Parser.configure(config)
+    if cache_server:
+        # e.g. a local utils.stub_cache_server, skips registering with spacetime
+        host, port = cache_server.rsplit(":", 1)
+        config.cache_server = (host, int(port))
+    else:
+        config.cache_server = get_cache_server(config, restart)
+    if config.shards > 1:
+        crawler = DistributedCrawler(config, restart)
+    elif config.engine == "async":
+        crawler = AsyncCrawler(config, restart)
+    elif config.engine == "pipeline":
+        crawler = PipelineCrawler(config, restart)
+    else:
+        crawler = Crawler(config, restart)
+    if config.sitemaps == "robots" and config.shards <= 1:
+        ingest_sitemaps(config, crawler.frontier)
+    exporter = MetricsExporter(
+        snapshot_file=config.metrics_file or None, interval=config.metrics_interval,
+        port=config.metrics_port).start()
+    try:
+        crawler.start()
+    finally:
+        exporter.stop()
+        flush_logs()
 
 
 if __name__ == "__main__":
@@ -22,8 +51,9 @@ if __name__ == "__main__":
         parser = ArgumentParser()
         parser.add_argument("--restart", action="store_true", default=False)
         parser.add_argument("--config_file", type=str, default="config.ini")
+        parser.add_argument("--cache_server", type=str, default=None, help="host:port of a local cache server")
         args = parser.parse_args()
-        main(args.config_file, args.restart)
+        main(args.config_file, args.restart, args.cache_server)
         p.Parser.print_crawler_report()
     except:
         p.Parser.print_crawler_report()
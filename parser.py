@@ -1,7 +1,16 @@
-import tokenizer
+import extractors
+import os
 import re
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse, urljoin
+from collections import Counter
+from threading import RLock
+from urllib.parse import urljoin
+from corpus_stats import WordFrequencies, SketchWordFrequencies, load_stopwords
+from robots import RobotsCache, RobotsRules
+from utils import normalize
+from trap_detector import TrapDetector
+from content_gate import ContentGate
+
+STOPWORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stopwords.txt")
 
 
 class Parser:
@@ -10,70 +19,44 @@ class Parser:
         gathering data based on every page that is parsed.
     """
     pages_parsed = 0
+    skipped_pages = Counter()  # {tokenizer skip reason: pages whose words were not counted}
     unique_pages = set()
-    all_tokens = []
-    all_frequencies = {}  # all frequencies of words ignoring english stopwords
+    word_frequencies = WordFrequencies(load_stopwords(STOPWORDS_FILE))  # all frequencies of words ignoring english stopwords
     longest_page = ("", 0)  # {"URL": total_words}
     subdomains = {}  # {"http://vision.ics.uci.edu": 10}
-    URL_counter = {}
-    fingerprints = set() # keep track of each page's fingerprint for simhashing comparisons
-    politeness = {}
+    content_gate = ContentGate()  # keeps non-html and oversized bodies from the parser, set up by configure()
+    traps = TrapDetector()  # throttles outlinks that look like crawler traps, set up by configure()
+    fingerprints = None # FingerprintIndex of each page's fingerprint for simhashing comparisons, created in scraper.py
+    robots = RobotsCache()  # compiled robots.txt rules by host, shared by every worker
+    analytics = None  # AnalyticsStore that saves these statistics to disk, attached by the Frontier
+    lock = RLock()  # guards the static variables when several workers parse pages at once
+    extractor = "bs4"  # extractors.EXTRACTORS backend used to read pages, set by configure()
 
-    def __init__(self, url: str, content: str) -> None:
-        Parser.pages_parsed += 1
+    def __init__(self, url: str, content: str, extractor: str = None) -> None:
         self.url = url
         self.content = content
+        self.extractor = extractor or Parser.extractor
         self.page_links = []
-        self.soup = BeautifulSoup(self.content, 'html.parser')
-        self.tokens = []
+        self.token_counts = Counter()
+        self.hrefs = None
+        self.skip_reason = None  # set by extract() if the page's tokens were not kept
+
+
+    def extract(self) -> None:
+        """
+            Reads the page's token counts and the hrefs of its links in one pass, the first
+            time either is needed.
+        """
+        if self.hrefs is None:
+            self.token_counts, self.hrefs, self.skip_reason = extractors.extract(self.content, self.extractor)
 
 
     # EXTRA CREDIT +1 POINTS
-    def get_politeness_information(self) -> dict:
-        # Due to the limitation of accessing the robots.txt of each base domain directly without
-        # using the cache server, we have had to download these text files to local and perform 
-        # checking through them. 
-        """
-            Returns: a dictionary that contains allowed paths, disallowed paths, and the sitemap.
-        """
-        parsed_url = urlparse(self.url)
-        main_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-        # Check if this link's robots.txt has already been added to the dictionary for performance enhancement
-        if main_url not in Parser.politeness: 
-            robot_path = "DNE.txt"
-            if main_url.endswith("informatics.uci.edu"): # determining what robots.txt to check based on the url
-                robot_path = "./robots/informatics.txt"
-            elif main_url.endswith("cs.ics.uci.edu") or main_url.endswith("cs.uci.edu"):
-                robot_path = "./robots/cs.txt"
-            elif main_url.endswith("ics.uci.edu"):
-                robot_path = "./robots/ics.txt"
-            elif main_url.endswith("stat.uci.edu"):
-                robot_path = "./robots/stat.txt"
-            try:
-                # Reads robots.txt of the url and performs extracting disallowed links and allowed links
-                # Also extracts the sitemap and outputs all of the information into a dictionary
-                with open(robot_path, "r") as robot_file:
-                    robot_content = robot_file.readlines()
-                    parsed_dict = {'Allow': [], 'Disallow': [], 'Sitemap': ''}
-                    for line in robot_content:
-                        parts = line.split(' ')
-                        if len(parts) >= 2:
-                            value = parts[1]
-                            if line.startswith('Allow:'):
-                                parsed_dict['Allow'].append(f"{main_url}{value}")
-                            elif line.startswith('Disallow:'):
-                                parsed_dict['Disallow'].append(f"{main_url}{value}")
-                            elif line.startswith('Sitemap:'):
-                                parsed_dict['Sitemap'] = value
-                        else:
-                            continue
-                    Parser.politeness[main_url] = parsed_dict
-                    return parsed_dict
-            except FileNotFoundError:
-                print(f"{main_url} is an invalid link.")
-                return {}
-        else:
-            return Parser.politeness[main_url]
+    def get_politeness_information(self) -> RobotsRules:
+        """
+            Returns the robots.txt rules (and sitemaps) of this webpage's host.
+        """
+        return Parser.robots.rules(self.url)
 
 
     def get_links_from_webpage(self) -> list:
@@ -81,88 +64,143 @@ class Parser:
             Returns a list of all the valid links from a given webpage, making sure to 
             avoid trap links and abide by politeness rules.
         """
-        pln = self.get_politeness_information()
-        disallowed_links = pln['Disallow']
-        allowed_links = pln['Allow']
-        for link in self.soup.find_all('a', href=True):
-            href = link.get('href')
-            # Create an absolute URL from a possible relative URL and the base URL
-            absolute_url = urljoin(self.url, href)
-            parsed_url = urlparse(absolute_url)
-            # Reconstruct the URL without the fragment and path
-            bare_url = parsed_url._replace(fragment="", query="").geturl()
-            # Check Robots.txt first, if current link is disallowed, skip
-            is_allowed = True
-            for disallowed_link in disallowed_links:
-                # Certain paths are allowed despite that they consist the disallowed portion,
-                # we check if the allowed links consist the current link, then we proceed, otherwise, skip.
-                if disallowed_link in bare_url and bare_url not in allowed_links:
-                    is_allowed = False
-            # Crawler trap detection
-            if is_allowed:
-                if str(bare_url) not in self.URL_counter:
-                    Parser.URL_counter[str(bare_url)] = 1
-                else:
-                    Parser.URL_counter[str(bare_url)] += 1
-
-                if Parser.URL_counter[str(bare_url)] < 3:
-                    self.page_links.append(bare_url)
+        return Parser.filter_repeated_links(self.get_allowed_links())
+
+
+    def get_allowed_links(self) -> list:
+        """
+            Returns a list of the links on this webpage that robots.txt allows us to crawl.
+        """
+        self.extract()
+        for href in self.hrefs:
+            # Create an absolute URL from a possible relative URL and the base URL, in the
+            # canonical form the frontier stores (no fragment or tracking parameters)
+            try:
+                bare_url = normalize(urljoin(self.url, href))
+            except ValueError:  # malformed href, e.g. an unclosed IPv6 host
+                continue
+            # Check Robots.txt of the link's host, if current link is disallowed, skip
+            if Parser.robots.allowed(bare_url):
+                self.page_links.append(bare_url)
         return self.page_links
 
 
-    def tokenize_web_text(self) -> list:
+    @staticmethod
+    def filter_repeated_links(links: list) -> list:
         """
-            Returns a list of the tokens of the current web page.
+            Crawler trap detection: returns only the links that Parser.traps does not throttle
+            (links seen too often, repeating paths, and url patterns or hosts over budget).
         """
-        page_text = self.soup.get_text()
-        self.tokens = tokenizer.tokenize([line.strip() for line in page_text.split('\n') if line.strip()])
-        
-        # Check if this is the longest page
-        if len(self.tokens) > Parser.longest_page[1]:
-            Parser.longest_page = (self.url, len(self.tokens)) 
-        return self.tokens
+        with Parser.lock:
+            return [link for link in links if Parser.traps.allow(link)]
 
 
     def get_word_frequencies(self) -> dict:
         """
             Returns a dictionary that contains the word frequency information for the Parser's webpage
-            with the format {"url": frequency}
+            with the format {"url": frequency}. The tokens are counted as the page is read, without
+            a list of them.
         """
-        return tokenizer.compute_word_frequencies(self.tokens)
+        self.extract()
+        return self.token_counts
 
 
-    def update_unique_pages(self) -> None:
+    @staticmethod
+    def update_page_count(url: str, total_words: int) -> None:
+        """
+            Counts a parsed page, and checks if it is the longest page so far.
+        """
+        Parser.pages_parsed += 1
+        if total_words > Parser.longest_page[1]:
+            Parser.longest_page = (url, total_words)
+
+
+    @staticmethod
+    def update_skipped_pages(skip_reason: str) -> None:
         """
-            Checks if this parser's page has been looked parsed before, and updates the static set.
+            Counts a page whose words were not counted, by the reason it was skipped.
         """
-        if self.url not in self.unique_pages:
-            Parser.unique_pages.add(self.url)
+        Parser.skipped_pages[skip_reason] += 1
 
 
-    def update_subdomain(self) -> None:
+    @staticmethod
+    def update_unique_pages(url: str) -> None:
         """
-            Adds a new domain to the static dictionary of subdomains from this given parser object.
+            Checks if this page has been looked parsed before, and updates the static set.
         """
-        match = re.search(r'(?<=://)?([a-zA-Z0-9.-]+)\.ics\.uci\.edu', self.url)
+        if url not in Parser.unique_pages:
+            Parser.unique_pages.add(url)
+            if Parser.analytics is not None:
+                Parser.analytics.add_page(url)
+
+
+    @staticmethod
+    def update_subdomain(url: str) -> None:
+        """
+            Adds a new domain to the static dictionary of subdomains from the given page url.
+        """
+        match = re.search(r'(?<=://)?([a-zA-Z0-9.-]+)\.ics\.uci\.edu', url)
         if match is not None:
             domain = match.group(1) + '.ics.uci.edu'
             if domain in Parser.subdomains:
                 Parser.subdomains[domain] += 1
             else:
                 Parser.subdomains[domain] = 1
+            if Parser.analytics is not None:
+                Parser.analytics.add_subdomain(domain)
 
 
     @staticmethod
-    def get_all_word_frequencies() -> dict:
+    def configure(config) -> None:
         """
-            Returns a word frequency dictionary for all words seen so far, taking from
-            the static class variable 'tokens'.
+            Sets up the static statistics of the crawl from the crawler's Config object.
         """
-        with open("stopwords.txt", 'r') as stopwords_file:
-            stopwords = set(word.strip() for word in stopwords_file.readlines())
-            word_frequencies = tokenizer.compute_word_frequencies(Parser.all_tokens)
-            sorted_frequencies = tokenizer.print_frequencies(word_frequencies)
-            return {word: frequency for word, frequency in sorted_frequencies.items() if word not in stopwords}
+        if config.word_counts == "sketch":
+            Parser.word_frequencies = SketchWordFrequencies(load_stopwords(STOPWORDS_FILE))
+        Parser.content_gate = ContentGate(config.max_page_size, config.oversized_pages == "truncate")
+        Parser.traps = TrapDetector(
+            config.pattern_budget, config.host_budget, config.link_repeats,
+            config.segment_repeats, config.trap_memory)
+        Parser.configure_page_reading(config)
+
+
+    @staticmethod
+    def configure_page_reading(config) -> None:
+        """
+            Sets up how pages are read (extraction backend and robots.txt user agent). This is
+            all a process that only analyzes pages needs.
+        """
+        Parser.extractor = config.extractor
+        Parser.robots = RobotsCache(config.user_agent)
+
+
+    @staticmethod
+    def update_word_frequencies(token_counts: dict) -> None:
+        """
+            Adds a page's token counts to the word frequencies of the whole crawl.
+        """
+        page_counts = Parser.word_frequencies.add_page(token_counts)
+        if Parser.analytics is not None:
+            Parser.analytics.add_words(page_counts)
+
+
+    @staticmethod
+    def update_fingerprints(fingerprint: int) -> None:
+        """
+            Adds a page's simhash fingerprint to the fingerprints of the whole crawl.
+        """
+        Parser.fingerprints.add(fingerprint)
+        if Parser.analytics is not None:
+            Parser.analytics.add_fingerprint(fingerprint)
+
+
+    @staticmethod
+    def get_all_word_frequencies(limit: int = None) -> dict:
+        """
+            Returns a word frequency dictionary for all words seen so far (or the limit most
+            frequent ones), ordered by decreasing frequency and ignoring english stopwords.
+        """
+        return Parser.word_frequencies.top(limit)
 
 
     @staticmethod
@@ -182,6 +220,47 @@ class Parser:
         return Parser.longest_page
 
 
+    @staticmethod
+    def get_statistics() -> dict:
+        """
+            Returns the statistics of the crawl so far as a dictionary that can be sent to
+            another process, where merge_statistics() adds them to that process' report.
+            Fingerprints are left out, they only matter to the process that crawls.
+        """
+        with Parser.lock:
+            return {
+                "pages_parsed": Parser.pages_parsed,
+                "skipped_pages": Counter(Parser.skipped_pages),
+                "unique_pages": set(Parser.unique_pages),
+                "word_counts": dict(Parser.word_frequencies.counts),
+                "longest_page": Parser.longest_page,
+                "subdomains": dict(Parser.subdomains),
+                "content_gate": Parser.content_gate.totals(),
+                "throttled": Counter(Parser.traps.throttled),
+                "throttled_patterns": Counter(Parser.traps.throttled_patterns),
+            }
+
+
+    @staticmethod
+    def merge_statistics(statistics: dict) -> None:
+        """
+            Adds the statistics of another crawler process (from its get_statistics()) to
+            this one's. With WORDCOUNTS = sketch only each process' top words are merged.
+        """
+        with Parser.lock:
+            Parser.pages_parsed += statistics["pages_parsed"]
+            Parser.skipped_pages.update(statistics["skipped_pages"])
+            Parser.unique_pages.update(statistics["unique_pages"])
+            Parser.word_frequencies.add_counts(statistics["word_counts"])
+            if statistics["longest_page"][1] > Parser.longest_page[1]:
+                Parser.longest_page = statistics["longest_page"]
+            for domain, count in statistics["subdomains"].items():
+                Parser.subdomains[domain] = Parser.subdomains.get(domain, 0) + count
+            Parser.content_gate.add_totals(statistics["content_gate"])
+            Parser.traps.throttled.update(statistics["throttled"])
+            Parser.traps.throttled_patterns.update(statistics["throttled_patterns"])
+
+
     @staticmethod
     def print_crawler_report() -> None:
         """
@@ -189,14 +268,15 @@ class Parser:
             pages parsed, unique pages, longest page, and subdomains.
         """
         print("Top 50 word frequencies:")
-        _count = 0
-        for word, frequency in Parser.get_all_word_frequencies().items():
-            if _count < 50:
-                print(word, frequency)
-                _count += 1
-            else:
-                break
+        for word, frequency in Parser.get_all_word_frequencies(50).items():
+            print(word, frequency)
         print("Total pages parsed:", Parser.pages_parsed)
+        print("Pages skipped:", dict(Parser.skipped_pages))
+        for reason, (pages, size, seconds) in Parser.content_gate.report().items():
+            print(f"Bodies {reason}: {pages} pages, {size} bytes not parsed, about {seconds:.1f}s of parsing saved")
         print(f"Unique pages: {len(Parser.unique_pages)}")
         print(f"Longest page was {Parser.get_longest_page()[0]} with {Parser.get_longest_page()[1]} words")
         print(".ics.uci.edu Subdomains:", Parser.subdomains)
+        print("Links throttled as crawler traps:", dict(Parser.traps.throttled))
+        for pattern, throttled in Parser.traps.report():
+            print(pattern, throttled)
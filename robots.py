@@ -0,0 +1,218 @@
+import os
+import re
+from threading import Lock
+
+# Due to the limitation of accessing the robots.txt of each base domain directly without
+# using the cache server, the robots.txt files are saved in this folder.
+ROBOTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "robots")
+# (domain, file) pairs, the first domain a host is equal to or a subdomain of decides its file
+ROBOTS_FILES = [
+    ("informatics.uci.edu", "informatics.txt"),
+    ("cs.ics.uci.edu", "cs.txt"),
+    ("cs.uci.edu", "cs.txt"),
+    ("ics.uci.edu", "ics.txt"),
+    ("stat.uci.edu", "stat.txt"),
+]
+
+_PREFIX = object()  # trie key of a rule that matches every path starting with the node's prefix
+_EXACT = object()  # trie key of a rule ending in $, which only matches the node's prefix itself
+_URL_PARTS = re.compile(r'(?:[^:/?#]*:)?(?://([^/?#]*))?([^#]*)')  # host, path with query
+
+
+def split_url(url: str) -> tuple:
+    """
+        Returns (host, path) of an absolute url, where path includes the query and not the
+        fragment. Cheaper than urlparse for the one thing robots.txt checks need.
+    """
+    host, path = _URL_PARTS.match(url).groups()
+    if not path.startswith("/"):
+        path = "/" + path
+    return host, path
+
+
+def _compress(node: dict) -> dict:
+    # Turns a character trie into a radix trie: {first character: (label, child)}, where each
+    # label runs until the next rule or branch, so a lookup takes one step per label
+    compressed = {key: value for key, value in node.items() if key is _PREFIX or key is _EXACT}
+    for char, child in node.items():
+        if not isinstance(char, str):
+            continue
+        label = char
+        while len(child) == 1 and isinstance(next(iter(child)), str):
+            next_char, child = next(iter(child.items()))
+            label += next_char
+        compressed[char] = (label, _compress(child))
+    return compressed
+
+
+class RobotsRules:
+    """
+        The Allow and Disallow rules of one robots.txt for one user agent, compiled into a
+        radix trie. A path is checked by walking the trie once, so the time depends on
+        the length of the path and not on the number of rules. As in RFC 9309, the longest
+        matching rule decides, and Allow wins a tie. Rules with a * wildcard (rare) are
+        compiled to regular expressions and checked after the trie.
+    """
+
+    def __init__(self, rules: list = (), sitemaps: list = ()) -> None:
+        self.trie = {}  # character trie that add_rule builds
+        self.root = None  # compressed self.trie, built on the first check
+        self.wildcards = []  # (length, allow, compiled pattern)
+        self.sitemaps = list(sitemaps)
+        for allow, pattern in rules:
+            self.add_rule(allow, pattern)
+
+
+    @staticmethod
+    def parse(text: str, user_agent: str = "*") -> "RobotsRules":
+        """
+            Returns the rules in robots.txt text that apply to user_agent: those of the
+            groups naming it if there are any, otherwise those of the * groups.
+        """
+        agent = user_agent.lower()
+        named_rules, default_rules, sitemaps = [], [], []
+        group_agents, in_rules = [], False
+        for line in text.splitlines():
+            line = line.split("#", 1)[0].strip()
+            if ":" not in line:
+                continue
+            field, value = line.split(":", 1)
+            field, value = field.strip().lower(), value.strip()
+            if field == "user-agent":
+                if in_rules:
+                    # A user-agent line after rules starts a new group
+                    group_agents, in_rules = [], False
+                group_agents.append(value.lower())
+            elif field in ("allow", "disallow"):
+                in_rules = True
+                if not value:
+                    continue  # "Disallow:" with no path allows everything
+                rule = (field == "allow", value)
+                if any(name != "*" and name in agent for name in group_agents):
+                    named_rules.append(rule)
+                if "*" in group_agents:
+                    default_rules.append(rule)
+            elif field == "sitemap":
+                sitemaps.append(value)
+        return RobotsRules(named_rules or default_rules, sitemaps)
+
+
+    def add_rule(self, allow: bool, pattern: str) -> None:
+        """
+            Adds an Allow (allow=True) or Disallow rule for a path pattern.
+        """
+        exact = pattern.endswith("$")
+        path = pattern[:-1] if exact else pattern
+        if "*" in path:
+            regex = ".*".join(re.escape(part) for part in path.split("*"))
+            self.wildcards.append((len(pattern), allow, re.compile(regex + ("$" if exact else ""))))
+            return
+        node = self.trie
+        for char in path:
+            node = node.setdefault(char, {})
+        key = _EXACT if exact else _PREFIX
+        # Allow wins when the same pattern is both allowed and disallowed
+        node[key] = node.get(key, False) or allow
+        self.root = None
+
+
+    def compile(self) -> None:
+        """
+            Builds the radix trie that checks use from the rules added so far.
+        """
+        self.root = _compress(self.trie)
+
+
+    def allowed(self, url: str) -> bool:
+        """
+            Returns if the rules allow crawling the url.
+        """
+        return self.allowed_path(split_url(url)[1])
+
+
+    def allowed_path(self, path: str) -> bool:
+        """
+            Returns if the rules allow crawling a path (with its query, if any).
+        """
+        if self.root is None:
+            self.compile()
+        best_length, best_allow = -1, True
+        node = self.root
+        depth = 0
+        while True:
+            if _PREFIX in node:
+                best_length, best_allow = depth, node[_PREFIX]
+            if depth == len(path):
+                if _EXACT in node:
+                    best_length, best_allow = depth, node[_EXACT]
+                break
+            edge = node.get(path[depth])
+            if edge is None or not path.startswith(edge[0], depth):
+                break
+            depth += len(edge[0])
+            node = edge[1]
+        for length, allow, regex in self.wildcards:
+            if (length > best_length or (length == best_length and allow)) and regex.match(path):
+                best_length, best_allow = length, allow
+        return best_allow
+
+
+def robots_file(host: str) -> str:
+    """
+        Returns the path of the saved robots.txt for a host, or None if there is none.
+    """
+    host = host.lower().split(":", 1)[0]
+    for domain, file_name in ROBOTS_FILES:
+        if host == domain or host.endswith("." + domain):
+            return os.path.join(ROBOTS_DIR, file_name)
+    return None
+
+
+class RobotsCache:
+    """
+        Compiled RobotsRules by host, shared by every thread of the crawler. Each robots.txt
+        file is read and compiled once per process, however many hosts use it; a host without
+        a robots.txt allows everything.
+    """
+
+    def __init__(self, user_agent: str = "*") -> None:
+        self.user_agent = user_agent
+        self.lock = Lock()
+        self.by_host = {}
+        self.by_file = {}
+
+
+    def rules(self, url: str) -> RobotsRules:
+        """
+            Returns the RobotsRules for the host of the url.
+        """
+        return self._host_rules(split_url(url)[0])
+
+
+    def allowed(self, url: str) -> bool:
+        """
+            Returns if robots.txt allows crawling the url.
+        """
+        host, path = split_url(url)
+        return self._host_rules(host).allowed_path(path)
+
+
+    def _host_rules(self, host: str) -> RobotsRules:
+        rules = self.by_host.get(host)
+        if rules is None:
+            with self.lock:
+                rules = self.by_host[host] = self._load(robots_file(host))
+        return rules
+
+
+    def _load(self, path: str) -> RobotsRules:
+        if path not in self.by_file:
+            try:
+                with open(path, "r") as robot_file:
+                    rules = RobotsRules.parse(robot_file.read(), self.user_agent)
+            except (TypeError, FileNotFoundError):  # no saved robots.txt (path is None)
+                rules = RobotsRules()
+            # Compiled before other threads can see it, so they never compile it at once
+            rules.compile()
+            self.by_file[path] = rules
+        return self.by_file[path]
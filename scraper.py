@@ -1,6 +1,11 @@
-import re
+import simhash
+import time
+import tokenizer
+from collections import namedtuple
 from parser import Parser
-from urllib.parse import urlparse
+from fingerprint_index import FingerprintIndex
+from url_filter import UrlFilter
+from utils.metrics import METRICS
 
 ALLOWED_DOMAINS = [
     'ics.uci.edu',
@@ -9,13 +14,51 @@ ALLOWED_DOMAINS = [
     'stat.uci.edu'
 ]
 
+# Avoiding URLS with these file types
+BLOCKED_EXTENSIONS = {
+    "css", "js", "bmp", "gif", "jpg", "jpeg", "ico",
+    "png", "tif", "tiff", "mid", "mp2", "mp3", "mp4",
+    "txt", "ppsx", "nb", "r", "img", "war", "json", "pps",  # we added these
+    "wav", "avi", "mov", "mpeg", "ram", "m4v", "mkv", "ogg", "ogv", "pdf",
+    "ps", "eps", "tex", "ppt", "pptx", "doc", "docx", "xls", "xlsx", "names",
+    "data", "dat", "exe", "bz2", "tar", "msi", "bin", "7z", "psd", "dmg", "iso",
+    "epub", "dll", "cnf", "tgz", "sha1",
+    "thmx", "mso", "arff", "rtf", "jar", "csv",
+    "rm", "smil", "wmv", "swf", "wma", "zip", "rar", "gz",
+}
+
+# Built once and shared, is_valid runs for every link the crawler finds
+URL_FILTER = UrlFilter(ALLOWED_DOMAINS, BLOCKED_EXTENSIONS)
+
 SIMILARITY_THRESHOLD = 0.95  # Threshold for checking the similarity between two pages
+MIN_TOKENS = 100  # pages with fewer tokens than this are not counted
+
+# Fingerprints of every accepted page, indexed so near-duplicate checks do not scan all of them
+Parser.fingerprints = FingerprintIndex.from_similarity(SIMILARITY_THRESHOLD)
+
+METRICS.ratio("near duplicate rate", "near duplicates", "pages compared")
 
 
 # Parameters: url, resp
 # Returns each valid link that is present on the current webpage
 def scraper(url, resp) -> list:
-    return [link for link in extract_next_links(url, resp) if is_valid(link)]
+    return URL_FILTER.filter_many(extract_next_links(url, resp))
+
+
+# Parameters: a PageAnalysis from analyze_page
+# Same as scraper, for a page that was already analyzed (possibly in another process)
+def scrape_analyzed_page(analysis) -> list:
+    return URL_FILTER.filter_many(record_page(analysis))
+
+
+# Everything the crawl needs to know about a downloaded page: its token counts, fingerprint
+# and the links robots.txt allows. It holds no parse tree, so it is cheap to send between processes.
+# skip_reason is None, or the tokenizer reason the page's words were not counted.
+# page_bytes and parse_seconds feed the content gate's estimate of the parsing it saved, and
+# stage_seconds ((stage, seconds) pairs) the metrics, which live in the crawler's process.
+PageAnalysis = namedtuple("PageAnalysis", ["url", "total_words", "token_counts", "fingerprint", "links", "skip_reason",
+                                           "page_bytes", "parse_seconds", "stage_seconds"],
+                          defaults=[None, 0, 0.0, ()])
 
 
 def extract_next_links(url, resp) -> list:
@@ -29,118 +72,112 @@ def extract_next_links(url, resp) -> list:
         Input: url and resp object
         Returns a list of hyperlinks from the url
     """
-    if resp.status != 200:
+    content = page_content(resp)
+    if content is None:
         return list()
+    return record_page(analyze_page(url, content))
 
-    # Create new Parser for this webpage and extract the tokens from it
-    extractor = Parser(url, resp.raw_response.content)
-    page_tokens = extractor.tokenize_web_text()
 
-    # Ignores url that has less than 100 tokens
-    if (len(page_tokens)) < 100:
-        return list()
+def page_content(resp):
+    """
+        Input: resp object
+        Returns the content of the page, or None if there is no page to parse. Bodies that
+        are not html or are too large are turned away (or cut) by Parser.content_gate here,
+        before any parsing
+    """
+    if resp.status != 200 or resp.raw_response is None:
+        return None
+    return Parser.content_gate.check(resp.raw_response)
 
-    Parser.all_tokens.extend(page_tokens)
 
-    extractor.update_unique_pages()
-    extractor.update_subdomain()
+def analyze_page(url, content, extractor=None) -> PageAnalysis:
+    """
+        Input: url, page content and optionally the extractors backend to read it with
+        Returns the PageAnalysis of the page. Does not touch the crawl statistics on Parser,
+        so it can run in a separate process.
+    """
+    start = time.perf_counter()
+    analysis = _analyze_page(url, content, extractor)
+    return analysis._replace(page_bytes=len(content), parse_seconds=time.perf_counter() - start)
+
+
+def _analyze_page(url, content, extractor) -> PageAnalysis:
+    clock = time.perf_counter
+    start = clock()
+    # Create new Parser for this webpage and extract the tokens from it
+    extractor = Parser(url, content, extractor)
+    # Counted once as the page is read, for both the word frequencies and the fingerprint
+    token_counts = extractor.get_word_frequencies()
+    total_words = sum(token_counts.values())
+    stage_seconds = [("parse and tokenize", clock() - start)]
+
+    # Ignores url that has less than MIN_TOKENS tokens, or more than tokenizer.MAX_TOKENS
+    if extractor.skip_reason:
+        return PageAnalysis(url, total_words, None, None, [], extractor.skip_reason,
+                            stage_seconds=stage_seconds)
+    if total_words < MIN_TOKENS:
+        return PageAnalysis(url, total_words, None, None, [], tokenizer.TOO_FEW_TOKENS,
+                            stage_seconds=stage_seconds)
 
     # EXTRA CREDIT +2 POINTS
     # Performs check on similar websites based on their tokens using simhash algorithm from class
     # Current threshold is stored in SIMILARITY_THRESHOLD global variable
-    fingerprint = simhash(page_tokens)
+    start = clock()
+    fingerprint = simhash.fingerprint(token_counts)
+    stage_seconds.append(("simhash fingerprint", clock() - start))
 
-    for existing_fingerprint in Parser.fingerprints:
-        similarity = simhash_bit_comparison(fingerprint, existing_fingerprint)
-        if similarity >= SIMILARITY_THRESHOLD:
-            return list()
-
-    Parser.fingerprints.add(fingerprint)
+    start = clock()
+    links = extractor.get_allowed_links()
+    stage_seconds.append(("link resolution", clock() - start))
 
-    return extractor.get_links_from_webpage()
+    return PageAnalysis(url, total_words, token_counts, fingerprint, links, stage_seconds=stage_seconds)
 
 
-def simhash(tokens: list, max_hash_bits=64) -> str:
-    """
-        Input: token list and max_hash_bits value
-        Returns the fingerprint value based
+def record_page(analysis: PageAnalysis) -> list:
     """
-    vector_vals = [0] * max_hash_bits  # max length of vector is 64 bits (word length no less than that)
-    for token in tokens:
-        # Create a basic hash of each token
-
-        hash_value = 0
-        for char in token:
-            # multiply the hash value by 31,
-            # add the ASCII value of the character
-            # modulo the result by 2 to power of max_hash_bits to limit the hash_value
-            hash_value = (hash_value * 31 + ord(char)) % (2 ** max_hash_bits)
-
-        # generate the vector values iterate through every bit and for the current token if the hash bit value is 1
-        # we increase the sum at vector_vals by 1 else decrease by 1
-        for i in range(max_hash_bits):
-            bitmask = 1 << i
-            if hash_value & bitmask:
-                vector_vals[i] += 1
-            else:
-                vector_vals[i] -= 1
-
-    # Create the fingerprint for identifying a webpage
-    # If the ith component of the vector is positive, the fingerprint's ith bit is set to 1
-    # otherwise it remains 0
-    fingerprint = 0
-    for i in range(max_hash_bits):
-        if vector_vals[i] >= 0:
-            fingerprint |= (1 << i)
-
-    return bin(fingerprint)[2:]  # bin() returns a string "0b....." -> slicing gets rid of that
-
-
-def simhash_bit_comparison(s1: str, s2: str) -> float:
+        Input: PageAnalysis from analyze_page
+        Adds the page to the crawl statistics and returns its links, or an empty list
+        if the page is too short or a near duplicate of a page we already have
     """
-        Input: binary strings
-        Returns the percentage of similar bits between the binary numbers.
-    """
-    min_len = min(len(s1), len(s2))
-    max_len = max(len(s1), len(s2))
-    count_similar_bits = 0
+    # Several workers can get here at once, so the statistics and the near-duplicate
+    # check are updated together under the Parser lock
+    Parser.content_gate.record_parse(analysis.page_bytes, analysis.parse_seconds)
+    for stage, seconds in analysis.stage_seconds:
+        METRICS.observe(stage, seconds)
+    METRICS.count("pages analyzed")
+    with Parser.lock:
+        if analysis.url in Parser.unique_pages:
+            # Recrawled because its sitemap lastmod changed: the page was counted the
+            # first time, only the links it has now are wanted
+            return Parser.filter_repeated_links(analysis.links)
+
+        Parser.update_page_count(analysis.url, analysis.total_words)
+
+        # Ignores url that has too few or too many tokens
+        if analysis.token_counts is None:
+            Parser.update_skipped_pages(analysis.skip_reason)
+            return list()
+
+        Parser.update_word_frequencies(analysis.token_counts)
+
+        Parser.update_unique_pages(analysis.url)
+        Parser.update_subdomain(analysis.url)
+
+        with METRICS.time("near duplicate check"):
+            duplicate = Parser.fingerprints.contains_near(analysis.fingerprint)
+        METRICS.count("pages compared")
+        if duplicate:
+            METRICS.count("near duplicates")
+            return list()
 
-    # Count the number of bits that are the same for the binary strings
-    for i in range(min_len):
-        if s1[i] == s2[i]:
-            count_similar_bits += 1
+        Parser.update_fingerprints(analysis.fingerprint)
 
-    # Calculate similarity percentage
-    return count_similar_bits / max_len
+    return Parser.filter_repeated_links(analysis.links)
 
 
 def is_valid(url):
     # Decide whether to crawl this url or not.
     # If you decide to crawl it, return True; otherwise return False.
-    # There are already some conditions that return False.
-    try:
-        parsed = urlparse(url)
-
-        # Only allow subdomains and domains that are allowed
-        domain_matches = any(domain for domain in ALLOWED_DOMAINS if parsed.netloc.endswith(domain))
-        if not domain_matches:
-            return False
-
-        if parsed.scheme not in set(["http", "https"]):
-            return False
-
-        # Avoiding URLS with these file types
-        return not re.match(
-            r".*\.(css|js|bmp|gif|jpe?g|ico"
-            + r"|png|tiff?|mid|mp2|mp3|mp4"
-            + r"|txt|ppsx|nb|r|img|war|json|pps"  # we added these
-            + r"|wav|avi|mov|mpeg|ram|m4v|mkv|ogg|ogv|pdf"
-            + r"|ps|eps|tex|ppt|pptx|doc|docx|xls|xlsx|names"
-            + r"|data|dat|exe|bz2|tar|msi|bin|7z|psd|dmg|iso"
-            + r"|epub|dll|cnf|tgz|sha1"
-            + r"|thmx|mso|arff|rtf|jar|csv"
-            + r"|rm|smil|wmv|swf|wma|zip|rar|gz)$", parsed.path.lower())
-
-    except TypeError:
-        print("TypeError for ", parsed)
-        raise
+    # Only http(s) urls on the allowed domains (and their subdomains) that are not
+    # one of the BLOCKED_EXTENSIONS file types are crawled.
+    return URL_FILTER.is_valid(url)
@@ -0,0 +1,120 @@
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # the pure Python path below gives the same fingerprints, just slower
+    np = None
+
+
+_MASK64 = (1 << 64) - 1
+_CHUNK_SIZE = 1024  # tokens hashed together; chunks are padded only to their own longest token
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """
+        Returns the number of bits that differ between two integer fingerprints.
+    """
+    return bin(a ^ b).count("1")
+
+
+def similarity(a: int, b: int, max_hash_bits=64) -> float:
+    """
+        Returns the fraction of bits that are the same in two fingerprints.
+    """
+    return (max_hash_bits - hamming_distance(a, b)) / max_hash_bits
+
+
+def _mix(value: int) -> int:
+    # 64-bit finalizer from MurmurHash3, spreads short tokens across all the bits
+    value ^= value >> 33
+    value = (value * 0xFF51AFD7ED558CCD) & _MASK64
+    value ^= value >> 33
+    value = (value * 0xC4CEB9FE1A85EC53) & _MASK64
+    value ^= value >> 33
+    return value
+
+
+def _hash_tokens_python(tokens: list, compat: bool) -> list:
+    hashes = []
+    for token in tokens:
+        hash_value = 0
+        for char in token:
+            hash_value = (hash_value * 31 + ord(char)) & _MASK64
+        hashes.append(hash_value if compat else _mix(hash_value))
+    return hashes
+
+
+def _hash_tokens_numpy(tokens: list, compat: bool):
+    # Tokens are sorted by length so each chunk pads to a similar length. Padding on the left with
+    # NUL characters leaves the polynomial hash unchanged (0 * 31 + 0 stays 0), so every token in a
+    # chunk is hashed at once with one multiply-add per character column.
+    order = sorted(range(len(tokens)), key=lambda i: len(tokens[i]))
+    hashes = np.zeros(len(tokens), dtype=np.uint64)
+    for start in range(0, len(order), _CHUNK_SIZE):
+        chunk = order[start:start + _CHUNK_SIZE]
+        width = len(tokens[chunk[-1]])
+        if width == 0:
+            continue
+        padded = "".join(tokens[i].rjust(width, "\0") for i in chunk)
+        chars = np.frombuffer(padded.encode("utf-32-le"), dtype=np.uint32).reshape(len(chunk), width)
+        chunk_hashes = np.zeros(len(chunk), dtype=np.uint64)
+        for column in range(width):
+            chunk_hashes = chunk_hashes * np.uint64(31) + chars[:, column]
+        hashes[chunk] = chunk_hashes
+
+    if not compat:
+        hashes ^= hashes >> np.uint64(33)
+        hashes *= np.uint64(0xFF51AFD7ED558CCD)
+        hashes ^= hashes >> np.uint64(33)
+        hashes *= np.uint64(0xC4CEB9FE1A85EC53)
+        hashes ^= hashes >> np.uint64(33)
+    return hashes
+
+
+def fingerprint(tokens: list, max_hash_bits=64, compat=False, use_numpy=True) -> int:
+    """
+        Input: token list (or a {token: count} mapping) and max_hash_bits value (at most 64)
+        Returns the simhash fingerprint of the tokens as an int.
+
+        Tokens are counted first, so every distinct token is hashed once and weighted by its
+        frequency in the page. With compat=True the token hash is the old per-character
+        polynomial hash from scraper.py, which gives the same fingerprint the old string
+        version did (as an int). Otherwise the hash is mixed so that every bit is used.
+    """
+    if not 0 < max_hash_bits <= 64:
+        raise ValueError("max_hash_bits must be between 1 and 64")
+    counts = Counter(tokens)
+    unique_tokens = list(counts)
+    bit_mask = (1 << max_hash_bits) - 1
+
+    if np is not None and use_numpy:
+        hashes = _hash_tokens_numpy(unique_tokens, compat) & np.uint64(bit_mask)
+        weights = np.fromiter(counts.values(), dtype=np.int64, count=len(unique_tokens))
+        positions = np.arange(max_hash_bits, dtype=np.uint64)
+        # Row i holds the bits of token i's hash; the weighted column sums count the set bits
+        bit_matrix = ((hashes[:, None] >> positions) & np.uint64(1)).astype(np.int64)
+        set_weights = weights @ bit_matrix
+        # A bit is +weight when set and -weight when not, so the vector is 2 * set - total
+        vector_vals = 2 * set_weights - int(weights.sum())
+        fingerprint_value = 0
+        for i in np.flatnonzero(vector_vals >= 0):
+            fingerprint_value |= 1 << int(i)
+        return fingerprint_value
+
+    vector_vals = [0] * max_hash_bits
+    total_weight = 0
+    for hash_value, weight in zip(_hash_tokens_python(unique_tokens, compat), counts.values()):
+        hash_value &= bit_mask
+        total_weight += weight
+        i = 0
+        while hash_value:
+            if hash_value & 1:
+                vector_vals[i] += weight
+            hash_value >>= 1
+            i += 1
+
+    fingerprint_value = 0
+    for i in range(max_hash_bits):
+        if 2 * vector_vals[i] - total_weight >= 0:
+            fingerprint_value |= 1 << i
+    return fingerprint_value
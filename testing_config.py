@@ -0,0 +1,46 @@
+import os
+from configparser import ConfigParser
+
+from utils.config import Config
+
+# The config.ini the tests run with, by section. Unlike the shipped config.ini it
+# keeps no state on disk (no analytics, metrics or record file) and does not wait
+# between downloads.
+SETTINGS = {
+    "IDENTIFICATION": {"USERAGENT": "IR test"},
+    "CONNECTION": {
+        "HOST": "localhost", "PORT": "9000", "CONNECTTIMEOUT": "2", "READTIMEOUT": "5",
+        "RETRIES": "2", "BACKOFF": "0.01", "MAXBODYSIZE": "1000000"},
+    "LOCAL PROPERTIES": {
+        "SAVE": "frontier.shelve", "SAVEFORMAT": "shelve", "SAVEBATCH": "1", "SAVEINTERVAL": "5",
+        "THREADCOUNT": "1", "SCHEDULER": "lifo", "ENGINE": "threads", "MAXINFLIGHT": "100",
+        "EXTRACTOR": "bs4", "PARSEPROCESSES": "1", "PARSEQUEUE": "64", "SHARDS": "1",
+        "FORWARDBATCH": "100", "WORDCOUNTS": "exact", "ANALYTICS": "", "METRICSFILE": "",
+        "METRICSINTERVAL": "10", "METRICSPORT": "0", "RECORD": "", "LOGSAMPLE": "1", "LOGRATE": "0"},
+    "CRAWLER": {
+        "SEEDURL": "https://www.ics.uci.edu", "POLITENESS": "0", "SITEMAPS": "none",
+        "SITEMAPURLS": "100000", "RATECEILING": "30", "RATELATENCY": "2", "PATTERNBUDGET": "500",
+        "HOSTBUDGET": "0", "LINKREPEATS": "3", "SEGMENTREPEATS": "2", "TRAPMEMORY": "100000",
+        "MAXPAGESIZE": "2000000", "OVERSIZEDPAGES": "truncate"},
+}
+OPTION_SECTIONS = {option: section for section, options in SETTINGS.items() for option in options}
+OPTION_SECTIONS["RATEFLOOR"] = "CRAWLER"  # not in SETTINGS, so it follows POLITENESS
+
+
+def make_config(directory="", cache_server=None, **options):
+    ''' Returns the Config of SETTINGS with options changed, by their config.ini name
+    (SCHEDULER="polite"; a list is joined with commas, as SEEDURL takes it). The SAVE,
+    ANALYTICS, METRICSFILE and RECORD files are put in directory. '''
+    cparser = ConfigParser()
+    cparser.read_dict(SETTINGS)
+    for option, value in options.items():
+        if isinstance(value, (list, tuple)):
+            value = ",".join(value)
+        cparser[OPTION_SECTIONS[option]][option] = str(value)
+    for option in ("SAVE", "ANALYTICS", "METRICSFILE", "RECORD"):
+        path = cparser["LOCAL PROPERTIES"][option]
+        if path:
+            cparser["LOCAL PROPERTIES"][option] = os.path.join(directory, path)
+    config = Config(cparser)
+    config.cache_server = cache_server
+    return config
@@ -1,46 +1,90 @@
 import re
+from collections import Counter
+from itertools import chain
 
+MAX_TOKENS = 10000  # pages with more tokens than this are skipped
+# Tokens are runs of ascii letters and digits in the lowercased text
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+TOKEN_CHARACTERS = "abcdefghijklmnopqrstuvwxyz0123456789"
+CHUNK_SIZE = 64 * 1024  # characters of a line lowercased and tokenized at a time
 
-def tokenize(lines: list) -> list:
+# Why a page's tokens were not kept
+TOO_MANY_TOKENS = "too many tokens"
+TOO_FEW_TOKENS = "too few tokens"
+
+
+def _token_lists(lines):
+    # Yields the tokens of the lines a list at a time: one per line, or per chunk of a long
+    # line, which keeps the per token work inside re.findall
+    for line in lines:
+        if isinstance(line, bytes):
+            # Only ascii bytes can be part of a token, latin-1 keeps them and never fails
+            line = line.decode("latin-1")
+        if len(line) <= CHUNK_SIZE:
+            yield TOKEN_PATTERN.findall(line.lower())
+            continue
+        tail = ""  # end of the previous chunk, which may be the start of a longer token
+        for start in range(0, len(line), CHUNK_SIZE):
+            text = tail + line[start:start + CHUNK_SIZE].lower()
+            cut = len(text.rstrip(TOKEN_CHARACTERS))
+            tail = text[cut:]
+            yield TOKEN_PATTERN.findall(text, 0, cut)
+        if tail:
+            yield [tail]
+
+
+def iter_tokens(lines):
+    """
+        Yields the tokens of each line (str, or bytes of an ascii compatible encoding) in
+        order, lowercased. Long lines are read CHUNK_SIZE characters at a time, so a caller
+        that stops early does not pay for the rest of the page, even if it is one line.
+    """
+    return chain.from_iterable(_token_lists(lines))
+
+
+def tokenize(lines: list, max_tokens: int = MAX_TOKENS) -> list:
     """
-        Reads in a text file and returns a list of the tokens in that file.
+        Returns a list of the tokens in the lines, or an empty list if there are more than
+        max_tokens of them.
 
-        This function runs in O(n log n) time, where n is the number of words in the file.
-        Putting the tokens into a list will take O(n) time, for looping over n words in the file.
-        Python builtin sorted() function will run in O(n log n) time using Timsort.
+        This function runs in O(n) time, where n is the length of the text up to the line
+        (or CHUNK_SIZE piece of a line) where the token count goes over max_tokens, where
+        reading stops.
     """
     tokens = []
+    for token_list in _token_lists(lines):
+        tokens.extend(token_list)
+        if len(tokens) > max_tokens:
+            return []
+    return tokens
 
-    try:
-        for line in lines:
-            line_tokens = re.findall(r'[a-zA-Z0-9]+', line.lower())
-            if len(tokens) > 10000:
-                return []
-            for token in line_tokens:
-                tokens.append(token)
 
-    except Exception as e:
-        raise e
+def count_tokens(lines, max_tokens: int = MAX_TOKENS) -> tuple:
+    """
+        Counts the tokens in the lines without keeping a list of them. Returns (counts,
+        skip_reason): a Counter of the tokens and None, or an empty Counter and
+        TOO_MANY_TOKENS if there are more than max_tokens tokens.
 
-    return tokens
+        This function runs in O(n) time, like tokenize.
+    """
+    counts = Counter()
+    total = 0
+    for token_list in _token_lists(lines):
+        total += len(token_list)
+        if total > max_tokens:
+            return Counter(), TOO_MANY_TOKENS
+        counts.update(token_list)
+    return counts, None
 
 
 def compute_word_frequencies(tokens: list[str]) -> dict:
     """
         Counts the number of occurrences of each token in the token list.
 
-        This function will run in O(n * m) time, where n is the number of tokens in the parameter list and
-        m is the number of words in the frequencies dictionary.
-        for n tokens, each token is checked with the m words in the frequencies dictionary, resulting in n * m complexity.
+        This function runs in O(n) time, where n is the number of tokens in the parameter list:
+        Counter counts them in one pass with a single hash lookup per token.
     """
-    frequencies = {}
-    for token in tokens:
-        if token in frequencies.keys():
-            frequencies[token] += 1
-        else:
-            frequencies.update({token: 1})
-
-    return frequencies
+    return Counter(tokens)
 
 
 def print_frequencies(frequencies: dict) -> dict:
@@ -53,4 +97,3 @@ def print_frequencies(frequencies: dict) -> dict:
         for n word and frequency pairs in the sorted dictionary, each word and frequency is printed to output.
     """
     return {key: value for key, value in sorted(frequencies.items(), key=lambda x: (-x[1], x[0]))}
-
@@ -0,0 +1,172 @@
+import re
+from collections import Counter, OrderedDict
+
+_DATE = re.compile(r'(?<![0-9])(?:19|20)[0-9]{2}([-/_]?)(?:0[1-9]|1[0-2])(?:\1(?:0[1-9]|[12][0-9]|3[01]))?(?![0-9])')
+_NUMBER = re.compile(r'[0-9]+')
+_URL_PARTS = re.compile(r'(?:[^:/?#]*:)?(?://([^/?#]*))?([^?#]*)(?:\?([^#]*))?')
+
+REPORT_SIZE = 1000  # throttled patterns remembered for the report
+
+
+class LruCounter:
+    """
+        Counts for at most `capacity` keys. When a new key would go over capacity, the key
+        that was counted least recently is forgotten, so memory stays flat however long
+        the crawl runs and counts of keys that stop showing up decay away.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.counts = OrderedDict()
+        self.evicted = None  # the key the last add() forgot, if any
+
+
+    def get(self, key) -> int:
+        return self.counts.get(key, 0)
+
+
+    def add(self, key, amount: int = 1) -> int:
+        """
+            Adds amount to the key's count and returns the new count.
+        """
+        count = self.counts.pop(key, 0) + amount
+        self.counts[key] = count
+        self.evicted = None
+        if len(self.counts) > self.capacity:
+            self.evicted = self.counts.popitem(last=False)[0]
+        return count
+
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+def url_template(url: str) -> str:
+    """
+        Returns the pattern of a url: its host and path with dates replaced by <date> and
+        other numbers by <n>, and the sorted names (not values) of its query parameters.
+        Pages of a calendar or of endless pagination all share one pattern.
+    """
+    host, path, query = _URL_PARTS.match(url).groups()
+    path = _NUMBER.sub("<n>", _DATE.sub("<date>", path))
+    template = f"{(host or '').lower()}{path}"
+    if query:
+        names = sorted(set(param.split("=", 1)[0] for param in query.split("&") if param))
+        template += "?" + "&".join(_NUMBER.sub("<n>", name) for name in names)
+    return template
+
+
+def repeated_segment(url: str, limit: int) -> bool:
+    """
+        Returns True if a path segment occurs more than limit times (/a/b/a/b/a/b), the
+        shape of links that relative hrefs keep extending.
+    """
+    path = _URL_PARTS.match(url).group(2)
+    segments = Counter(segment for segment in path.split("/") if segment)
+    return bool(segments) and max(segments.values()) > limit
+
+
+class TrapDetector:
+    """
+        Decides which outlinks are worth sending to the frontier, in bounded memory.
+
+        A link is throttled if:
+        - it was already seen link_repeats times (recently, see LruCounter),
+        - a segment repeats in its path more than segment_repeats times,
+        - its url pattern (url_template) already produced pattern_budget new links,
+        - or its host already produced host_budget new links (0 for no limit).
+        Budgets count new links, so a navigation link on every page only counts once.
+        Counts for at most max_tracked links and patterns are kept.
+    """
+
+    def __init__(self, pattern_budget: int = 500, host_budget: int = 0, link_repeats: int = 3,
+                 segment_repeats: int = 2, max_tracked: int = 100_000) -> None:
+        self.pattern_budget = pattern_budget
+        self.host_budget = host_budget
+        self.link_repeats = link_repeats
+        self.segment_repeats = segment_repeats
+        self.links = LruCounter(max_tracked)
+        self.patterns = LruCounter(max_tracked)
+        self.hosts = LruCounter(max_tracked)
+        self.throttled = Counter()  # {reason: links throttled}
+        self.throttled_patterns = Counter()  # {pattern: links throttled}, at most REPORT_SIZE
+        # Patterns changed since take_changes(), once it is first called, in the order they
+        # were last counted (a dict used as an ordered set)
+        self.changed_patterns = None
+
+
+    def allow(self, url: str) -> bool:
+        """
+            Counts an outlink, and returns True if it should be crawled.
+        """
+        seen = self.links.add(url)
+        if seen >= self.link_repeats:
+            self.throttled["repeated link"] += 1
+            return False
+        if seen > 1:
+            return True  # counted against its budgets the first time
+        pattern = url_template(url)
+        if repeated_segment(url, self.segment_repeats):
+            return self._throttle(url, "repeated path segment", pattern)
+        if self.patterns.get(pattern) >= self.pattern_budget:
+            return self._throttle(url, "pattern budget", pattern)
+        host = _URL_PARTS.match(url).group(1)
+        if self.host_budget and self.hosts.get(host) >= self.host_budget:
+            return self._throttle(url, "host budget", pattern)
+        self.patterns.add(pattern)
+        self.hosts.add(host)
+        if self.changed_patterns is not None:
+            if self.patterns.evicted is not None:
+                self.changed_patterns[self.patterns.evicted] = None
+            self.changed_patterns.pop(pattern, None)
+            self.changed_patterns[pattern] = None
+        return True
+
+
+    def _throttle(self, url: str, reason: str, pattern: str) -> bool:
+        # Later sightings of the link are throttled right away as repeats
+        self.links.add(url, self.link_repeats)
+        self.throttled[reason] += 1
+        self.throttled_patterns[pattern] += 1
+        if self.changed_patterns is not None:
+            self.changed_patterns.setdefault(pattern)
+        if len(self.throttled_patterns) > REPORT_SIZE:
+            # Keep the report bounded by dropping the least throttled pattern
+            dropped = min(self.throttled_patterns, key=self.throttled_patterns.get)
+            del self.throttled_patterns[dropped]
+            if self.changed_patterns is not None:
+                self.changed_patterns.setdefault(dropped)
+        return False
+
+
+    def take_changes(self) -> list:
+        """
+            Returns (pattern, new links, throttled links) for each pattern that changed since
+            the last call, about in the order they were last counted, for saving the detector's
+            state. A pattern the detector has forgotten
+            comes with both counts 0, so at most max_tracked + REPORT_SIZE patterns are ever
+            saved. Call it holding the lock that guards allow() (Parser.lock), so no change
+            is lost while the set is swapped.
+        """
+        changed, self.changed_patterns = self.changed_patterns, dict()
+        changes = [(pattern, self.patterns.get(pattern), self.throttled_patterns.get(pattern, 0))
+                   for pattern in list(changed or ())]
+        return changes
+
+
+    def restore(self, pattern: str, count: int, throttled: int) -> None:
+        """
+            Restores a pattern's counts saved from take_changes() by an earlier run. Restoring
+            patterns in the order they last changed keeps the most recent ones counted.
+        """
+        if count:
+            self.patterns.add(pattern, count)
+        if throttled:
+            self.throttled_patterns[pattern] += throttled
+
+
+    def report(self, limit: int = 20) -> list:
+        """
+            Returns the limit most throttled patterns as (pattern, throttled links) pairs.
+        """
+        return self.throttled_patterns.most_common(limit)
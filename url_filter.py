@@ -0,0 +1,101 @@
+import re
+
+# scheme, netloc and path of an absolute url
+_URL_PARTS = re.compile(r'([a-zA-Z][a-zA-Z0-9+.-]*)://([^/?#]*)([^?#]*)')
+_END = object()  # domain trie key marking the end of an allowed domain
+HOST_CACHE_SIZE = 100_000  # hosts whose domain check is remembered
+
+
+class UrlFilter:
+    """
+        Decides which urls the crawler may download: http(s) urls on an allowed domain or
+        one of its subdomains, whose path does not end in a blocked file extension.
+
+        Everything is prepared once: domains go into a trie of their labels in reverse
+        (edu -> uci -> ics), so "evilics.uci.edu" does not pass as "ics.uci.edu", and
+        extensions into a set that the text after the path's last dot (leaving out any
+        ;parameters) is looked up in.
+    """
+
+    def __init__(self, domains: list, extensions: set, schemes: set = frozenset(["http", "https"])) -> None:
+        self.domains = {}
+        for domain in domains:
+            node = self.domains
+            for label in reversed(domain.lower().split(".")):
+                node = node.setdefault(label, {})
+            node[_END] = True
+        self.extensions = frozenset(extension.lower() for extension in extensions)
+        self.schemes = frozenset(schemes)
+        self.host_cache = {}  # {host: allowed}, most links of a page share a few hosts
+
+
+    def host_allowed(self, host: str) -> bool:
+        """
+            Returns if the host is one of the allowed domains or a subdomain of one.
+        """
+        allowed = self.host_cache.get(host)
+        if allowed is None:
+            allowed = False
+            node = self.domains
+            for label in reversed(host.split(".")):
+                node = node.get(label)
+                if node is None:
+                    break
+                if _END in node:
+                    allowed = True
+                    break
+            if len(self.host_cache) >= HOST_CACHE_SIZE:
+                self.host_cache.clear()
+            self.host_cache[host] = allowed
+        return allowed
+
+
+    def is_valid(self, url: str) -> bool:
+        """
+            Returns if the crawler may download the url.
+        """
+        match = _URL_PARTS.match(url)
+        if match is None:
+            return False
+        scheme, netloc, path = match.groups()
+        if scheme.lower() not in self.schemes:
+            return False
+        # Drop any user name and port, host names are case insensitive
+        host = netloc.rpartition("@")[2].partition(":")[0].lower()
+        if not self.host_allowed(host):
+            return False
+        # Parameters of the last segment (/paper.pdf;jsessionid=1) are not part of its
+        # extension, as urlparse splits them from the path
+        semicolon = path.find(";", path.rfind("/") + 1)
+        if semicolon >= 0:
+            path = path[:semicolon]
+        dot = path.rfind(".")
+        return dot < 0 or path[dot + 1:].lower() not in self.extensions
+
+
+    def filter_many(self, urls) -> list:
+        """
+            Returns the urls the crawler may download, in their original order.
+        """
+        # is_valid with its lookups bound to locals once for the whole batch
+        match_url, schemes, extensions = _URL_PARTS.match, self.schemes, self.extensions
+        host_cache, host_allowed = self.host_cache, self.host_allowed
+        valid = []
+        for url in urls:
+            match = match_url(url)
+            if match is None:
+                continue
+            scheme, netloc, path = match.groups()
+            if scheme not in schemes and scheme.lower() not in schemes:
+                continue
+            host = netloc.rpartition("@")[2].partition(":")[0].lower()
+            allowed = host_cache.get(host)
+            if not (allowed or (allowed is None and host_allowed(host))):
+                continue
+            semicolon = path.find(";", path.rfind("/") + 1)
+            if semicolon >= 0:
+                path = path[:semicolon]
+            dot = path.rfind(".")
+            if dot < 0 or path[dot + 1:].lower() not in extensions:
+                valid.append(url)
+        return valid
@@ -1,25 +1,19 @@
-import os
-import logging
+import re
 from hashlib import sha256
-from urllib.parse import urlparse
-
-def get_logger(name, filename=None):
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    if not os.path.exists("Logs"):
-        os.makedirs("Logs")
-    fh = logging.FileHandler(f"Logs/{filename if filename else name}.log")
-    fh.setLevel(logging.DEBUG)
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.INFO)
-    formatter = logging.Formatter(
-       "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-    fh.setFormatter(formatter)
-    ch.setFormatter(formatter)
-    # add the handlers to the logger
-    logger.addHandler(fh)
-    logger.addHandler(ch)
-    return logger
+from string import ascii_letters, digits
+from urllib.parse import urlparse, urlsplit, urlunsplit, unquote_plus
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+# Query parameters that only track where a visitor came from, or point at another view
+# (share buttons, calendar exports, comment replies) of the same page
+IGNORED_QUERY_PARAMS = frozenset([
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "_ga", "_gl",
+    "share", "replytocom", "ical", "outlook-ical"])
+IGNORED_QUERY_PREFIXES = ("utm_",)
+_UNRESERVED = frozenset(ascii_letters + digits + "-._~")
+_PERCENT_ESCAPE = re.compile(r'%([0-9A-Fa-f]{2})')
+
+from utils.logs import get_logger, configure_logging, flush_logs, PER_URL
 
 
 def get_urlhash(url):
@@ -29,7 +23,53 @@ def get_urlhash(url):
         f"{parsed.netloc}/{parsed.path}/{parsed.params}/"
         f"{parsed.query}/{parsed.fragment}".encode("utf-8")).hexdigest()
 
+def _normalize_escapes(text):
+    # Decodes escaped unreserved characters (%7E -> ~) and uppercases the other escapes
+    def replace(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in _UNRESERVED else "%" + match.group(1).upper()
+    return _PERCENT_ESCAPE.sub(replace, text)
+
+
+def _remove_dot_segments(path):
+    # Resolves "." and ".." path segments (RFC 3986 section 5.2.4)
+    segments = path.split("/")
+    output = []
+    for segment in segments:
+        if segment == "..":
+            if len(output) > 1:
+                output.pop()
+        elif segment != ".":
+            output.append(segment)
+    if segments[-1] in (".", ".."):
+        output.append("")
+    return "/".join(output)
+
+
+def _normalize_query(query):
+    # Drops IGNORED_QUERY_PARAMS and sorts the rest, so parameter order does not matter
+    params = []
+    for param in query.split("&"):
+        name = unquote_plus(param.split("=", 1)[0]).lower()
+        if not param or name in IGNORED_QUERY_PARAMS or name.startswith(IGNORED_QUERY_PREFIXES):
+            continue
+        params.append(_normalize_escapes(param))
+    return "&".join(sorted(params))
+
+
 def normalize(url):
-    if url.endswith("/"):
-        return url.rstrip("/")
-    return url
+    """ Returns the canonical form of a url, so different spellings of the same page
+    are only crawled once: lowercase scheme and host, no default port, no fragment,
+    "." and ".." segments resolved, escapes of unreserved characters decoded, no
+    trailing slash, and the query sorted without tracking parameters. """
+    parsed = urlsplit(url.strip())
+    scheme = parsed.scheme.lower()
+    userinfo, _, host = parsed.netloc.rpartition("@")
+    host, _, port = host.partition(":")
+    netloc = host.lower().rstrip(".")
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc += f":{port}"
+    if userinfo:
+        netloc = f"{userinfo}@{netloc}"
+    path = _remove_dot_segments(_normalize_escapes(parsed.path)).rstrip("/")
+    return urlunsplit((scheme, netloc, path, _normalize_query(parsed.query), ""))
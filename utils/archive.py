@@ -0,0 +1,76 @@
+import sqlite3
+import time
+
+from threading import Lock
+from weakref import WeakValueDictionary
+
+
+class ResponseArchive(object):
+    ''' Cache server replies saved by url in a SQLite file, exactly as the cache server
+    sent them (cbor), so a recorded crawl can be served again by the stub cache server
+    (ReplaySite) without the real one.
+
+    Recording keeps the latest reply of each url and commits every commit_every
+    replies and on flush() or close(), so a crash loses at most that many. '''
+
+    def __init__(self, path, commit_every=100):
+        self.path = path
+        self.commit_every = commit_every
+        self.lock = Lock()
+        self.uncommitted = 0
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS replies ("
+            "url TEXT PRIMARY KEY, recorded REAL, reply BLOB)")
+        self.db.commit()
+
+    def put(self, url, reply):
+        ''' Saves the cbor reply the cache server sent for url. '''
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO replies (url, recorded, reply) VALUES (?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET recorded = excluded.recorded, reply = excluded.reply",
+                (url, time.time(), bytes(reply)))
+            self.uncommitted += 1
+            if self.uncommitted >= self.commit_every:
+                self.db.commit()
+                self.uncommitted = 0
+
+    def get(self, url):
+        ''' Returns the recorded reply for url, or None if it was not recorded. '''
+        with self.lock:
+            row = self.db.execute("SELECT reply FROM replies WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def urls(self):
+        ''' Returns the recorded urls, in the order they were first recorded. '''
+        with self.lock:
+            return [row[0] for row in self.db.execute("SELECT url FROM replies ORDER BY rowid")]
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM replies").fetchone()[0]
+
+    def flush(self):
+        with self.lock:
+            self.db.commit()
+            self.uncommitted = 0
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+
+_archives = WeakValueDictionary()
+_archives_lock = Lock()
+
+
+def get_archive(path):
+    ''' Returns the ResponseArchive for path shared by every thread of this process. '''
+    with _archives_lock:
+        archive = _archives.get(path)
+        if archive is None:
+            archive = _archives[path] = ResponseArchive(path)
+        return archive
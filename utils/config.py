@@ -1,6 +1,12 @@
 import re
 
 
+def _check_choice(option, value, choices):
+    # Raises ValueError for a setting that is not one of choices
+    if value not in choices:
+        raise ValueError(f"{option} must be {', '.join(choices[:-1])} or {choices[-1]}, not {value!r}")
+
+
 class Config(object):
     def __init__(self, config):
         self.user_agent = config["IDENTIFICATION"]["USERAGENT"].strip()
@@ -8,12 +14,55 @@ class Config(object):
         assert self.user_agent != "DEFAULT AGENT", "Set useragent in config.ini"
         assert re.match(r"^[a-zA-Z0-9_ ,]+$", self.user_agent), "User agent should not have any special characters outside '_', ',' and 'space'"
         self.threads_count = int(config["LOCAL PROPERTIES"]["THREADCOUNT"])
+        self.scheduler = config["LOCAL PROPERTIES"].get("SCHEDULER", "lifo").strip()
+        _check_choice("SCHEDULER", self.scheduler, ("lifo", "polite", "priority"))
+        self.engine = config["LOCAL PROPERTIES"].get("ENGINE", "threads").strip()
+        _check_choice("ENGINE", self.engine, ("threads", "async", "pipeline"))
+        self.max_in_flight = int(config["LOCAL PROPERTIES"].get("MAXINFLIGHT", "100"))
+        self.extractor = config["LOCAL PROPERTIES"].get("EXTRACTOR", "bs4").strip()
+        _check_choice("EXTRACTOR", self.extractor, ("bs4", "stream", "lxml"))
+        self.parse_processes = int(config["LOCAL PROPERTIES"].get("PARSEPROCESSES", "4"))
+        self.parse_queue_size = int(config["LOCAL PROPERTIES"].get("PARSEQUEUE", "64"))
+        self.shards = int(config["LOCAL PROPERTIES"].get("SHARDS", "1"))
+        self.forward_batch = int(config["LOCAL PROPERTIES"].get("FORWARDBATCH", "100"))
         self.save_file = config["LOCAL PROPERTIES"]["SAVE"]
+        self.save_format = config["LOCAL PROPERTIES"].get("SAVEFORMAT", "shelve").strip()
+        _check_choice("SAVEFORMAT", self.save_format, ("shelve", "sqlite"))
+        self.save_batch = int(config["LOCAL PROPERTIES"].get("SAVEBATCH", "1"))
+        self.save_interval = float(config["LOCAL PROPERTIES"].get("SAVEINTERVAL", "5"))
+        self.word_counts = config["LOCAL PROPERTIES"].get("WORDCOUNTS", "exact").strip()
+        _check_choice("WORDCOUNTS", self.word_counts, ("exact", "sketch"))
+        self.analytics_file = config["LOCAL PROPERTIES"].get("ANALYTICS", "").strip()
+        self.metrics_file = config["LOCAL PROPERTIES"].get("METRICSFILE", "").strip()
+        self.metrics_interval = float(config["LOCAL PROPERTIES"].get("METRICSINTERVAL", "10"))
+        self.metrics_port = int(config["LOCAL PROPERTIES"].get("METRICSPORT", "0"))
+        self.record_file = config["LOCAL PROPERTIES"].get("RECORD", "").strip()
+        self.log_sample = int(config["LOCAL PROPERTIES"].get("LOGSAMPLE", "1"))
+        self.log_rate = int(config["LOCAL PROPERTIES"].get("LOGRATE", "0"))
 
         self.host = config["CONNECTION"]["HOST"]
         self.port = int(config["CONNECTION"]["PORT"])
+        self.connect_timeout = float(config["CONNECTION"].get("CONNECTTIMEOUT", "5"))
+        self.read_timeout = float(config["CONNECTION"].get("READTIMEOUT", "30"))
+        self.download_retries = int(config["CONNECTION"].get("RETRIES", "2"))
+        self.download_backoff = float(config["CONNECTION"].get("BACKOFF", "0.5"))
+        self.max_body_size = int(config["CONNECTION"].get("MAXBODYSIZE", "10000000"))
 
         self.seed_urls = config["CRAWLER"]["SEEDURL"].split(",")
         self.time_delay = float(config["CRAWLER"]["POLITENESS"])
+        self.sitemaps = config["CRAWLER"].get("SITEMAPS", "none").strip()
+        _check_choice("SITEMAPS", self.sitemaps, ("none", "robots"))
+        self.sitemap_urls = int(config["CRAWLER"].get("SITEMAPURLS", "100000"))
+        self.rate_floor = float(config["CRAWLER"].get("RATEFLOOR", str(self.time_delay)))
+        self.rate_ceiling = float(config["CRAWLER"].get("RATECEILING", "30"))
+        self.rate_latency = float(config["CRAWLER"].get("RATELATENCY", "2"))
+        self.pattern_budget = int(config["CRAWLER"].get("PATTERNBUDGET", "500"))
+        self.host_budget = int(config["CRAWLER"].get("HOSTBUDGET", "0"))
+        self.link_repeats = int(config["CRAWLER"].get("LINKREPEATS", "3"))
+        self.segment_repeats = int(config["CRAWLER"].get("SEGMENTREPEATS", "2"))
+        self.trap_memory = int(config["CRAWLER"].get("TRAPMEMORY", "100000"))
+        self.max_page_size = int(config["CRAWLER"].get("MAXPAGESIZE", "2000000"))
+        self.oversized_pages = config["CRAWLER"].get("OVERSIZEDPAGES", "truncate").strip()
+        _check_choice("OVERSIZEDPAGES", self.oversized_pages, ("truncate", "skip"))
 
         self.cache_server = None
\ No newline at end of file
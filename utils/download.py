@@ -1,21 +1,250 @@
 import requests
 import cbor
+import random
 import time
 
+from collections import deque
+from threading import local, Lock
+from weakref import WeakKeyDictionary
+
 from utils.response import Response
+from utils.metrics import METRICS
+from utils.archive import get_archive
+
+# Status given to a Response when the cache server could not be reached or its
+# reply was rejected (too large), since there is no http status to report.
+NO_RESPONSE = 0
+RETRY_STATUSES = range(500, 600)
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+def backoff_delay(attempt, base, cap=30.0):
+    ''' Seconds to wait before retry number attempt (from 0), with full jitter. '''
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class DownloadStats(object):
+    ''' Latency of the downloads made so far. server_seconds is the time until the
+    cache server's response headers arrived, total_seconds also includes reading the
+    body, so a slow cache server shows up in server_seconds and slow clients in the
+    difference. Percentiles are taken over the last `window` downloads. '''
+
+    def __init__(self, window=1000):
+        self.lock = Lock()
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.too_large = 0
+        self.bytes = 0
+        self.server_seconds = 0.0
+        self.total_seconds = 0.0
+        self.recent = deque(maxlen=window)  # (server_seconds, total_seconds)
+
+    def record(self, server_seconds, total_seconds, size=0):
+        METRICS.observe("download", total_seconds)
+        METRICS.count("pages downloaded")
+        with self.lock:
+            self.count += 1
+            self.bytes += size
+            self.server_seconds += server_seconds
+            self.total_seconds += total_seconds
+            self.recent.append((server_seconds, total_seconds))
+
+    def record_error(self, retried):
+        METRICS.count("download errors")
+        with self.lock:
+            self.errors += 1
+            if retried:
+                self.retries += 1
+
+    def snapshot(self):
+        with self.lock:
+            server_times = sorted(sample[0] for sample in self.recent)
+            total_times = sorted(sample[1] for sample in self.recent)
+            count = self.count
+
+            def percentile(values, fraction):
+                return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+            return {
+                "downloads": count, "errors": self.errors, "retries": self.retries,
+                "too_large": self.too_large, "bytes": self.bytes,
+                "mean_server_seconds": self.server_seconds / count if count else 0.0,
+                "mean_total_seconds": self.total_seconds / count if count else 0.0,
+                "p50_server_seconds": percentile(server_times, 0.5),
+                "p95_server_seconds": percentile(server_times, 0.95),
+                "p50_total_seconds": percentile(total_times, 0.5),
+                "p95_total_seconds": percentile(total_times, 0.95)}
+
+
+class Downloader(object):
+    ''' Downloads urls through the cache server over keep-alive connections.
+
+    Each thread gets its own requests.Session, so a worker reuses one connection
+    instead of opening a new one per url. Connection errors, timeouts and 5xx
+    replies are retried up to config.download_retries times with jittered
+    exponential backoff, and replies larger than config.max_body_size bytes are
+    dropped as soon as that is known instead of being read into memory.
+
+    If config.record_file is set, every reply is also saved to that ResponseArchive,
+    for replaying the crawl later with the stub cache server. '''
+
+    def __init__(self, config):
+        self.config = config
+        self.timeout = (config.connect_timeout, config.read_timeout)
+        self.sessions = local()
+        self.stats = DownloadStats()
+        self.archive = get_archive(config.record_file) if getattr(config, "record_file", "") else None
+
+    def _session(self):
+        session = getattr(self.sessions, "session", None)
+        if session is None:
+            session = self.sessions.session = requests.Session()
+        return session
+
+    def _read_body(self, resp):
+        max_size = self.config.max_body_size
+        if int(resp.headers.get("Content-Length") or 0) > max_size:
+            raise BodyTooLarge()
+        # Read into one growing buffer that cbor reads in place, instead of joining a
+        # list of chunks, which needs twice the body's size at the end
+        body = bytearray()
+        for chunk in resp.iter_content(chunk_size=64 * 1024):
+            if len(body) + len(chunk) > max_size:
+                raise BodyTooLarge()
+            body += chunk
+        return body
+
+    def record(self, url, content):
+        if self.archive is not None and content:
+            self.archive.put(url, content)
+
+    def flush(self):
+        ''' Saves the replies recorded so far, called when a crawl ends. '''
+        if self.archive is not None:
+            self.archive.flush()
+
+    def download(self, url, logger=None):
+        host, port = self.config.cache_server
+        attempts = self.config.download_retries + 1
+        error = None
+        for attempt in range(attempts):
+            retry = attempt + 1 < attempts
+            start = time.monotonic()
+            try:
+                with self._session().get(
+                        f"http://{host}:{port}/",
+                        params=[("q", f"{url}"), ("u", f"{self.config.user_agent}")],
+                        timeout=self.timeout, stream=True) as resp:
+                    server_seconds = time.monotonic() - start
+                    content = self._read_body(resp)
+                status = resp.status_code
+            except BodyTooLarge:
+                with self.stats.lock:
+                    self.stats.too_large += 1
+                return _error_response(
+                    url, NO_RESPONSE,
+                    f"Cache server response for {url} is over {self.config.max_body_size} bytes.",
+                    logger)
+            except requests.RequestException as e:
+                # Connection errors and timeouts, but also replies cut short or mangled
+                error = f"Could not download {url} from the cache server: {e!r}"
+                self.stats.record_error(retry)
+                if retry:
+                    time.sleep(backoff_delay(attempt, self.config.download_backoff))
+                continue
+            self.stats.record(server_seconds, time.monotonic() - start, len(content))
+            if status in RETRY_STATUSES and retry:
+                self.stats.record_error(retry)
+                time.sleep(backoff_delay(attempt, self.config.download_backoff))
+                continue
+            self.record(url, content)
+            return _decode_reply(url, status, content, logger)
+        return _error_response(url, NO_RESPONSE, error, logger)
+
+
+def _decode_reply(url, status, content, logger=None):
+    # The Response in a cache server reply: an error Response with the reply's status if
+    # the body is empty, or with NO_RESPONSE if it is not a cbor encoded Response
+    if not content:
+        return _error_response(url, status, f"Spacetime Response error <{status}> with url {url}.", logger)
+    try:
+        return Response(cbor.loads(content))
+    except Exception as e:  # cbor raises ValueError, LookupError, EOFError... for bad bytes
+        return _error_response(
+            url, NO_RESPONSE, f"Could not decode the cache server's reply for {url}: {e!r}", logger)
+
+
+def _error_response(url, status, error, logger=None):
+    if logger:
+        logger.error(error)
+    return Response({"error": error, "status": status, "url": url})
+
+
+_downloaders = WeakKeyDictionary()
+_downloaders_lock = Lock()
+
+
+def get_downloader(config):
+    ''' Returns the Downloader shared by everything using this config. '''
+    with _downloaders_lock:
+        if config not in _downloaders:
+            _downloaders[config] = Downloader(config)
+        return _downloaders[config]
+
 
 def download(url, config, logger=None):
+    return get_downloader(config).download(url, logger)
+
+
+async def download_async(url, config, session, logger=None):
+    ''' download() for the asyncio crawler, using a pooled aiohttp session. The session's
+    timeouts come from the crawler; retries, backoff and the size limit work as in
+    Downloader. '''
+    import asyncio
+    import aiohttp
     host, port = config.cache_server
-    resp = requests.get(
-        f"http://{host}:{port}/",
-        params=[("q", f"{url}"), ("u", f"{config.user_agent}")])
-    try:
-        if resp and resp.content:
-            return Response(cbor.loads(resp.content))
-    except (EOFError, ValueError) as e:
-        pass
-    logger.error(f"Spacetime Response error {resp} with url {url}.")
-    return Response({
-        "error": f"Spacetime Response error {resp} with url {url}.",
-        "status": resp.status_code,
-        "url": url})
+    downloader = get_downloader(config)
+    stats = downloader.stats
+    attempts = config.download_retries + 1
+    error = None
+    for attempt in range(attempts):
+        retry = attempt + 1 < attempts
+        start = time.monotonic()
+        try:
+            async with session.get(
+                    f"http://{host}:{port}/",
+                    params=[("q", f"{url}"), ("u", f"{config.user_agent}")]) as resp:
+                server_seconds = time.monotonic() - start
+                if (resp.content_length or 0) > config.max_body_size:
+                    raise BodyTooLarge()
+                # read(n) only returns what is buffered so far, so read every chunk
+                content = bytearray()
+                async for chunk in resp.content.iter_chunked(64 * 1024):
+                    if len(content) + len(chunk) > config.max_body_size:
+                        raise BodyTooLarge()
+                    content += chunk
+                status = resp.status
+        except BodyTooLarge:
+            with stats.lock:
+                stats.too_large += 1
+            return _error_response(
+                url, NO_RESPONSE,
+                f"Cache server response for {url} is over {config.max_body_size} bytes.", logger)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = f"Could not download {url} from the cache server: {e!r}"
+            stats.record_error(retry)
+            if retry:
+                await asyncio.sleep(backoff_delay(attempt, config.download_backoff))
+            continue
+        stats.record(server_seconds, time.monotonic() - start, len(content))
+        if status in RETRY_STATUSES and retry:
+            stats.record_error(retry)
+            await asyncio.sleep(backoff_delay(attempt, config.download_backoff))
+            continue
+        downloader.record(url, content)
+        return _decode_reply(url, status, content, logger)
+    return _error_response(url, NO_RESPONSE, error, logger)
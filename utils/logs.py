@@ -0,0 +1,173 @@
+import atexit
+import logging
+import os
+import time
+
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue
+from threading import Lock
+
+LOG_DIR = "Logs"
+FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# extra= for log lines written once per url, which configure_logging can sample
+PER_URL = {"per_url": True}
+
+
+class PerUrlFilter(logging.Filter):
+    ''' Thins out per url lines (logged with extra=PER_URL below WARNING): keeps one in
+    every sample_every of them, and at most max_per_second a second (0 for no limit).
+    Other lines always pass. Runs in the thread that logs, before the line is formatted
+    or queued, so a dropped line costs almost nothing. '''
+
+    def __init__(self, sample_every=1, max_per_second=0):
+        super().__init__()
+        self.lock = Lock()
+        self.configure(sample_every, max_per_second)
+
+    def configure(self, sample_every=1, max_per_second=0):
+        with self.lock:
+            self.sample_every = max(1, sample_every)
+            self.max_per_second = max_per_second
+            self.seen = 0
+            self.second = 0
+            self.in_second = 0
+
+    def filter(self, record):
+        if not getattr(record, "per_url", False) or record.levelno >= logging.WARNING:
+            return True
+        with self.lock:
+            self.seen += 1
+            if self.seen % self.sample_every:
+                return False
+            if self.max_per_second:
+                second = int(time.monotonic())
+                if second != self.second:
+                    self.second, self.in_second = second, 0
+                if self.in_second >= self.max_per_second:
+                    return False
+                self.in_second += 1
+            return True
+
+
+class _BufferedFileHandler(logging.FileHandler):
+    # Writes without flushing after every line; the listener flushes once the queue is empty
+    def flush(self):
+        pass
+
+    def flush_now(self):
+        super().flush()
+
+
+class _RoutingHandler(logging.Handler):
+    # The one handler of the listener thread: writes each record to its logger's file
+    # (one handler per file, however many loggers share it) and to the console
+    def __init__(self, queue):
+        super().__init__()
+        self.queue = queue
+        self.files = dict()
+        self.formatter = logging.Formatter(FORMAT)
+        self.console = logging.StreamHandler()
+        self.console.setFormatter(self.formatter)
+
+    def file_handler(self, filename):
+        handler = self.files.get(filename)
+        if handler is None:
+            if not os.path.exists(LOG_DIR):
+                os.makedirs(LOG_DIR)
+            handler = self.files[filename] = _BufferedFileHandler(os.path.join(LOG_DIR, f"{filename}.log"))
+            handler.setFormatter(self.formatter)
+        return handler
+
+    def handle(self, record):
+        self.file_handler(record.log_file).handle(record)
+        self.console.handle(record)
+        if self.queue.empty():
+            self.flush_files()
+
+    def flush_files(self):
+        for handler in list(self.files.values()):
+            handler.flush_now()
+
+
+class _LoggerQueueHandler(QueueHandler):
+    # Tags records with the file of their logger before they cross to the listener. The
+    # listener is a thread of the same process, so records are queued as they are instead
+    # of copied and formatted first (QueueHandler's default, for other processes): the
+    # thread that logs only pays for creating the record.
+    def __init__(self, queue, log_file):
+        super().__init__(queue)
+        self.log_file = log_file
+
+    def prepare(self, record):
+        record.log_file = self.log_file
+        return record
+
+
+_queue = Queue()
+_router = _RoutingHandler(_queue)
+_listener = None
+_loggers = set()
+_setup_lock = Lock()
+per_url_filter = PerUrlFilter()
+
+
+def _start_listener():
+    global _listener
+    if _listener is None:
+        _listener = QueueListener(_queue, _router)
+        _listener.start()
+        atexit.register(_stop_listener)
+
+
+def _stop_listener():
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            _router.flush_files()
+
+
+def _restart_in_child():
+    # A forked process (e.g. a parse worker) has the queue but not the listener thread,
+    # and the queue's lock may have been held by a thread that did not survive the fork
+    global _listener, _setup_lock
+    _queue.__init__()
+    _setup_lock = Lock()
+    per_url_filter.lock = Lock()
+    if _listener is not None:
+        _listener = QueueListener(_queue, _router)
+        _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def get_logger(name, filename=None):
+    ''' Returns the logger name, writing to Logs/<filename or name>.log and the console.
+
+    Lines are handed to a queue and written by one background thread, so a worker never
+    waits on file or console I/O or on another worker's log line, and file writes are
+    flushed in batches. Calling get_logger again for a name returns the same logger
+    without adding handlers. '''
+    logger = logging.getLogger(name)
+    with _setup_lock:
+        if name not in _loggers:
+            logger.setLevel(logging.INFO)
+            handler = _LoggerQueueHandler(_queue, filename if filename else name)
+            handler.addFilter(per_url_filter)
+            logger.addHandler(handler)
+            _loggers.add(name)
+            _start_listener()
+    return logger
+
+
+def configure_logging(config):
+    ''' Sets how per url lines are sampled (LOGSAMPLE, LOGRATE in config.ini). '''
+    per_url_filter.configure(config.log_sample, config.log_rate)
+
+
+def flush_logs():
+    ''' Waits until every line logged so far is written out. '''
+    _queue.join()
+    _router.flush_files()
@@ -0,0 +1,199 @@
+import json
+import os
+import time
+
+from bisect import bisect_left
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock, Event
+
+# Upper bounds in seconds of the histogram buckets: powers of two from about 8
+# microseconds to 128 seconds, plus one bucket for anything slower
+BUCKET_BOUNDS = [2.0 ** exponent for exponent in range(-17, 8)]
+
+
+class Histogram(object):
+    ''' Counts of durations in BUCKET_BOUNDS buckets. Percentiles are read off the
+    buckets, so they are the upper bound of the bucket the percentile falls in (at most
+    twice the real value), in constant memory however many durations are observed. '''
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.buckets[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count, "total_seconds": self.total,
+            "mean_seconds": self.total / self.count if self.count else 0.0,
+            "p50_seconds": self.percentile(0.5), "p95_seconds": self.percentile(0.95),
+            "p99_seconds": self.percentile(0.99), "max_seconds": self.max}
+
+
+class _StageTimer(object):
+    # Context manager of Metrics.time, a class because it is cheaper than @contextmanager
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+
+
+class Metrics(object):
+    ''' Timings of the crawl's stages, event counters and gauges, shared by every thread.
+
+    - observe(stage, seconds) or `with time(stage):` adds a duration to the stage's
+      Histogram.
+    - count(name) adds to a counter; snapshot(reader) reports counters in total and per
+      second since that reader's previous snapshot, so readers polling at different
+      intervals (the snapshot file, the HTTP endpoint) each get their own rates.
+    - ratio(name, numerator, denominator) reports one counter over another.
+    - gauge(name, function) reports function() at each snapshot, for state that is
+      cheaper to read when asked than to keep up to date (e.g. frontier depth). '''
+
+    def __init__(self):
+        self.lock = Lock()
+        self.start_time = time.monotonic()
+        self.histograms = dict()
+        self.counters = Counter()
+        self.ratios = dict()  # name -> (numerator counter, denominator counter)
+        self.gauges = dict()  # name -> function returning the gauge's value
+        self.last_snapshots = dict()  # reader -> (time, counters) of its previous snapshot
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def time(self, stage):
+        return _StageTimer(self, stage)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def ratio(self, name, numerator, denominator):
+        self.ratios[name] = (numerator, denominator)
+
+    def gauge(self, name, function):
+        self.gauges[name] = function
+
+    def snapshot(self, reader="default"):
+        ''' Returns the metrics as a dict that can be written as JSON. '''
+        now = time.monotonic()
+        with self.lock:
+            stages = {stage: histogram.snapshot() for stage, histogram in self.histograms.items()}
+            counters = Counter(self.counters)
+            last_time, last_counters = self.last_snapshots.get(reader, (self.start_time, Counter()))
+            self.last_snapshots[reader] = (now, counters)
+        interval = now - last_time
+        gauges = dict()
+        for name, function in list(self.gauges.items()):
+            try:
+                gauges[name] = function()
+            except Exception as e:  # a gauge should never break the snapshot
+                gauges[name] = repr(e)
+        return {
+            "time": time.time(),
+            "uptime_seconds": now - self.start_time,
+            "stages": stages,
+            "counters": dict(counters),
+            "per_second": {
+                name: (counters[name] - last_counters[name]) / interval if interval > 0 else 0.0
+                for name in counters},
+            "ratios": {
+                name: counters[numerator] / counters[denominator] if counters[denominator] else 0.0
+                for name, (numerator, denominator) in self.ratios.items()},
+            "gauges": gauges}
+
+
+# The metrics of this process, recorded by every part of the crawler
+METRICS = Metrics()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = json.dumps(self.server.metrics.snapshot("http"), indent=2).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsExporter(object):
+    ''' Makes METRICS visible while the crawl runs: as JSON on http://localhost:port/metrics
+    if port is set, and written to snapshot_file every interval seconds if that is set.
+    The file is replaced in one step, so a reader never sees half a snapshot. '''
+
+    def __init__(self, metrics=METRICS, snapshot_file=None, interval=10.0, port=0):
+        self.metrics = metrics
+        self.snapshot_file = snapshot_file
+        self.interval = interval
+        self.port = port
+        self.server = None
+        self.stopped = Event()
+        self.writer = None
+
+    def start(self):
+        if self.port:
+            self.server = ThreadingHTTPServer(("localhost", self.port), _MetricsHandler)
+            self.server.daemon_threads = True
+            self.server.metrics = self.metrics
+            self.port = self.server.server_address[1]
+            Thread(target=self.server.serve_forever, daemon=True).start()
+        if self.snapshot_file:
+            self.writer = Thread(target=self._write_periodically, daemon=True)
+            self.writer.start()
+        return self
+
+    def _write_periodically(self):
+        while not self.stopped.wait(self.interval):
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        temporary_file = self.snapshot_file + ".tmp"
+        with open(temporary_file, "w") as snapshot_file:
+            json.dump(self.metrics.snapshot("file"), snapshot_file, indent=2)
+        os.replace(temporary_file, self.snapshot_file)
+
+    def stop(self):
+        ''' Stops the exporter, writing a last snapshot of the finished crawl. '''
+        self.stopped.set()
+        if self.writer is not None:
+            self.writer.join()
+            self.write_snapshot()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
@@ -1,14 +1,39 @@
 import pickle
+import time
+
+from utils.metrics import METRICS
 
 class Response(object):
+    ''' A cache server reply. The pickled page in it is only unpickled the first time
+    raw_response is read, so replies that are never parsed (errors, non-200 statuses)
+    never pay for it, and release() drops the page once it has been scraped. '''
+
     def __init__(self, resp_dict):
         self.url = resp_dict["url"]
         self.status = resp_dict["status"]
         self.error = resp_dict["error"] if "error" in resp_dict else None
-        try:
-            self.raw_response = (
-                pickle.loads(resp_dict["response"])
-                if "response" in resp_dict else
-                None)
-        except TypeError:
-            self.raw_response = None
+        # Pickled requests.Response, as bytes straight from the cbor reply (not copied)
+        self._payload = resp_dict.get("response")
+        self._raw_response = None
+
+    @property
+    def raw_response(self):
+        if self._payload is not None:
+            payload, self._payload = self._payload, None
+            start = time.perf_counter()
+            try:
+                self._raw_response = pickle.loads(payload)
+            except Exception:  # not a pickled page, or one that no longer unpickles
+                self._raw_response = None
+            METRICS.observe("response decode", time.perf_counter() - start)
+        return self._raw_response
+
+    @raw_response.setter
+    def raw_response(self, raw_response):
+        self._payload = None
+        self._raw_response = raw_response
+
+    def release(self):
+        ''' Drops the page (pickled or not), once nothing needs it anymore. '''
+        self._payload = None
+        self._raw_response = None
@@ -0,0 +1,171 @@
+import pickle
+import random
+import time
+import zlib
+
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from urllib.parse import urlparse, parse_qs
+
+import cbor
+import requests
+
+from utils.archive import ResponseArchive
+
+WORDS = (
+    "research students faculty course computer science informatics statistics "
+    "machine learning data systems software network security theory graduate "
+    "undergraduate seminar lab project paper conference award department school "
+    "algorithm database vision language model analysis design human interaction").split()
+
+
+class StubSite(object):
+    ''' A made up site of hosts * pages_per_host html pages under ics.uci.edu, where
+    every page links to a few pages on other hosts. Pages only depend on their url,
+    so every run crawls the same site.
+
+    The sitemap index robots.txt lists for ics.uci.edu (SITEMAP_INDEX) lists a sitemap
+    per host, with every page of the host and its lastmod: DEFAULT_LASTMOD, or the
+    date in lastmod (url -> W3C datetime), which can be changed between runs. '''
+    SITEMAP_INDEX = "https://ics.uci.edu/sitemap_index.xml"
+    DEFAULT_LASTMOD = "2024-01-01T00:00:00+00:00"
+
+    def __init__(self, hosts=20, pages_per_host=50, links_per_page=5, words_per_page=300):
+        self.hosts = hosts
+        self.pages_per_host = pages_per_host
+        self.links_per_page = links_per_page
+        self.words_per_page = words_per_page
+        self.lastmod = dict()
+
+    def seed_urls(self):
+        return [f"https://site{host}.ics.uci.edu/page0" for host in range(self.hosts)]
+
+    def page(self, url):
+        ''' Returns the html of url, or None if it is not part of the site. '''
+        parsed = urlparse(url)
+        try:
+            host = int(parsed.netloc.split(".")[0][len("site"):])
+            page = int(parsed.path.rstrip("/")[len("/page"):])
+        except ValueError:
+            return None
+        if not (0 <= host < self.hosts and 0 <= page < self.pages_per_host):
+            return None
+        rng = random.Random(zlib.crc32(url.encode("utf-8")))
+        # A unique word per page keeps pages from looking like near duplicates
+        words = [f"site{host}page{page}"] + rng.choices(WORDS, k=self.words_per_page)
+        words += [f"w{rng.randrange(100000)}" for _ in range(self.words_per_page // 3)]
+        links = "".join(
+            f'<a href="https://site{rng.randrange(self.hosts)}.ics.uci.edu/'
+            f'page{rng.randrange(self.pages_per_host)}">link</a>'
+            for _ in range(self.links_per_page))
+        return (
+            f"<html><head><title>site{host} page{page}</title></head>"
+            f"<body><p>{' '.join(words)}</p>{links}</body></html>").encode("utf-8")
+
+    def sitemap(self, url):
+        ''' Returns the xml of the sitemap index or of a host's sitemap, or None if url
+        is neither. '''
+        if url == self.SITEMAP_INDEX:
+            entries = "".join(
+                f"<sitemap><loc>https://site{host}.ics.uci.edu/sitemap.xml</loc></sitemap>"
+                for host in range(self.hosts))
+            tag = "sitemapindex"
+        else:
+            parsed = urlparse(url)
+            if parsed.path != "/sitemap.xml" or self.page(f"https://{parsed.netloc}/page0") is None:
+                return None
+            pages = [f"https://{parsed.netloc}/page{page}" for page in range(self.pages_per_host)]
+            entries = "".join(
+                f"<url><loc>{page}</loc><lastmod>{self.lastmod.get(page, self.DEFAULT_LASTMOD)}</lastmod></url>"
+                for page in pages)
+            tag = "urlset"
+        return (
+            f'<?xml version="1.0" encoding="UTF-8"?>'
+            f'<{tag} xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</{tag}>').encode("utf-8")
+
+    def reply(self, url):
+        ''' Returns the cbor body the cache server sends for url. '''
+        content = self.page(url) or self.sitemap(url)
+        if content is None:
+            return make_response(url, 404, b"")
+        return make_response(url, 200, content)
+
+
+class ReplaySite(object):
+    ''' Serves the replies recorded in a ResponseArchive (RECORD in config.ini) as they
+    were recorded, and a 404 for urls that were not recorded. '''
+
+    def __init__(self, archive):
+        self.archive = archive
+
+    def reply(self, url):
+        reply = self.archive.get(url)
+        if reply is None:
+            return make_response(url, 404, b"")
+        return reply
+
+
+def make_response(url, status, content):
+    ''' Returns the cbor body the cache server sends for url. '''
+    raw_response = requests.models.Response()
+    raw_response.status_code = status
+    raw_response.url = url
+    raw_response._content = content
+    raw_response.headers["Content-Type"] = "text/html; charset=utf-8"
+    raw_response.headers["Content-Length"] = str(len(content))
+    return cbor.dumps({"url": url, "status": status, "response": pickle.dumps(raw_response)})
+
+
+class StubCacheHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real cache server
+    # Headers and body are written separately, Nagle's algorithm would hold the body back
+    # until the client's delayed ack (about 40ms) and add that to every reply
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        body = self.server.site.reply(url)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubCacheServer(ThreadingHTTPServer):
+    ''' Local stand-in for the spacetime cache server, for running the crawler offline. '''
+    daemon_threads = True
+
+    def __init__(self, address=("localhost", 0), site=None, latency=0.0):
+        super().__init__(address, StubCacheHandler)
+        self.site = site or StubSite()
+        self.latency = latency
+
+    def start(self):
+        ''' Serves in a background thread, returns the (host, port) to use as cache server. '''
+        Thread(target=self.serve_forever, daemon=True).start()
+        return self.server_address[:2]
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--hosts", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=50, help="pages per host")
+    parser.add_argument("--archive", type=str, default=None, help="serve the replies recorded in this RECORD file")
+    args = parser.parse_args()
+    if args.archive:
+        archive = ResponseArchive(args.archive)
+        server = StubCacheServer(("localhost", args.port), ReplaySite(archive), args.latency)
+        print(f"Stub cache server on localhost:{args.port}, replaying {len(archive)} recorded urls")
+    else:
+        server = StubCacheServer(
+            ("localhost", args.port), StubSite(args.hosts, args.pages), args.latency)
+        print(f"Stub cache server on localhost:{args.port}, seeds: {','.join(server.site.seed_urls())}")
+    server.serve_forever()